@@ -0,0 +1,3 @@
+"""
+Benchmarks for gerrytools on synthetic maps; see `benchmarks/README.md`.
+"""
@@ -0,0 +1,310 @@
+"""
+Runs the benchmarks and writes their timings as JSON.
+
+    python -m benchmarks.run --sizes 1000 10000 --output results.json
+    python -m benchmarks.run --compare baseline.json results.json
+
+Each benchmark is timed `--repeat` times on freshly built inputs (setting up
+the inputs isn't timed), on synthetic grid and hexagonal maps of each size.
+Nothing is downloaded.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from statistics import median
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from gerrychain import Partition
+from gerrychain.updaters import Election, Tally
+
+import gerrytools
+from gerrytools.data.AssignmentCompressor import AssignmentCompressor
+from gerrytools.geometry import dualgraph
+from gerrytools.geometry.compactness import UnitGeometry, _reock
+from gerrytools.geometry.dissolve import hierarchical_block_dissolve
+from gerrytools.scoring import (
+    competitive_contests,
+    cut_edges,
+    demographic_tallies,
+    efficiency_gap,
+    pieces,
+    polsby_popper,
+    reock,
+    seats,
+    splits,
+    summarize_many,
+)
+from gerrytools.scoring.splits import _splits
+
+from .synthetic import ELECTIONS, Map, ensemble, hierarchy, synthetic_map
+
+# Benchmarks take the map, the ensemble's assignments and the run's options,
+# and return a function timed by the runner.
+Benchmark = Callable[[Map, List[Dict[int, int]], argparse.Namespace], Callable]
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str):
+    def register(setup: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def _partitions(state_map: Map, assignments: List[Dict[int, int]]) -> List[Partition]:
+    updaters = {
+        "TOTPOP": Tally("TOTPOP", alias="TOTPOP"),
+        **{
+            name: Election(name, {"Dem": dem, "Rep": rep})
+            for name, (dem, rep) in ELECTIONS.items()
+        },
+    }
+    return [Partition(state_map.graph, a, updaters) for a in assignments]
+
+
+@benchmark("summarize")
+def _summarize(state_map, assignments, options):
+    elections = list(ELECTIONS)
+    scores = [
+        *demographic_tallies(["TOTPOP"]),
+        cut_edges(),
+        splits("COUNTY"),
+        pieces("COUNTY"),
+        competitive_contests(elections, "Dem"),
+        seats(elections, "Dem"),
+        efficiency_gap(elections),
+        polsby_popper(dissolved=False),
+    ]
+    parts = _partitions(state_map, assignments)
+    return lambda: summarize_many(parts, scores)
+
+
+@benchmark("summarize_incremental")
+def _summarize_incremental(state_map, assignments, options):
+    # A chain-like ensemble: each plan moves a handful of units of the last.
+    rng = np.random.default_rng(options.seed)
+    first = _partitions(state_map, assignments[:1])[0]
+    parts, part = [first], first
+    for _ in range(len(assignments) - 1):
+        edges = list(part["cut_edges"])
+        flips = {}
+        for i in rng.choice(len(edges), min(5, len(edges)), replace=False):
+            u, v = edges[i]
+            flips[u] = part.assignment[v]
+        part = part.flip(flips)
+        parts.append(part)
+    scores = [
+        *demographic_tallies(["TOTPOP"]),
+        cut_edges(),
+        splits("COUNTY"),
+        competitive_contests(list(ELECTIONS), "Dem"),
+        polsby_popper(dissolved=False),
+    ]
+    return lambda: summarize_many(parts, scores, incremental=True)
+
+
+@benchmark("splits")
+def _splits_benchmark(state_map, assignments, options):
+    parts = _partitions(state_map, assignments)
+    return lambda: [_splits(part, "COUNTY") for part in parts]
+
+
+@benchmark("reock")
+def _reock_benchmark(state_map, assignments, options):
+    dissolved = []
+    for assignment in assignments:
+        gdf = state_map.gdf[["geometry"]].copy()
+        gdf["assignment"] = pd.Series(assignment)
+        dissolved.append(gdf.dissolve(by="assignment"))
+    return lambda: [_reock(gdf) for gdf in dissolved]
+
+
+@benchmark("reock_graph")
+def _reock_graph_benchmark(state_map, assignments, options):
+    geometry = UnitGeometry.from_geodataframe(state_map.graph, state_map.gdf)
+    score = reock(geometry)
+    parts = _partitions(state_map, assignments)
+    return lambda: [score.apply(part) for part in parts]
+
+
+@benchmark("dualgraph")
+def _dualgraph(state_map, assignments, options):
+    gdf = state_map.gdf[["GEOID20", "geometry"]]
+    return lambda: dualgraph(gdf, index="GEOID20")
+
+
+@benchmark("hierarchical_block_dissolve")
+def _hierarchical_block_dissolve(state_map, assignments, options):
+    state = hierarchy(state_map)
+    geoids = state_map.gdf["GEOID20"].tolist()
+    tables = [
+        pd.DataFrame(
+            {"GEOID20": geoids, "district": [a[n] for n in range(len(geoids))]}
+        )
+        for a in assignments
+    ]
+    return lambda: [
+        hierarchical_block_dissolve(state, table, "district") for table in tables
+    ]
+
+
+@benchmark("assignment_compressor")
+def _assignment_compressor(state_map, assignments, options):
+    geoids = state_map.gdf["GEOID20"].tolist()
+    plans = [{geoids[n]: str(d) for n, d in a.items()} for a in assignments]
+    handle, location = tempfile.mkstemp(suffix=".ac")
+    os.close(handle)
+
+    def run():
+        try:
+            AssignmentCompressor(geoids, location=location).compress_all(plans)
+            for _ in AssignmentCompressor(geoids, location=location).decompress():
+                pass
+        finally:
+            os.remove(location)
+
+    return run
+
+
+def _commit() -> Optional[str]:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "HEAD"],
+                cwd=os.path.dirname(__file__),
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(options: argparse.Namespace) -> dict:
+    """
+    Runs the selected benchmarks and returns their results.
+    """
+    results = []
+    for kind in options.kinds:
+        for size in options.sizes:
+            state_map = synthetic_map(kind, size, seed=options.seed)
+            assignments = ensemble(
+                state_map, options.districts, options.plans, seed=options.seed
+            )
+            for name in options.benchmarks:
+                seconds = []
+                for _ in range(options.repeat):
+                    timed = BENCHMARKS[name](state_map, assignments, options)
+                    start = time.perf_counter()
+                    timed()
+                    seconds.append(time.perf_counter() - start)
+                result = {
+                    "benchmark": name,
+                    "kind": kind,
+                    "size": state_map.size,
+                    "plans": len(assignments),
+                    "seconds": seconds,
+                    "best": min(seconds),
+                    "median": median(seconds),
+                }
+                results.append(result)
+                print(
+                    f"{name:>28} {kind:>4} {state_map.size:>9,} units: "
+                    f"{result['best']:.4f}s",
+                    file=sys.stderr,
+                )
+
+    return {
+        "meta": {
+            "commit": _commit(),
+            "gerrytools": gerrytools.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "options": {
+                key: value for key, value in vars(options).items() if key != "compare"
+            },
+        },
+        "results": results,
+    }
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline: dict, current: dict) -> pd.DataFrame:
+    """
+    Lines up two runs' results, with the ratio of their best times (above 1
+    when `current` is slower).
+    """
+    key = ["benchmark", "kind", "size", "plans"]
+    left = pd.DataFrame(baseline["results"])[key + ["best"]]
+    right = pd.DataFrame(current["results"])[key + ["best"]]
+    table = left.merge(right, on=key, suffixes=("_baseline", "_current"))
+    table["ratio"] = table["best_current"] / table["best_baseline"]
+    return table
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--benchmarks",
+        nargs="+",
+        choices=sorted(BENCHMARKS),
+        default=list(BENCHMARKS),
+        help="Benchmarks to run; defaults to all.",
+    )
+    parser.add_argument(
+        "--kinds", nargs="+", choices=["grid", "hex"], default=["grid", "hex"]
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=[1_000, 10_000, 100_000],
+        help="Map sizes, in units; pass 1000000 for the largest maps.",
+    )
+    parser.add_argument("--plans", type=int, default=10, help="Plans per ensemble.")
+    parser.add_argument("--districts", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--output", help="Where to write results; stdout if unset.")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BASELINE", "CURRENT"),
+        help="Compare two results files instead of running.",
+    )
+    options = parser.parse_args(argv)
+    warnings.simplefilter("ignore")
+
+    if options.compare:
+        baseline, current = (_load(path) for path in options.compare)
+        print(compare(baseline, current).to_string(index=False))
+        return
+
+    results = run(options)
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
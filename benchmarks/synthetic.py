@@ -0,0 +1,220 @@
+"""
+Synthetic dual graphs, geometries, Census hierarchies and ensembles for the
+benchmarks. Everything is generated from a seed, so a benchmark sees the same
+inputs on every run and every commit.
+"""
+
+from dataclasses import dataclass
+from math import sqrt
+from typing import Dict, List
+
+import numpy as np
+import shapely
+import us
+from geopandas import GeoDataFrame
+from gerrychain import Graph
+from scipy.spatial import cKDTree
+
+from gerrytools.geometry.dissolve import StateHierarchy
+
+# Election columns on every synthetic unit, as (Democratic, Republican) pairs.
+ELECTIONS = {"SEN": ("SEN_D", "SEN_R"), "GOV": ("GOV_D", "GOV_R")}
+
+# Side lengths, in units, of the square tiles making up a block group; in
+# block groups, of a tract's; and in tracts, of a county's.
+TILES = {"bg": 4, "tract": 3, "county": 8}
+
+
+@dataclass
+class Map:
+    """
+    A synthetic state: `size` units laid out as a square grid or hexagonal
+    tiling, with their dual graph and geometries.
+
+    Attributes:
+        kind (str): `"grid"` or `"hex"`.
+        graph (Graph): The dual graph, with the boundary data GerryChain
+            records (`area`, `boundary_perim`, `shared_perim`) and demographic,
+            election and Census-hierarchy columns on each node.
+        gdf (GeoDataFrame): The units' geometries and the same columns, indexed
+            like the graph's nodes.
+        centroids (np.ndarray): (units × 2) array of unit centers.
+    """
+
+    kind: str
+    graph: Graph
+    gdf: GeoDataFrame
+    centroids: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.centroids)
+
+
+def _grid(side: int):
+    rows, cols = np.divmod(np.arange(side * side), side)
+    x, y = cols.astype(float), rows.astype(float)
+    geometries = shapely.box(x, y, x + 1, y + 1)
+
+    # Rook adjacency: right and up neighbors.
+    index = np.arange(side * side).reshape(side, side)
+    edges = np.concatenate(
+        [
+            np.stack([index[:, :-1].ravel(), index[:, 1:].ravel()], axis=1),
+            np.stack([index[:-1, :].ravel(), index[1:, :].ravel()], axis=1),
+        ]
+    )
+    return rows, cols, np.stack([x + 0.5, y + 0.5], axis=1), geometries, edges, 4, 1.0
+
+
+def _hex(side: int):
+    # Pointy-topped hexagons of unit side, odd rows shifted right by half.
+    rows, cols = np.divmod(np.arange(side * side), side)
+    x = sqrt(3) * (cols + 0.5 * (rows % 2))
+    y = 1.5 * rows
+    angles = np.radians(30 + 60 * np.arange(7))
+    coords = np.stack(
+        [x[:, None] + np.cos(angles), y[:, None] + np.sin(angles)], axis=2
+    )
+    # Snap vertices so neighbors share their edges exactly.
+    geometries = shapely.set_precision(shapely.polygons(coords), 1e-6)
+
+    index = np.arange(side * side).reshape(side, side)
+    edges = [np.stack([index[:, :-1].ravel(), index[:, 1:].ravel()], axis=1)]
+    for r in range(side - 1):
+        up = index[r + 1]
+        # Even rows touch the cells above at columns c - 1 and c; odd rows at
+        # c and c + 1.
+        shift = -1 if r % 2 == 0 else 1
+        edges.append(np.stack([index[r], up], axis=1))
+        if shift < 0:
+            edges.append(np.stack([index[r, 1:], up[:-1]], axis=1))
+        else:
+            edges.append(np.stack([index[r, :-1], up[1:]], axis=1))
+    return (
+        rows,
+        cols,
+        np.stack([x, y], axis=1),
+        geometries,
+        np.concatenate(edges),
+        6,
+        3 * sqrt(3) / 2,
+    )
+
+
+def synthetic_map(kind: str, size: int, seed: int = 0) -> Map:
+    """
+    Generates a synthetic state of about `size` units.
+
+    Args:
+        kind (str): `"grid"` for square units or `"hex"` for hexagons.
+        size (int): Approximate number of units; rounded to a square number.
+        seed (int, optional): Seed for the demographic and election data.
+
+    Returns:
+        The `Map`.
+    """
+    side = max(2, round(sqrt(size)))
+    if kind == "grid":
+        rows, cols, centroids, geometries, edges, sides, area = _grid(side)
+    elif kind == "hex":
+        rows, cols, centroids, geometries, edges, sides, area = _hex(side)
+    else:
+        raise ValueError(f'Unknown map kind "{kind}"; use "grid" or "hex".')
+
+    n = side * side
+    rng = np.random.default_rng(seed)
+    columns = {
+        "TOTPOP": rng.integers(50, 150, n),
+        "BPOP": rng.integers(0, 50, n),
+    }
+    for dem, rep in ELECTIONS.values():
+        columns[dem] = rng.integers(0, 100, n)
+        columns[rep] = rng.integers(0, 100, n)
+
+    # Nest units in block groups, tracts and counties by square tiles, and
+    # give each a Census-style 15-character block GEOID: state, county, tract,
+    # block group, block.
+    bg_side = TILES["bg"]
+    tract_side = bg_side * TILES["tract"]
+    county_side = tract_side * TILES["county"]
+    county = (rows // county_side) * -(-side // county_side) + cols // county_side
+    tract = (rows // tract_side) * -(-side // tract_side) + cols // tract_side
+    bg = ((rows // bg_side) % TILES["tract"]) * TILES["tract"] + (
+        cols // bg_side
+    ) % TILES["tract"]
+    block = (rows % bg_side) * bg_side + cols % bg_side
+    columns["COUNTY"] = county
+    columns["GEOID20"] = np.array(
+        [
+            f"01{c:03}{t:06}{b}{k:03}"
+            for c, t, b, k in zip(county.tolist(), tract.tolist(), bg, block)
+        ]
+    )
+
+    degree = np.bincount(edges.ravel(), minlength=n)
+    graph = Graph()
+    graph.add_nodes_from(range(n))
+    for name, values in columns.items():
+        for node, value in enumerate(values.tolist()):
+            graph.nodes[node][name] = value
+    for node in range(n):
+        graph.nodes[node]["area"] = area
+        graph.nodes[node]["boundary_perim"] = float(sides - degree[node])
+    graph.add_edges_from(edges.tolist(), shared_perim=1.0)
+
+    gdf = GeoDataFrame(columns, geometry=geometries, crs="EPSG:3857")
+    return Map(kind, graph, gdf, centroids)
+
+
+def hierarchy(state_map: Map) -> StateHierarchy:
+    """
+    Builds the Census hierarchy of `state_map`: its units are the blocks, and
+    block groups, tracts and counties are dissolved from them.
+
+    Args:
+        state_map (Map): The synthetic state.
+
+    Returns:
+        A `StateHierarchy` indexed by GEOID.
+    """
+    blocks = state_map.gdf[["GEOID20", "geometry"]].set_index("GEOID20")
+    levels = {}
+    for level, prefix in [("bg", 12), ("tract", 11), ("county", 5)]:
+        levels[level] = blocks.dissolve(by=blocks.index.str[:prefix]).rename_axis(
+            "GEOID20"
+        )
+    return StateHierarchy(
+        state=us.states.AL,
+        blocks=blocks,
+        block_groups=levels["bg"],
+        tracts=levels["tract"],
+        counties=levels["county"],
+    )
+
+
+def ensemble(
+    state_map: Map, districts: int, plans: int, seed: int = 0
+) -> List[Dict[int, int]]:
+    """
+    Draws `plans` plans with `districts` districts each, by assigning every
+    unit to the nearest of `districts` randomly placed centers (a Voronoi
+    partition of the map).
+
+    Args:
+        state_map (Map): The synthetic state.
+        districts (int): Number of districts per plan.
+        plans (int): Number of plans.
+        seed (int, optional): Seed for the centers.
+
+    Returns:
+        A list of assignments mapping nodes to districts `1, ..., districts`.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = state_map.centroids
+    assignments = []
+    for _ in range(plans):
+        centers = centroids[rng.choice(len(centroids), districts, replace=False)]
+        _, nearest = cKDTree(centers).query(centroids)
+        assignments.append(dict(enumerate((nearest + 1).tolist())))
+    return assignments
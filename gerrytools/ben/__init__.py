@@ -1,4 +1,7 @@
 from .binary_ensemble import ben, ben_replay
+from .codec import BenWriter, assignment_arrays, read_ben
+from .docker_manager import DockerSession
+from .index import BenIndex, index_ben
 from .reben import (
     canonicalize_ben_file,
     relabel_json_file_by_key,
@@ -28,6 +31,12 @@ logger.addHandler(handler)
 __all__ = [
     "ben",
     "ben_replay",
+    "read_ben",
+    "assignment_arrays",
+    "BenWriter",
+    "BenIndex",
+    "index_ben",
+    "DockerSession",
     "msms_parse",
     "smc_parse",
     "canonicalize_ben_file",
@@ -1,8 +1,9 @@
-import docker
 from pathlib import Path
 from typing import Optional
 import os
-from .docker_manager import managed_docker_container
+import numpy as np
+from .codec import assignment_arrays, read_ben
+from .docker_manager import DockerSession, _session
 import logging
 import json
 
@@ -16,6 +17,7 @@ def ben(
     verbose: bool = True,
     docker_image_name: str = "mgggdev/replicate:v0.2",
     docker_client_args: Optional[dict] = None,
+    session: Optional[DockerSession] = None,
 ):
     """
     Runs the BEN CLI tool from the `binary-ensemble <https://crates.io/crates/binary-ensemble>`_
@@ -35,61 +37,9 @@ def ben(
         docker_client_args (dict, optional): Additional arguments to pass to the Docker client.
             Used primarily if there are multiple docker contexts on the same machine.
             Defaults to None.
+        session (DockerSession, optional): A session whose container runs the tool.
+            Defaults to a container for this call alone.
     """
-
-    if docker_client_args is not None:
-        client = docker.DockerClient(**docker_client_args)
-    else:
-        client = docker.from_env()
-
-    # Set up the input and output paths
-    input_parent_path = Path(input_file_path).parent
-    input_file_name = Path(input_file_path).name
-
-    if output_file_path is not None:
-        output_parent_path = Path(output_file_path).parent
-        output_file_name = Path(output_file_path).name
-    else:
-        output_parent_path = input_parent_path
-        output_file_name = None
-
-    os.makedirs(output_parent_path, exist_ok=True)
-
-    config_args = {
-        "name": "ben_runner",
-        "image": docker_image_name,
-        "detach": True,
-        "auto_remove": True,
-        "tty": True,
-        "stdin_open": True,
-    }
-
-    if input_parent_path == output_parent_path:
-        config_args["volumes"] = {
-            os.getcwd(): {"bind": "/home/ben/working", "mode": "rw"},
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/io",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/io"
-        docker_output_path = "/home/ben/io"
-    else:
-        config_args["volumes"] = {
-            os.getcwd(): {"bind": "/home/ben/working", "mode": "rw"},
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/input",
-                "mode": "rw",
-            },
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/input"
-        docker_output_path = "/home/ben/output"
-
-    # Build the command to run in the container
     if mode not in [
         "encode",
         "x-encode",
@@ -105,52 +55,42 @@ def ben(
         )
         return
 
-    with managed_docker_container(client, config_args) as container:
-        # Pull the docker image and set up the container
-        try:
-            print(f"Pulling Docker image {config_args['image']}")
-            client.images.pull(config_args["image"])
-        except Exception as e:
-            print(
-                f"Error comparing docker container {config_args['image']} against web version. "
-                f"Attempting to run using local image"
-            )
+    if output_file_path is not None:
+        os.makedirs(Path(output_file_path).parent, exist_ok=True)
 
-        ben_cmd = f"ben {docker_input_path}/{input_file_name} -w -m {mode}"
+    with _session(session, docker_image_name, docker_client_args) as session:
+        ben_cmd = f"ben {session.path(input_file_path)} -w -m {mode}"
 
         if verbose:
             ben_cmd += " -v"
 
-        if output_file_name is not None:
-            ben_cmd += f" -o {docker_output_path}/{Path(output_file_name).name}"
-
-        cmd = ["sh", "-c", f"{ben_cmd}"]
-
-        logger.debug(f"Running command: {cmd}")
-        exec_id = client.api.exec_create(
-            container.id, cmd=cmd, tty=False, stdout=True, stderr=True, stdin=False
-        )
-
-        output_generator = client.api.exec_start(
-            exec_id=exec_id, stream=True, detach=False
-        )
-
-        for output in output_generator:
-            print(output.decode("utf-8"), end="")
+        if output_file_path is not None:
+            ben_cmd += f" -o {session.path(output_file_path)}"
 
-    client.close()
+        logger.debug(f"Running command: {ben_cmd}")
+        session.run(ben_cmd)
 
 
 def ben_replay(
     input_file_path: str,
     docker_image_name: str = "mgggdev/replicate:v0.2",
     docker_client_args: Optional[dict] = None,
+    native: bool = False,
+    session: Optional[DockerSession] = None,
+    array: bool = False,
+    dtype=np.uint16,
+    out: Optional[np.ndarray] = None,
+    chunk: Optional[int] = None,
 ):
     """
     This is an iterator that replays any ensemble that is stored in a BEN file so that
     the user may analyze them without having to re-run the ensemble or extract the
     entire ensemble to something human-readable.
 
+    By default, the file is decoded with the BEN CLI tool in a Docker container; pass
+    ``native=True`` to decode it in process with ``read_ben`` instead, which also
+    reads XBEN files and needs no Docker.
+
     Args:
         input_file_path (str): The path to the input file to read from.
         docker_image_name (str, optional): The name of the Docker image to run the program in.
@@ -158,63 +98,58 @@ def ben_replay(
         docker_client_args (dict, optional): Additional arguments to pass to the Docker client.
             Used primarily if there are multiple docker contexts on the same machine.
             Defaults to None.
+        native (bool, optional): Whether to decode the file in process rather than
+            in a Docker container. When True, the Docker arguments are unused.
+            Defaults to False.
+        session (DockerSession, optional): A session whose container decodes the
+            file when not decoding natively. Defaults to a container for this call
+            alone.
+        array (bool, optional): Whether to yield each assignment as a read-only
+            NumPy vector instead of a dictionary, which is much faster for large
+            graphs. Defaults to False.
+        dtype (optional): The type of the vectors, ``np.uint16`` or ``np.uint8``.
+            Defaults to ``np.uint16``.
+        out (np.ndarray, optional): A buffer to reuse for every vector (or chunk), as
+            in ``assignment_arrays``. Defaults to None.
+        chunk (int, optional): Yield matrices of ``chunk`` assignments, one per row,
+            as in ``assignment_arrays``; implies ``array``. Defaults to None.
 
     Yields:
         dict: A dictionary of the form {node_index: assignment_value} that is compatible with
-        the constructor for the ``gerrychain.Partition`` class.
+        the constructor for the ``gerrychain.Partition`` class, or, in array mode,
+        the assignment vector or matrix.
     """
-
-    if docker_client_args is not None:
-        client = docker.DockerClient(**docker_client_args)
+    if native:
+        assignments = read_ben(input_file_path, dtype=dtype if array else np.uint16)
     else:
-        client = docker.from_env()
-
-    # Set up the input and output paths
-    input_parent_path = Path(input_file_path).parent
-    input_file_name = Path(input_file_path).name
-
-    config_args = {
-        "name": "ben_runner",
-        "image": docker_image_name,
-        "detach": True,
-        "auto_remove": True,
-        "tty": True,
-        "stdin_open": True,
-    }
-
-    config_args["volumes"] = {
-        os.getcwd(): {"bind": "/home/ben/working", "mode": "rw"},
-        input_parent_path.resolve(): {
-            "bind": "/home/ben/input",
-            "mode": "rw",
-        },
-    }
-
-    docker_input_path = "/home/ben/input"
-
-    with managed_docker_container(client, config_args) as container:
-        # Pull the docker image and set up the container
-        try:
-            print(f"Pulling Docker image {config_args['image']}")
-            client.images.pull(config_args["image"])
-        except Exception as e:
-            print(
-                f"Error comparing docker container {config_args['image']} against web version. "
-                f"Attempting to run using local image"
-            )
-
-        ben_cmd = f"ben {docker_input_path}/{input_file_name} -w -m decode -p"
-
-        cmd = ["sh", "-c", f"{ben_cmd}"]
-
-        logger.debug(f"Running command: {cmd}")
-        exec_id = client.api.exec_create(
-            container.id, cmd=cmd, tty=False, stdout=True, stderr=True, stdin=False
+        assignments = _docker_replay(
+            input_file_path, docker_image_name, docker_client_args, session
         )
 
-        output_generator = client.api.exec_start(
-            exec_id=exec_id, stream=True, detach=False, demux=True
-        )
+    if array or chunk is not None:
+        yield from assignment_arrays(assignments, dtype, out, chunk)
+        return
+
+    for assignment in assignments:
+        if isinstance(assignment, np.ndarray):
+            assignment = assignment.tolist()
+        yield dict(enumerate(assignment))
+
+
+def _docker_replay(
+    input_file_path: str,
+    docker_image_name: str,
+    docker_client_args: Optional[dict],
+    session: Optional[DockerSession],
+):
+    """
+    Decodes a BEN file with the BEN CLI tool, yielding each assignment as a list.
+    """
+    with _session(session, docker_image_name, docker_client_args) as session:
+        ben_cmd = f"ben {session.path(input_file_path)} -w -m decode -p"
+
+        logger.debug(f"Running command: {ben_cmd}")
+        output_generator = session.stream(ben_cmd)
 
         # Sometimes the output is split between multiple lines
         # So this will take care of that issue by accumulating the
@@ -231,7 +166,7 @@ def ben_replay(
                     if "}" in possible_json:
                         try:
                             json_obj = json.loads(possible_json)
-                            yield {i: v for i, v in enumerate(json_obj["assignment"])}
+                            yield json_obj["assignment"]
                         except json.JSONDecodeError:
                             print(f"Error parsing JSON: {possible_json}")
                             exit(1)
@@ -240,5 +175,3 @@ def ben_replay(
                     else:
                         # If no complete JSON object, wait for more data
                         break
-
-    client.close()
@@ -0,0 +1,567 @@
+"""
+In-process reading and writing of BEN and XBEN ensembles, following the formats of the
+`binary-ensemble <https://crates.io/crates/binary-ensemble>`_ crate.
+
+A BEN file starts with a 17-byte banner naming its variant, `STANDARD BEN FILE`
+or `MKVCHAIN BEN FILE`. Each sample is then one frame: the number of bits
+used for district labels and for run lengths (one byte each), the number of
+bytes of packed runs (a big-endian u32), and the bit-packed (label, length)
+runs of the assignment, most significant bit first. Markov-chain files follow
+each frame with a big-endian u16 counting how many times in a row the sample
+was drawn.
+
+An XBEN file is a single XZ stream, which decompresses to the same banner
+followed by "BEN32" samples: each run as a big-endian u16 label and u16
+length, and four zero bytes ending the sample; Markov-chain files follow
+those with the u16 count.
+"""
+
+import lzma
+import zlib
+from typing import (
+    BinaryIO,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+BANNERS = {b"STANDARD BEN FILE": "standard", b"MKVCHAIN BEN FILE": "mkv_chain"}
+VARIANTS = {variant: banner for banner, variant in BANNERS.items()}
+
+# Runs, district labels and Markov-chain counts are stored as u16s.
+_MAX_U16 = (1 << 16) - 1
+
+_XZ_MAGIC = b"\xfd7zXZ\x00"
+
+# Stream flags of the XZ streams written: CRC64 checks.
+_XZ_FLAGS = b"\x00\x04"
+
+# Bytes of decompressed XBEN read at a time.
+_CHUNK = 1 << 20
+
+
+def _open(f: BinaryIO) -> Tuple[str, bool, BinaryIO]:
+    """
+    Reads the banner of a BEN or XBEN file. An XBEN file is one XZ stream
+    holding both the banner and the samples, so it's decompressed as it's
+    read. Returns the variant, whether the file is XBEN, and a stream at the
+    first sample.
+    """
+    start = f.tell()
+    xz = f.read(len(_XZ_MAGIC)) == _XZ_MAGIC
+    f.seek(start)
+    stream = lzma.open(f) if xz else f
+    banner = stream.read(17)
+    if banner not in BANNERS:
+        raise ValueError("Not a BEN or XBEN file: unknown banner.")
+    return BANNERS[banner], xz, stream
+
+
+def _varint(data: bytes, i: int) -> Tuple[int, int]:
+    """
+    Reads an XZ variable-length integer at `data[i]`, returning it and the
+    position after it.
+    """
+    value = shift = 0
+    while True:
+        byte = data[i]
+        i += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, i
+
+
+def _encode_varint(value: int) -> bytes:
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append(value & 0x7F | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _xz_index(records: Sequence[Tuple[int, int]]) -> bytes:
+    """
+    Encodes the index of an XZ stream from the unpadded and uncompressed size
+    of each block.
+    """
+    index = b"\x00" + _encode_varint(len(records))
+    for unpadded, uncompressed in records:
+        index += _encode_varint(unpadded) + _encode_varint(uncompressed)
+    index += bytes(-len(index) % 4)
+    return index + zlib.crc32(index).to_bytes(4, "little")
+
+
+def _xz_footer(index: bytes) -> bytes:
+    backward = (len(index) // 4 - 1).to_bytes(4, "little") + _XZ_FLAGS
+    return zlib.crc32(backward).to_bytes(4, "little") + backward + b"YZ"
+
+
+def _dtype(dtype) -> np.dtype:
+    dtype = np.dtype(dtype)
+    if dtype not in (np.uint8, np.uint16):
+        raise ValueError(f"Assignments must be uint8 or uint16, not {dtype}.")
+    return dtype
+
+
+def _labels(values: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """
+    Casts district labels to `dtype`, checking that they fit.
+    """
+    if values.dtype != dtype and values.size:
+        if values.min() < 0 or values.max() > np.iinfo(dtype).max:
+            raise ValueError(
+                f"District labels must be from 0 to {np.iinfo(dtype).max} to be "
+                f"read as {dtype}."
+            )
+    return values.astype(dtype, copy=False)
+
+
+def _decode_runs(
+    packed: bytes, value_bits: int, length_bits: int, dtype=np.uint16
+) -> np.ndarray:
+    """
+    Expands the bit-packed (label, length) runs of one BEN frame into an
+    assignment vector.
+    """
+    width = value_bits + length_bits
+    bits = np.unpackbits(np.frombuffer(packed, dtype=np.uint8))
+    runs = bits[: bits.size // width * width].reshape(-1, width)
+    weights = np.left_shift(1, np.arange(width - 1, -1, -1, dtype=np.int64))
+    values = runs[:, :value_bits] @ weights[length_bits:]
+    lengths = runs[:, value_bits:] @ weights[value_bits:]
+    # Padding at the end of the frame decodes as runs of length 0.
+    return np.repeat(_labels(values, dtype), lengths)
+
+
+def _ben_samples(
+    stream: BinaryIO, mkv: bool, dtype: np.dtype
+) -> Iterator[Tuple[np.ndarray, int]]:
+    while True:
+        head = stream.read(6)
+        if not head:
+            return
+        if len(head) < 6:
+            raise ValueError("BEN file ends partway through a sample.")
+        value_bits, length_bits = head[0], head[1]
+        size = int.from_bytes(head[2:], "big")
+        packed = stream.read(size)
+        count = stream.read(2) if mkv else b"\x00\x01"
+        if len(packed) < size or len(count) < 2:
+            raise ValueError("BEN file ends partway through a sample.")
+        count = int.from_bytes(count, "big")
+        yield _decode_runs(packed, value_bits, length_bits, dtype), count
+
+
+def _xben_runs(stream: BinaryIO, mkv: bool) -> Iterator[Tuple[int, np.ndarray, int]]:
+    """
+    Finds the samples of an XBEN stream without expanding them, yielding the
+    offset of each in the decompressed stream, its (label, length) runs, and
+    its count.
+    """
+    # Samples are found by their terminators: a run of length 0 is the end of
+    # a sample, and as runs are 4 bytes long, the terminator of the sample
+    # starting at word `p` is the first pair of zero words at an even number
+    # of words after `p`. Markov-chain counts shift the next sample by one
+    # word, so terminators are looked up among those at either parity.
+    buffer = b""
+    base = 0
+    words = np.empty(0, dtype=">u2")
+    ends = (np.empty(0, dtype=np.int64),) * 2
+    p = 0
+    tail = 3 if mkv else 2
+
+    while True:
+        candidates = ends[p % 2]
+        i = np.searchsorted(candidates, p)
+        if i < len(candidates) and candidates[i] + tail <= len(words):
+            end = int(candidates[i])
+            count = int(words[end + 2]) if mkv else 1
+            yield base + 2 * p, words[p:end].reshape(-1, 2), count
+            p = end + tail
+            continue
+
+        # Read more: keep the unread part of the buffer, and read at least as
+        # much again, so a sample larger than a chunk isn't rescanned often.
+        chunk = stream.read(max(_CHUNK, len(buffer)))
+        buffer = buffer[2 * p :] + chunk
+        base += 2 * p
+        if not chunk:
+            if buffer:
+                raise ValueError("XBEN file ends partway through a sample.")
+            return
+        p = 0
+        words = np.frombuffer(buffer, dtype=">u2", count=len(buffer) // 2)
+        zero = words == 0
+        found = np.flatnonzero(zero[:-1] & zero[1:])
+        ends = (found[found % 2 == 0], found[found % 2 == 1])
+
+
+def _xben_samples(
+    stream: BinaryIO, mkv: bool, dtype: np.dtype
+) -> Iterator[Tuple[np.ndarray, int]]:
+    for _, runs, count in _xben_runs(stream, mkv):
+        yield np.repeat(_labels(runs[:, 0], dtype), runs[:, 1]), count
+
+
+def _decode_frame(data: bytes, dtype: np.dtype) -> np.ndarray:
+    """
+    Decodes one BEN frame, starting at its header.
+    """
+    size = int.from_bytes(data[2:6], "big")
+    return _decode_runs(data[6 : 6 + size], data[0], data[1], dtype)
+
+
+def _decode_ben32(data: bytes, mkv: bool, dtype: np.dtype) -> np.ndarray:
+    """
+    Decodes one BEN32 sample of an XBEN stream, with its terminator (and
+    count).
+    """
+    runs = np.frombuffer(data, dtype=">u2")[: -(3 if mkv else 2)].reshape(-1, 2)
+    return np.repeat(_labels(runs[:, 0], dtype), runs[:, 1])
+
+
+def read_ben(
+    path: str,
+    repeat: bool = True,
+    dtype=np.uint16,
+    out: Optional[np.ndarray] = None,
+    chunk: Optional[int] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Decodes the samples of a BEN or XBEN file in process, one at a time,
+    without Docker or an intermediate JSON file. Only one sample is held in
+    memory at a time (and, for XBEN, about a megabyte of decompressed data).
+
+    Args:
+        path (str): The BEN or XBEN file. Its kind and variant are read from
+            the file.
+        repeat (bool, optional): Whether to yield a sample of a Markov-chain
+            file once for each time it was drawn, as `ben -m decode` does.
+            Otherwise, each is yielded once. Defaults to True.
+        dtype (optional): `np.uint16`, or `np.uint8` for plans with at most
+            255 districts, which halves the memory each takes. Defaults to
+            `np.uint16`.
+        out (np.ndarray, optional): A buffer to write samples into, as in
+            `assignment_arrays`.
+        chunk (int, optional): Yield samples `chunk` at a time, as in
+            `assignment_arrays`.
+
+    Yields:
+        The assignment vector of each sample, as a read-only array in the
+        order of the nodes of the encoded JSON lines (or matrices of `chunk`
+        of them). A repeated sample is the same array each time.
+    """
+    dtype = _dtype(dtype)
+    samples = _read_ben(path, repeat, dtype)
+    if out is None and chunk is None:
+        return samples
+    return assignment_arrays(samples, dtype, out, chunk)
+
+
+def _read_ben(path: str, repeat: bool, dtype: np.dtype) -> Iterator[np.ndarray]:
+    with open(path, "rb") as f:
+        variant, xz, stream = _open(f)
+        mkv = variant == "mkv_chain"
+        decode = _xben_samples if xz else _ben_samples
+        for assignment, count in decode(stream, mkv, dtype):
+            assignment.flags.writeable = False
+            for _ in range(count if repeat else 1):
+                yield assignment
+
+
+def assignment_arrays(
+    assignments: Iterable[Union[np.ndarray, Sequence[int]]],
+    dtype=np.uint16,
+    out: Optional[np.ndarray] = None,
+    chunk: Optional[int] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Turns assignment vectors, such as the lists of BEN's JSON lines, into
+    compact read-only NumPy arrays for vectorized scoring, rather than
+    dictionaries holding a Python integer for every node.
+
+    Args:
+        assignments (Iterable[Union[np.ndarray, Sequence[int]]]): The district
+            of each node of each plan, in node order.
+        dtype (optional): `np.uint16`, or `np.uint8` for plans with at most
+            255 districts. Defaults to `np.uint16`.
+        out (np.ndarray, optional): A writable buffer of `dtype` to reuse for
+            every plan, of shape `(nodes,)`, or `(chunk, nodes)` when chunking.
+            Each array yielded is a view of it, overwritten by the next, so
+            copy any you keep. Defaults to a new array for each plan or chunk.
+        chunk (int, optional): Yield `(chunk, nodes)` matrices of `chunk`
+            consecutive plans, one per row; the last may have fewer rows.
+            Defaults to yielding plans one at a time.
+
+    Raises:
+        ValueError: If a district label doesn't fit in `dtype`, the plans
+            have different numbers of nodes, or `out` doesn't fit them.
+
+    Yields:
+        Read-only assignment vectors, or matrices of `chunk` of them.
+    """
+    dtype = _dtype(dtype)
+    if chunk is not None and chunk < 1:
+        raise ValueError("Chunks must hold at least one plan.")
+    buffer, rows = out, 0
+
+    for assignment in assignments:
+        assignment = _labels(np.asarray(assignment), dtype)
+        if buffer is None and chunk is None:
+            yield _read_only(assignment)
+            continue
+
+        if buffer is None:
+            buffer = np.empty((chunk, assignment.size), dtype=dtype)
+        shape = (assignment.size,) if chunk is None else (chunk, assignment.size)
+        if buffer.shape != shape or buffer.dtype != dtype:
+            raise ValueError(
+                f"Can't write a plan of {assignment.size} nodes into a {buffer.dtype} "
+                f"buffer of shape {buffer.shape}; expected {dtype} and {shape}."
+            )
+        if chunk is None:
+            buffer[:] = assignment
+            yield _read_only(buffer)
+            continue
+
+        buffer[rows] = assignment
+        rows += 1
+        if rows == chunk:
+            yield _read_only(buffer)
+            buffer, rows = out, 0
+
+    if rows:
+        yield _read_only(buffer[:rows])
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def _encode_runs(assignment: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run-length encodes an assignment vector, splitting runs too long for a
+    u16 length.
+    """
+    if assignment.size == 0:
+        raise ValueError("Can't encode an empty assignment.")
+    starts = np.flatnonzero(np.diff(assignment)) + 1
+    starts = np.concatenate([[0], starts])
+    lengths = np.diff(np.append(starts, assignment.size))
+    pieces = -(-lengths // _MAX_U16)
+    if (pieces > 1).any():
+        # Split each long run into full runs and a remainder.
+        starts = np.repeat(starts, pieces) + _MAX_U16 * (
+            np.arange(pieces.sum()) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        )
+        lengths = np.diff(np.append(starts, assignment.size))
+    return assignment[starts].astype(np.int64), lengths.astype(np.int64)
+
+
+def _encode_frame(assignment: np.ndarray) -> bytes:
+    """
+    Encodes an assignment vector as one BEN frame.
+    """
+    values, lengths = _encode_runs(assignment)
+    value_bits = max(int(values.max()).bit_length(), 1)
+    length_bits = int(lengths.max()).bit_length()
+    width = value_bits + length_bits
+    runs = (values << length_bits) | lengths
+    shifts = np.arange(width - 1, -1, -1, dtype=np.int64)
+    packed = np.packbits(((runs[:, None] >> shifts) & 1).astype(np.uint8)).tobytes()
+    return bytes([value_bits, length_bits]) + len(packed).to_bytes(4, "big") + packed
+
+
+def _encode_ben32(assignment: np.ndarray) -> bytes:
+    """
+    Encodes an assignment vector as one BEN32 sample of an XBEN stream.
+    """
+    values, lengths = _encode_runs(assignment)
+    runs = np.empty((len(values) + 1, 2), dtype=">u2")
+    runs[:-1, 0], runs[:-1, 1] = values, lengths
+    runs[-1] = 0
+    return runs.tobytes()
+
+
+class BenWriter:
+    """
+    Writes an ensemble to a BEN or XBEN file in process, one plan at a time,
+    as the plans are drawn, without Docker or an intermediate JSON-lines file.
+    Files written are read by `read_ben` and by the BEN tool: BEN files are
+    the tool's byte for byte, and XBEN files decompress to the tool's bytes.
+
+    Example:
+
+        with BenWriter("chain.xben", variant="mkv_chain") as writer:
+            for part in chain:
+                writer.write(part.assignment)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        variant: str = "standard",
+        xz: Optional[bool] = None,
+        preset: int = 6,
+        nodes: Optional[Sequence] = None,
+        block_samples: Optional[int] = None,
+    ):
+        """
+        Args:
+            path (str): Where to write the file.
+            variant (str, optional): `"standard"`, which stores every plan, or
+                `"mkv_chain"`, which stores a run of identical consecutive plans
+                (as Markov chains that reject proposals draw) once, with a
+                count. Defaults to `"standard"`.
+            xz (bool, optional): Whether to write XBEN, compressing the plans
+                with XZ. Defaults to whether `path` ends in `.xben`.
+            preset (int, optional): XZ compression preset, from 0 to 9, for
+                XBEN. Defaults to 6.
+            nodes (Sequence, optional): Order of the nodes in the encoded
+                assignments, for plans passed as mappings. Defaults to the
+                order of each mapping's keys.
+            block_samples (int, optional): For XBEN, start a new XZ block
+                after every `block_samples` stored samples, so `BenIndex` can
+                seek to a sample without decompressing the file from the start.
+                The file is still one XZ stream. Defaults to a single block.
+        """
+        if block_samples is not None and block_samples < 1:
+            raise ValueError("XZ blocks must hold at least one sample.")
+        if variant not in VARIANTS:
+            raise ValueError(
+                f'Unknown BEN variant "{variant}"; use "standard" or "mkv_chain".'
+            )
+        self.path = path
+        self.variant = variant
+        self.xz = path.endswith(".xben") if xz is None else xz
+        self.nodes = list(nodes) if nodes is not None else None
+        self.preset = preset
+        self.block_samples = block_samples
+        self.samples = 0
+        self._file = open(path, "wb")
+        self._compressor = None
+        self._block = 0
+        self._records = []
+        self._skip = 0
+        # XBEN compresses the banner with the samples.
+        self._write(VARIANTS[variant])
+        self._last = None
+        self._count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def _assignment(self, plan) -> np.ndarray:
+        if isinstance(plan, Mapping):
+            order = self.nodes if self.nodes is not None else plan.keys()
+            plan = [plan[node] for node in order]
+        assignment = np.asarray(plan)
+        if assignment.ndim != 1 or not np.issubdtype(assignment.dtype, np.integer):
+            raise ValueError("BEN plans must be vectors of integer district labels.")
+        if assignment.size and (assignment.min() < 0 or assignment.max() > _MAX_U16):
+            raise ValueError(f"BEN district labels must be from 0 to {_MAX_U16}.")
+        return assignment
+
+    def write(self, plan: Union[np.ndarray, Sequence[int], Mapping]):
+        """
+        Adds a plan to the ensemble.
+
+        Args:
+            plan (Union[np.ndarray, Sequence[int], Mapping]): The district of
+                each node, as a vector in node order or a mapping from nodes
+                (such as a `Partition`'s `assignment`). Districts must be
+                integers from 0 to 65,535.
+        """
+        if self._file is None:
+            raise ValueError("Can't write to a closed BenWriter.")
+        assignment = self._assignment(plan)
+        self.samples += 1
+        if self.variant == "standard":
+            self._emit(assignment, None)
+            return
+
+        if (
+            self._last is not None
+            and self._count < _MAX_U16
+            and np.array_equal(assignment, self._last)
+        ):
+            self._count += 1
+            return
+        if self._last is not None:
+            self._emit(self._last, self._count)
+        self._last, self._count = assignment.copy(), 1
+
+    def _emit(self, assignment: np.ndarray, count: Optional[int]):
+        if self.xz:
+            data = _encode_ben32(assignment)
+        else:
+            data = _encode_frame(assignment)
+        if count is not None:
+            data += count.to_bytes(2, "big")
+        self._write(data)
+        if self.xz:
+            self._block += 1
+            if self._block == self.block_samples:
+                self._end_block()
+
+    def _write(self, data: bytes):
+        if not self.xz:
+            self._file.write(data)
+            return
+        if self._compressor is None:
+            self._compressor = lzma.LZMACompressor(
+                format=lzma.FORMAT_XZ, check=lzma.CHECK_CRC64, preset=self.preset
+            )
+        self._write_xz(self._compressor.compress(data))
+
+    def _write_xz(self, data: bytes):
+        # Each block is compressed as an XZ stream of its own, whose header
+        # is dropped from all but the first.
+        skip = min(self._skip, len(data))
+        self._skip -= skip
+        self._file.write(data[skip:])
+
+    def _end_block(self):
+        # The block's stream ends with its index and footer, which are
+        # replaced by an index of every block when the file is closed.
+        data = self._compressor.flush()
+        index_size = (int.from_bytes(data[-8:-4], "little") + 1) * 4
+        index = data[-12 - index_size : -12]
+        _, i = _varint(index, 1)
+        unpadded, i = _varint(index, i)
+        uncompressed, _ = _varint(index, i)
+        self._records.append((unpadded, uncompressed))
+        self._write_xz(data[: -12 - index_size])
+        self._compressor, self._block, self._skip = None, 0, 12
+
+    def close(self):
+        """
+        Writes any plan held back to be counted and closes the file.
+        """
+        if self._file is None:
+            return
+        try:
+            if self._last is not None:
+                self._emit(self._last, self._count)
+                self._last = None
+            if self._compressor is not None:
+                self._end_block()
+            if self.xz:
+                index = _xz_index(self._records)
+                self._file.write(index + _xz_footer(index))
+        finally:
+            self._file.close()
+            self._file = None
@@ -1,6 +1,17 @@
+import os
+import posixpath
+import shlex
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
 import docker
 
+# Where host directories are mounted in the container.
+CONTAINER_HOME = "/home/ben"
+
 
 @contextmanager
 def managed_docker_container(docker_client, config_args):
@@ -26,3 +37,331 @@ def managed_docker_container(docker_client, config_args):
                 container.remove(force=True)
             except docker.errors.APIError as e:
                 print(f"Error removing container: {e}")
+
+
+class DockerSession:
+    """
+    A warm Docker container of the BEN tools image, reused by many calls to
+    `ben`, `ben_replay`, the `reben` relabeling functions, `msms_parse` and
+    `smc_parse`. The image is checked once, when the session opens, and the
+    container is started on the first command and kept until the session
+    closes, so a batch of small files doesn't pay for a container (and a
+    registry round trip) per file.
+
+    Directories holding the files passed to the tools are mounted as they're
+    needed; mounting a new one restarts the container once no command is
+    running in it, so pass the directories up front in `mounts` to avoid
+    restarts. A command whose output is being read from `stream` counts as
+    running until it's read to the end, so while one is, the container won't
+    be restarted for a new directory (the call needing it raises), and the
+    thread reading it can't run other commands in the session.
+
+    Example:
+
+        with DockerSession(concurrency=4) as session:
+            futures = [
+                session.submit(ben, "encode", path, verbose=False)
+                for path in paths
+            ]
+            for future in futures:
+                future.result()
+    """
+
+    def __init__(
+        self,
+        docker_image_name: str = "mgggdev/replicate:v0.2",
+        docker_client_args: Optional[dict] = None,
+        pull: str = "missing",
+        mounts: Iterable[str] = (),
+        concurrency: int = 1,
+    ):
+        """
+        Args:
+            docker_image_name (str, optional): The name of the Docker image to run
+                the tools in. Defaults to "mgggdev/replicate:v0.2".
+            docker_client_args (dict, optional): Additional arguments to pass to the
+                Docker client. Defaults to None.
+            pull (str, optional): When to pull the image: `"always"`; `"missing"`,
+                unless a copy pulled from the registry (one with a digest) is
+                present locally; or `"never"`. Defaults to `"missing"`.
+            mounts (Iterable[str], optional): Directories to mount from the
+                start. The working directory is always mounted.
+            concurrency (int, optional): Most commands run in the container at
+                once, and number of threads used by `submit`. Defaults to 1.
+        """
+        if pull not in ("always", "missing", "never"):
+            raise ValueError(
+                f'Unknown pull policy "{pull}"; use "always", "missing" or "never".'
+            )
+        if concurrency < 1:
+            raise ValueError("A Docker session must run at least one command at once.")
+        self.image = docker_image_name
+        self.client_args = docker_client_args
+        self.pull = pull
+        self.concurrency = concurrency
+        self.client = None
+        self.container = None
+        self._mounts = {Path(os.getcwd()).resolve(): f"{CONTAINER_HOME}/working"}
+        self._running_mounts = None
+        self._lock = threading.Condition()
+        self._active = 0
+        self._streams = 0
+        self._local = threading.local()
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = None
+        for directory in mounts:
+            self.mount(directory)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def open(self):
+        """
+        Connects to Docker and makes sure the image is present, pulling it
+        according to the session's pull policy.
+        """
+        if self.client is not None:
+            return
+        if self.client_args is not None:
+            self.client = docker.DockerClient(**self.client_args)
+        else:
+            self.client = docker.from_env()
+        self._ensure_image()
+
+    def _ensure_image(self):
+        try:
+            local = self.client.images.get(self.image)
+        except docker.errors.ImageNotFound:
+            local = None
+
+        if local is not None and (
+            self.pull == "never"
+            or (self.pull == "missing" and local.attrs.get("RepoDigests"))
+        ):
+            return
+        if local is None and self.pull == "never":
+            raise ValueError(f"Docker image {self.image} isn't present locally.")
+
+        try:
+            print(f"Pulling Docker image {self.image}")
+            self.client.images.pull(self.image)
+        except Exception:
+            if local is None:
+                raise
+            print(
+                f"Error comparing docker container {self.image} against web version. "
+                f"Attempting to run using local image"
+            )
+
+    def mount(self, directory: str) -> str:
+        """
+        Mounts a host directory in the container, unless it's already within
+        one mounted.
+
+        Args:
+            directory (str): The directory.
+
+        Returns:
+            The directory's path in the container.
+        """
+        directory = Path(directory).resolve()
+        with self._lock:
+            for host, target in sorted(
+                self._mounts.items(), key=lambda item: -len(item[0].parts)
+            ):
+                if directory == host or host in directory.parents:
+                    relative = directory.relative_to(host).as_posix()
+                    return posixpath.normpath(posixpath.join(target, relative))
+            target = f"{CONTAINER_HOME}/mnt{len(self._mounts)}"
+            self._mounts[directory] = target
+            return target
+
+    def path(self, host_path: str) -> str:
+        """
+        Returns where a host file is in the container, mounting its directory
+        if need be. The path is quoted for the shell.
+
+        Args:
+            host_path (str): The file.
+        """
+        host_path = Path(host_path).resolve()
+        directory = self.mount(host_path.parent)
+        return shlex.quote(posixpath.join(directory, host_path.name))
+
+    def _start_container(self):
+        # Called holding the lock. A container without the mounts needed is
+        # replaced once no command is running in it.
+        if self.container is not None and self._running_mounts == self._mounts:
+            return
+        if self._streams:
+            # A stream's reader may be the caller, or be waiting on it.
+            raise RuntimeError(
+                "The container can't be restarted to mount a new directory while "
+                "the output of a command is being read; pass the directory in "
+                "`mounts` when opening the session."
+            )
+        while self._active:
+            self._lock.wait()
+        if self.container is not None and self._running_mounts == self._mounts:
+            return
+
+        self.open()
+        self._remove_container()
+        mounts = dict(self._mounts)
+        self.container = self.client.containers.run(
+            image=self.image,
+            detach=True,
+            auto_remove=True,
+            tty=True,
+            stdin_open=True,
+            volumes={
+                str(host): {"bind": target, "mode": "rw"}
+                for host, target in mounts.items()
+            },
+        )
+        self._running_mounts = mounts
+        print(f"Running container {self.container.name}")
+
+    def _remove_container(self):
+        if self.container is None:
+            return
+        try:
+            self.container.remove(force=True)
+        except docker.errors.APIError as e:
+            print(f"Error removing container: {e}")
+        self.container = None
+        self._running_mounts = None
+
+    @contextmanager
+    def _exec(self, command: str, streaming: bool = False):
+        # A command keeps its slot until its output has been read, so another
+        # from the thread reading it could wait on it forever.
+        if getattr(self._local, "running", False):
+            raise RuntimeError(
+                "A command can't be run in a Docker session while the same thread "
+                "is reading the output of another; finish reading it first."
+            )
+        with self._slots:
+            with self._lock:
+                self._start_container()
+                self._active += 1
+                self._streams += streaming
+            self._local.running = True
+            try:
+                exec_id = self.client.api.exec_create(
+                    self.container.id,
+                    cmd=["sh", "-c", command],
+                    tty=False,
+                    stdout=True,
+                    stderr=True,
+                    stdin=False,
+                )
+                output = self.client.api.exec_start(
+                    exec_id=exec_id, stream=True, detach=False, demux=True
+                )
+                yield exec_id, output
+            finally:
+                self._local.running = False
+                with self._lock:
+                    self._active -= 1
+                    self._streams -= streaming
+                    self._lock.notify_all()
+
+    def run(self, command: str) -> int:
+        """
+        Runs a shell command in the container, printing its output.
+
+        Args:
+            command (str): The command, with paths made by `path`.
+
+        Returns:
+            The command's exit code.
+
+        Raises:
+            RuntimeError: If the thread is reading another command's output,
+                or if the command needs a directory mounted while another
+                command's output is being read (see `stream`).
+        """
+        with self._exec(command) as (exec_id, output):
+            for stdout, stderr in output:
+                for chunk in (stdout, stderr):
+                    if chunk:
+                        print(chunk.decode("utf-8"), end="")
+        return self.client.api.exec_inspect(exec_id)["ExitCode"]
+
+    def stream(self, command: str) -> Iterator[Tuple[Optional[bytes], Optional[bytes]]]:
+        """
+        Runs a shell command in the container, yielding its output as it's
+        written. The command holds one of the session's `concurrency` slots
+        until its output is read to the end (or the generator is closed);
+        meanwhile, the reading thread can't run other commands in the session,
+        and the container isn't restarted to mount new directories.
+
+        Args:
+            command (str): The command, with paths made by `path`.
+
+        Yields:
+            Pairs of bytes written to stdout and to stderr; either may be None.
+
+        Raises:
+            RuntimeError: If the thread is already reading another command's
+                output, or if the command needs a directory mounted while
+                another command's output is being read.
+        """
+        with self._exec(command, streaming=True) as (_, output):
+            yield from output
+
+    def submit(self, function: Callable, *args, **kwargs) -> Future:
+        """
+        Calls `function` with this session on one of `concurrency` threads.
+
+        Args:
+            function (Callable): A function taking a `session` argument, such
+                as `ben` or `msms_parse`.
+            *args: Positional arguments for `function`.
+            **kwargs: Keyword arguments for `function`.
+
+        Returns:
+            A `Future` for the call's result.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="docker-session"
+                )
+        return self._executor.submit(function, *args, session=self, **kwargs)
+
+    def close(self):
+        """
+        Waits for submitted calls, then removes the container and closes the
+        connection to Docker.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            self._remove_container()
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+
+@contextmanager
+def _session(
+    session: Optional[DockerSession],
+    docker_image_name: str,
+    docker_client_args: Optional[dict],
+) -> Iterator[DockerSession]:
+    """
+    Yields `session`, or a session for this call alone, which always tries to
+    pull the image, when none is passed.
+    """
+    if session is not None:
+        yield session
+        return
+    with DockerSession(docker_image_name, docker_client_args, pull="always") as session:
+        yield session
@@ -0,0 +1,485 @@
+"""
+Random access to the samples of BEN and XBEN files.
+
+A sample index records, in one pass over an ensemble file, where each stored
+sample starts: its byte offset in a BEN file, or in the decompressed stream
+of an XBEN file (which holds the banner too), along with the number of the
+first sample it stands for (a Markov-chain file stores a run of repeated
+samples once). For XBEN files it also records where each XZ block starts, in
+the file and in the decompressed stream, so reading a sample only
+decompresses the block holding it.
+
+The index is saved next to the ensemble file, as `<file>.idx`, and reused
+until the file changes.
+"""
+
+import lzma
+import os
+from typing import BinaryIO, Iterator, List, Optional
+
+import numpy as np
+
+from .codec import (
+    _CHUNK,
+    VARIANTS,
+    _decode_ben32,
+    _decode_frame,
+    _dtype,
+    _open,
+    _varint,
+    _xben_runs,
+    assignment_arrays,
+)
+
+# Index files are named after the ensemble file, with this suffix.
+INDEX_SUFFIX = ".idx"
+
+# Layout version of index files; indexes of other versions are rebuilt.
+_VERSION = 1
+
+_LZMA2 = 0x21
+
+
+def _block_filters(header: bytes) -> Optional[List[dict]]:
+    """
+    Reads the filter chain of an XZ block header, if the block can be decoded
+    on its own: that is, if it's compressed with LZMA2 alone, as the BEN tool
+    and `BenWriter` write.
+    """
+    flags = header[1]
+    i = 2
+    if flags & 0x40:
+        _, i = _varint(header, i)
+    if flags & 0x80:
+        _, i = _varint(header, i)
+    if flags & 0x03:
+        return None
+    filter_id, i = _varint(header, i)
+    size, i = _varint(header, i)
+    if filter_id != _LZMA2 or size != 1 or header[i] > 40:
+        return None
+    bits = header[i]
+    dict_size = 0xFFFFFFFF if bits == 40 else (2 | (bits & 1)) << (bits // 2 + 11)
+    return [{"id": lzma.FILTER_LZMA2, "dict_size": dict_size}]
+
+
+def _block_header(f: BinaryIO, offset: int) -> bytes:
+    f.seek(offset)
+    header = f.read(1)
+    return header + f.read((header[0] + 1) * 4 - 1)
+
+
+def _xz_blocks(f: BinaryIO, end: int) -> Optional[np.ndarray]:
+    """
+    Finds the blocks of the XZ streams in `f[:end]`, an XBEN file, from the
+    index at the end of each stream.
+
+    Returns:
+        The offset of each block in the file and in the decompressed data, as
+        the rows of an array, or None if some block can't be decoded on its
+        own.
+    """
+    streams = []
+    while end > 0:
+        f.seek(end - 4)
+        if f.read(4) == bytes(4):
+            # Padding between concatenated streams.
+            end -= 4
+            continue
+        f.seek(end - 12)
+        footer = f.read(12)
+        if footer[-2:] != b"YZ":
+            raise ValueError("XBEN file's XZ stream has no footer.")
+        index_size = (int.from_bytes(footer[4:8], "little") + 1) * 4
+        index_start = end - 12 - index_size
+        f.seek(index_start)
+        index = f.read(index_size)
+
+        records, i = _varint(index, 1)
+        sizes = []
+        for _ in range(records):
+            unpadded, i = _varint(index, i)
+            uncompressed, i = _varint(index, i)
+            sizes.append((unpadded, uncompressed))
+        end = index_start - sum(-(-unpadded // 4) * 4 for unpadded, _ in sizes) - 12
+        streams.append((end, sizes))
+
+    blocks, position = [], 0
+    for stream_start, sizes in reversed(streams):
+        offset = stream_start + 12
+        for unpadded, uncompressed in sizes:
+            if _block_filters(_block_header(f, offset)) is None:
+                return None
+            blocks.append((offset, position))
+            offset += -(-unpadded // 4) * 4
+            position += uncompressed
+    return np.array(blocks, dtype=np.uint64).reshape(-1, 2)
+
+
+class _XzReader:
+    """
+    Reads ranges of the decompressed XZ data of an XBEN file, starting at the
+    block holding each range, and carrying on from the last read when reading
+    forward within a block. Without blocks, decompresses from the start of the
+    file.
+    """
+
+    def __init__(self, f: BinaryIO, blocks: Optional[np.ndarray]):
+        self.f = f
+        self.blocks = blocks
+        self._block = 0
+        self._source = None
+        self._pending = b""
+        self._position = 0
+
+    def _block_of(self, offset: int) -> int:
+        if self.blocks is None:
+            return 0
+        return int(np.searchsorted(self.blocks[:, 1], offset, side="right")) - 1
+
+    def _restart(self, block: int):
+        self._block = block
+        self._position = 0 if self.blocks is None else int(self.blocks[block, 1])
+        self._pending = b""
+        self._source = self._chunks(block)
+
+    def _chunks(self, block: int) -> Iterator[bytes]:
+        if self.blocks is None:
+            self.f.seek(0)
+            stream = lzma.open(self.f)
+            while True:
+                chunk = stream.read(_CHUNK)
+                if not chunk:
+                    return
+                yield chunk
+
+        for b in range(block, len(self.blocks)):
+            self._block = b
+            offset = int(self.blocks[b, 0])
+            header = _block_header(self.f, offset)
+            decompressor = lzma.LZMADecompressor(
+                lzma.FORMAT_RAW, filters=_block_filters(header)
+            )
+            while not decompressor.eof:
+                data = self.f.read(_CHUNK)
+                if not data:
+                    return
+                chunk = decompressor.decompress(data)
+                if chunk:
+                    yield chunk
+
+    def read(self, offset: int, size: int) -> bytes:
+        block = self._block_of(offset)
+        if self._source is None or offset < self._position or block > self._block:
+            self._restart(block)
+
+        parts = []
+        while size:
+            skip = offset - self._position
+            if skip >= len(self._pending):
+                self._position += len(self._pending)
+                self._pending = next(self._source, b"")
+                if not self._pending:
+                    raise ValueError("XBEN file ends partway through a sample.")
+                continue
+            part = self._pending[skip : skip + size]
+            parts.append(part)
+            offset += len(part)
+            size -= len(part)
+        return b"".join(parts)
+
+
+class BenIndex:
+    """
+    Where the samples of a BEN or XBEN file are, for reading any sample, or
+    every k-th sample of a range, without decoding the samples in between.
+    Samples are numbered from 0 in the order `read_ben` yields them.
+
+    Example:
+
+        index = index_ben("chain.xben")
+        plan = index[734_211]
+        for assignment in index.read(start=10_000, every=100):
+            ...
+    """
+
+    def __init__(
+        self,
+        path: str,
+        variant: str,
+        xz: bool,
+        offsets: np.ndarray,
+        starts: np.ndarray,
+        blocks: Optional[np.ndarray],
+        size: int,
+        mtime: int,
+    ):
+        """
+        Args:
+            path (str): The ensemble file.
+            variant (str): `"standard"` or `"mkv_chain"`.
+            xz (bool): Whether the file is XBEN.
+            offsets (np.ndarray): Where each stored sample starts, and where the
+                last ends: in the file, or in the decompressed XZ data.
+            starts (np.ndarray): The number of the first sample each stored
+                sample stands for, and the number of samples.
+            blocks (np.ndarray, optional): The offset of each XZ block in the
+                file and in the decompressed data, or None if the blocks can't
+                be decoded on their own.
+            size (int): Size of the file when it was indexed.
+            mtime (int): Modification time of the file, in nanoseconds, when it
+                was indexed.
+        """
+        self.path = path
+        self.variant = variant
+        self.xz = xz
+        self.offsets = offsets
+        self.starts = starts
+        self.blocks = blocks
+        self.size = size
+        self.mtime = mtime
+
+    @classmethod
+    def build(cls, path: str) -> "BenIndex":
+        """
+        Indexes an ensemble file in one pass. BEN frames are skipped over
+        without being read; XBEN data is decompressed, but samples are only
+        found, not decoded.
+
+        Args:
+            path (str): The BEN or XBEN file.
+
+        Returns:
+            The index, which isn't saved.
+        """
+        stat = os.stat(path)
+        offsets, counts = [], []
+        with open(path, "rb") as f:
+            variant, xz, stream = _open(f)
+            mkv = variant == "mkv_chain"
+            # Offsets count the banner, which is also compressed in XBEN.
+            end = len(VARIANTS[variant])
+            blocks = None
+            if xz:
+                banner, tail = end, 3 if mkv else 2
+                for offset, runs, count in _xben_runs(stream, mkv):
+                    offsets.append(banner + offset)
+                    counts.append(count)
+                    end = banner + offset + 2 * (runs.size + tail)
+                blocks = _xz_blocks(f, stat.st_size)
+            else:
+                while True:
+                    head = f.read(6)
+                    if not head:
+                        break
+                    offset = end
+                    end += 6 + int.from_bytes(head[2:], "big")
+                    count = 1
+                    if mkv:
+                        f.seek(end)
+                        count = int.from_bytes(f.read(2), "big")
+                        end += 2
+                    if len(head) < 6 or end > stat.st_size:
+                        raise ValueError("BEN file ends partway through a sample.")
+                    offsets.append(offset)
+                    counts.append(count)
+                    f.seek(end)
+            offsets.append(end)
+
+        return cls(
+            path,
+            variant,
+            xz,
+            np.array(offsets, dtype=np.uint64),
+            np.concatenate([[0], np.cumsum(counts)]).astype(np.uint64),
+            blocks,
+            stat.st_size,
+            stat.st_mtime_ns,
+        )
+
+    @classmethod
+    def load(cls, path: str, index_path: Optional[str] = None) -> "BenIndex":
+        """
+        Reads the saved index of an ensemble file.
+
+        Args:
+            path (str): The ensemble file.
+            index_path (str, optional): Where the index is. Defaults to `path`
+                with `INDEX_SUFFIX` added.
+
+        Raises:
+            ValueError: If the file has changed since it was indexed, or the
+                index was written by another version of `gerrytools`.
+        """
+        index_path = index_path or path + INDEX_SUFFIX
+        stat = os.stat(path)
+        with np.load(index_path) as data:
+            if int(data["version"]) != _VERSION:
+                raise ValueError(f"{index_path} is an index of another version.")
+            if int(data["size"]) != stat.st_size or int(data["mtime"]) != (
+                stat.st_mtime_ns
+            ):
+                raise ValueError(f"{path} has changed since it was indexed.")
+            return cls(
+                path,
+                str(data["variant"]),
+                bool(data["xz"]),
+                data["offsets"],
+                data["starts"],
+                data["blocks"] if bool(data["seekable"]) else None,
+                int(data["size"]),
+                int(data["mtime"]),
+            )
+
+    def save(self, index_path: Optional[str] = None):
+        """
+        Writes the index, by default next to the ensemble file.
+
+        Args:
+            index_path (str, optional): Where to write the index. Defaults to
+                the ensemble file's path with `INDEX_SUFFIX` added.
+        """
+        with open(index_path or self.path + INDEX_SUFFIX, "wb") as f:
+            np.savez(
+                f,
+                version=_VERSION,
+                variant=self.variant,
+                xz=self.xz,
+                offsets=self.offsets,
+                starts=self.starts,
+                blocks=(
+                    self.blocks
+                    if self.blocks is not None
+                    else np.empty((0, 2), dtype=np.uint64)
+                ),
+                seekable=self.blocks is not None,
+                size=self.size,
+                mtime=self.mtime,
+            )
+
+    def __len__(self) -> int:
+        return int(self.starts[-1])
+
+    @property
+    def stored(self) -> int:
+        """
+        The number of samples stored, counting a run of repeated samples of a
+        Markov-chain file once.
+        """
+        return len(self.offsets) - 1
+
+    def __getitem__(self, sample: int) -> np.ndarray:
+        """
+        Decodes one sample.
+
+        Args:
+            sample (int): The sample's number; negative numbers count from the
+                end.
+
+        Returns:
+            The sample's assignment vector, as a read-only `uint16` array.
+        """
+        if not -len(self) <= sample < len(self):
+            raise IndexError(f"Sample {sample} isn't in a file of {len(self)}.")
+        (assignment,) = self.read(start=sample % len(self), stop=sample % len(self) + 1)
+        return assignment
+
+    def read(
+        self,
+        start: int = 0,
+        stop: Optional[int] = None,
+        every: int = 1,
+        repeat: bool = True,
+        dtype=np.uint16,
+        out: Optional[np.ndarray] = None,
+        chunk: Optional[int] = None,
+    ) -> Iterator[np.ndarray]:
+        """
+        Decodes a range of samples, seeking past those not read.
+
+        Args:
+            start (int, optional): The first sample to read, after any burn-in.
+                Negative numbers count from the end. Defaults to 0.
+            stop (int, optional): The sample to stop before. Defaults to the
+                end of the file.
+            every (int, optional): Read every `every`-th sample from `start`.
+                Defaults to 1.
+            repeat (bool, optional): Whether samples are numbered as `read_ben`
+                yields them, counting each repeat of a sample in a Markov-chain
+                file. Otherwise, they're numbered as stored, each run of
+                repeats once. Defaults to True.
+            dtype (optional): `np.uint16` or `np.uint8`. Defaults to
+                `np.uint16`.
+            out (np.ndarray, optional): A buffer to write samples into, as in
+                `assignment_arrays`.
+            chunk (int, optional): Yield samples `chunk` at a time, as in
+                `assignment_arrays`.
+
+        Yields:
+            The assignment vector of each sample read, as a read-only array
+            (or matrices of `chunk` of them).
+        """
+        if every < 1:
+            raise ValueError("Can't read every 0th or negative sample.")
+        dtype = _dtype(dtype)
+        total = len(self) if repeat else self.stored
+        numbers = np.arange(*slice(start, stop, every).indices(total), dtype=np.int64)
+        samples = self._samples(numbers, repeat, dtype)
+        if out is None and chunk is None:
+            return samples
+        return assignment_arrays(samples, dtype, out, chunk)
+
+    def _samples(
+        self, numbers: np.ndarray, repeat: bool, dtype: np.dtype
+    ) -> Iterator[np.ndarray]:
+        if repeat:
+            frames = np.searchsorted(self.starts, numbers, side="right") - 1
+        else:
+            frames = numbers
+        mkv = self.variant == "mkv_chain"
+
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size != self.size:
+                raise ValueError(f"{self.path} has changed since it was indexed.")
+            reader = _XzReader(f, self.blocks) if self.xz else None
+            last, assignment = None, None
+            for frame in frames.tolist():
+                if frame != last:
+                    offset = int(self.offsets[frame])
+                    size = int(self.offsets[frame + 1]) - offset
+                    if self.xz:
+                        assignment = _decode_ben32(
+                            reader.read(offset, size), mkv, dtype
+                        )
+                    else:
+                        f.seek(offset)
+                        assignment = _decode_frame(f.read(size), dtype)
+                    assignment.flags.writeable = False
+                    last = frame
+                yield assignment
+
+
+def index_ben(path: str, rebuild: bool = False, save: bool = True) -> BenIndex:
+    """
+    Loads the sample index of a BEN or XBEN file, building it if there's none
+    or the file has changed since.
+
+    Args:
+        path (str): The BEN or XBEN file.
+        rebuild (bool, optional): Whether to build the index even if one is
+            saved. Defaults to False.
+        save (bool, optional): Whether to save a new index next to the file,
+            as `<path>.idx`. Defaults to True.
+
+    Returns:
+        The index.
+    """
+    if not rebuild and os.path.exists(path + INDEX_SUFFIX):
+        try:
+            return BenIndex.load(path)
+        except ValueError:
+            pass
+    index = BenIndex.build(path)
+    if save:
+        index.save()
+    return index
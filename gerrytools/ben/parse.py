@@ -1,8 +1,8 @@
-import docker
+import shlex
 from pathlib import Path
 from typing import Optional
 import os
-from .docker_manager import managed_docker_container
+from .docker_manager import DockerSession, _session
 import logging
 
 logger = logging.getLogger("ben")
@@ -18,6 +18,7 @@ def msms_parse(
     verbose: bool = True,
     docker_image_name: str = "mgggdev/replicate:v0.2",
     docker_client_args: Optional[dict] = None,
+    session: Optional[DockerSession] = None,
 ):
     """
     Runs the ``msms_parser`` CLI tool from the
@@ -47,135 +48,9 @@ def msms_parse(
         docker_client_args (dict, optional): Additional arguments to pass to the Docker client.
             Used primarily if there are multiple docker contexts on the same machine.
             Defaults to None.
+        session (DockerSession, optional): A session whose container runs the tool.
+            Defaults to a container for this call alone.
     """
-    if docker_client_args is not None:
-        client = docker.DockerClient(**docker_client_args)
-    else:
-        client = docker.from_env()
-
-    try:
-        print(f"Pulling Docker image {docker_image_name}")
-        client.images.pull(docker_image_name)
-    except Exception as e:
-        print(
-            f"Error comparing docker container {docker_image_name} against web version. "
-            f"Attempting to run using local image"
-        )
-
-    # Set up the input and output paths
-    input_parent_path = Path(input_file_path).parent
-    input_file_name = Path(input_file_path).name
-
-    dual_graph_parent_path = Path(dual_graph_path).parent
-    dual_graph_name = Path(dual_graph_path).name
-
-    if output_file_path is not None:
-        output_parent_path = Path(output_file_path).parent
-        output_file_name = Path(output_file_path).name
-    else:
-        output_parent_path = input_parent_path
-        output_file_name = None
-
-    os.makedirs(output_parent_path, exist_ok=True)
-
-    config_args = {
-        "name": "parse_msms_runner",
-        "image": docker_image_name,
-        "detach": True,
-        "auto_remove": True,
-        "tty": True,
-        "stdin_open": True,
-    }
-
-    if (
-        input_parent_path == output_parent_path
-        and input_parent_path == dual_graph_parent_path
-    ):
-        config_args["volumes"] = {
-            os.getcwd(): {"bind": "/home/ben/working", "mode": "rw"},
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/io",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/io"
-        docker_output_path = "/home/ben/io"
-        docker_dual_graph_path = "/home/ben/io"
-
-    # Now the dual graph path is different from the input path
-    elif input_parent_path == output_parent_path:
-        config_args["volumes"] = {
-            os.getcwd(): {"bind": "/home/ben/working", "mode": "rw"},
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/io",
-                "mode": "rw",
-            },
-            dual_graph_parent_path.resolve(): {
-                "bind": "/home/ben/dual_graph",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/io"
-        docker_output_path = "/home/ben/io"
-        docker_dual_graph_path = "/home/ben/dual_graph"
-
-    # Now the dual graph path might be the same as one of the paths, but
-    # the input and output paths are different
-    elif dual_graph_parent_path == input_parent_path:
-        config_args["volumes"] = {
-            os.getcwd(): {"bind": "/home/ben/working", "mode": "rw"},
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/input",
-                "mode": "rw",
-            },
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/input"
-        docker_output_path = "/home/ben/output"
-        docker_dual_graph_path = "/home/ben/input"
-
-    elif dual_graph_parent_path == output_parent_path:
-        config_args["volumes"] = {
-            os.getcwd(): {"bind": "/home/ben/working", "mode": "rw"},
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/input",
-                "mode": "rw",
-            },
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/input"
-        docker_output_path = "/home/ben/output"
-        docker_dual_graph_path = "/home/ben/output"
-
-    # Now all the paths are different
-    else:
-        config_args["volumes"] = {
-            os.getcwd(): {"bind": "/home/ben/working", "mode": "rw"},
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/input",
-                "mode": "rw",
-            },
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-            dual_graph_parent_path.resolve(): {
-                "bind": "/home/ben/dual_graph",
-                "mode": "rw",
-            },
-        }
-
-        docker_input_path = "/home/ben/input"
-        docker_output_path = "/home/ben/output"
-        docker_dual_graph_path = "/home/ben/dual_graph"
-
-    # Build the command to run in the container
     if mode not in [
         "ben",
         "standard_jsonl",
@@ -183,12 +58,14 @@ def msms_parse(
         print(f"Invalid mode: {mode}. " "Mode must be one of 'ben', 'standard_jsonl'")
         return
 
-    with managed_docker_container(client, config_args) as container:
+    if output_file_path is not None:
+        os.makedirs(Path(output_file_path).parent, exist_ok=True)
 
+    with _session(session, docker_image_name, docker_client_args) as session:
         msms_cmd = (
-            f"msms_parser -w -g {docker_dual_graph_path}/{dual_graph_name}"
-            f" -i {docker_input_path}/{input_file_name}"
-            f" -r {region} -s {subregion}"
+            f"msms_parser -w -g {session.path(dual_graph_path)}"
+            f" -i {session.path(input_file_path)}"
+            f" -r {shlex.quote(region)} -s {shlex.quote(subregion)}"
         )
         if mode == "ben":
             msms_cmd += " -b"
@@ -196,24 +73,11 @@ def msms_parse(
         if verbose:
             msms_cmd += " -v"
 
-        if output_file_name is not None:
-            msms_cmd += f" -o {docker_output_path}/{output_file_name}"
-
-        cmd = ["sh", "-c", f"{msms_cmd}"]
-
-        logger.debug(f"Running command: {cmd}")
-        exec_id = client.api.exec_create(
-            container.id, cmd=cmd, tty=False, stdout=True, stderr=True, stdin=False
-        )
-
-        output_generator = client.api.exec_start(
-            exec_id=exec_id, stream=True, detach=False
-        )
+        if output_file_path is not None:
+            msms_cmd += f" -o {session.path(output_file_path)}"
 
-        for output in output_generator:
-            print(output.decode("utf-8"), end="")
-
-    client.close()
+        logger.debug(f"Running command: {msms_cmd}")
+        session.run(msms_cmd)
 
 
 def smc_parse(
@@ -223,6 +87,7 @@ def smc_parse(
     verbose: bool = True,
     docker_image_name: str = "mgggdev/replicate:v0.2",
     docker_client_args: Optional[dict] = None,
+    session: Optional[DockerSession] = None,
 ):
     """
     Runs the ``smc_parser`` CLI tool from the
@@ -243,79 +108,21 @@ def smc_parse(
         docker_client_args (dict, optional): Additional arguments to pass to the Docker client.
             Used primarily if there are multiple docker contexts on the same machine.
             Defaults to None.
+        session (DockerSession, optional): A session whose container runs the tool.
+            Defaults to a container for this call alone.
     """
-    if docker_client_args is not None:
-        client = docker.DockerClient(**docker_client_args)
-    else:
-        client = docker.from_env()
-
-    try:
-        print(f"Pulling Docker image {docker_image_name}")
-        client.images.pull(docker_image_name)
-    except Exception as e:
-        print(
-            f"Error comparing docker container {docker_image_name} against web version. "
-            f"Attempting to run using local image"
-        )
-
-    # Set up the input and output paths
-    input_parent_path = Path(input_file_path).parent
-    input_file_name = Path(input_file_path).name
+    if mode not in [
+        "ben",
+        "standard_jsonl",
+    ]:
+        print(f"Invalid mode: {mode}. Mode must be one of 'ben', 'standard_jsonl'")
+        return
 
     if output_file_path is not None:
-        output_parent_path = Path(output_file_path).parent
-        output_file_name = Path(output_file_path).name
-    else:
-        output_parent_path = input_parent_path
-        output_file_name = None
-
-    os.makedirs(output_parent_path, exist_ok=True)
+        os.makedirs(Path(output_file_path).parent, exist_ok=True)
 
-    config_args = {
-        "name": "parse_msms_runner",
-        "image": docker_image_name,
-        "detach": True,
-        "auto_remove": True,
-        "tty": True,
-        "stdin_open": True,
-    }
-
-    if input_parent_path == output_parent_path:
-        config_args["volumes"] = {
-            os.getcwd(): {"bind": "/home/ben/working", "mode": "rw"},
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/io",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/io"
-        docker_output_path = "/home/ben/io"
-    else:
-        config_args["volumes"] = {
-            os.getcwd(): {"bind": "/home/ben/working", "mode": "rw"},
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/input",
-                "mode": "rw",
-            },
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-        }
-
-        docker_input_path = "/home/ben/input"
-        docker_output_path = "/home/ben/output"
-
-    with managed_docker_container(client, config_args) as container:
-        # Build the command to run in the container
-        if mode not in [
-            "ben",
-            "standard_jsonl",
-        ]:
-            print(f"Invalid mode: {mode}. Mode must be one of 'ben', 'standard_jsonl'")
-            return
-
-        smc_cmd = f"smc_parser -w -i {docker_input_path}/{input_file_name}"
+    with _session(session, docker_image_name, docker_client_args) as session:
+        smc_cmd = f"smc_parser -w -i {session.path(input_file_path)}"
 
         if mode == "ben":
             smc_cmd += " -b"
@@ -325,21 +132,8 @@ def smc_parse(
         if verbose:
             smc_cmd += " -v"
 
-        if output_file_name is not None:
-            smc_cmd += f" -o {docker_output_path}/{output_file_name}"
-
-        cmd = ["sh", "-c", f"{smc_cmd}"]
-
-        logger.debug(f"Running command: {cmd}")
-        exec_id = client.api.exec_create(
-            container.id, cmd=cmd, tty=False, stdout=True, stderr=True, stdin=False
-        )
-
-        output_generator = client.api.exec_start(
-            exec_id=exec_id, stream=True, detach=False
-        )
-
-        for output in output_generator:
-            print(output.decode("utf-8"), end="")
+        if output_file_path is not None:
+            smc_cmd += f" -o {session.path(output_file_path)}"
 
-    client.close()
+        logger.debug(f"Running command: {smc_cmd}")
+        session.run(smc_cmd)
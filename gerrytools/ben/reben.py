@@ -1,8 +1,8 @@
-import docker
+import shlex
 from pathlib import Path
 from typing import Optional
 import os
-from .docker_manager import managed_docker_container
+from .docker_manager import DockerSession, _session
 import logging
 
 logger = logging.getLogger("ben")
@@ -14,6 +14,7 @@ def canonicalize_ben_file(
     verbose: bool = True,
     docker_image_name: str = "mgggdev/replicate:v0.2",
     docker_client_args: Optional[dict] = None,
+    session: Optional[DockerSession] = None,
 ):
     """
     Runs the REBEN CLI tool from the
@@ -45,90 +46,23 @@ def canonicalize_ben_file(
         docker_client_args (dict, optional): Additional arguments to pass to the Docker client.
             Used primarily if there are multiple docker contexts on the same machine.
             Defaults to None.
+        session (DockerSession, optional): A session whose container runs the tool.
+            Defaults to a container for this call alone.
     """
-    if docker_client_args is not None:
-        client = docker.DockerClient(**docker_client_args)
-    else:
-        client = docker.from_env()
-
-    try:
-        print(f"Pulling Docker image {docker_image_name}")
-        client.images.pull(docker_image_name)
-    except Exception as e:
-        print(
-            f"Error comparing docker container {docker_image_name} against web version. "
-            f"Attempting to run using local image"
-        )
-
-    # Set up the input and output paths
-    input_parent_path = Path(input_file_path).parent
-    input_file_name = Path(input_file_path).name
-
     if output_file_path is not None:
-        output_parent_path = Path(output_file_path).parent
-        output_file_name = Path(output_file_path).name
-    else:
-        output_parent_path = input_parent_path
-        output_file_name = None
-
-    os.makedirs(output_parent_path, exist_ok=True)
-
-    config_args = {
-        "name": "reben_runner",
-        "image": docker_image_name,
-        "detach": True,
-        "auto_remove": True,
-        "tty": True,
-        "stdin_open": True,
-    }
-
-    if input_parent_path == output_parent_path:
-        config_args["volumes"] = {
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/io",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/io"
-        docker_output_path = "/home/ben/io"
-    else:
-        config_args["volumes"] = {
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/input",
-                "mode": "rw",
-            },
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/input"
-        docker_output_path = "/home/ben/output"
-
-    with managed_docker_container(client, config_args) as container:
-        reben_cmd = f"reben {docker_input_path}/{input_file_name} -m ben"
+        os.makedirs(Path(output_file_path).parent, exist_ok=True)
+
+    with _session(session, docker_image_name, docker_client_args) as session:
+        reben_cmd = f"reben {session.path(input_file_path)} -m ben"
 
         if verbose:
             reben_cmd += " -v"
 
-        if output_file_name is not None:
-            reben_cmd += f" -o {docker_output_path}/{output_file_name}"
-
-        cmd = ["sh", "-c", f"{reben_cmd}"]
-
-        logging.debug(f"Running command: {cmd}")
-        exec_id = client.api.exec_create(
-            container.id, cmd=cmd, tty=False, stdout=True, stderr=True, stdin=False
-        )
-
-        output_generator = client.api.exec_start(
-            exec_id=exec_id, stream=True, detach=False
-        )
+        if output_file_path is not None:
+            reben_cmd += f" -o {session.path(output_file_path)}"
 
-        for output in output_generator:
-            print(output.decode("utf-8"), end="")
-
-    client.close()
+        logger.debug(f"Running command: {reben_cmd}")
+        session.run(reben_cmd)
 
 
 def relabel_json_file_by_key(
@@ -138,6 +72,7 @@ def relabel_json_file_by_key(
     verbose: bool = True,
     docker_image_name: str = "mgggdev/replicate:v0.2",
     docker_client_args: Optional[dict] = None,
+    session: Optional[DockerSession] = None,
 ):
     """
     Runs the REBEN CLI tool from the
@@ -163,91 +98,25 @@ def relabel_json_file_by_key(
         docker_image_name (str, optional): The name of the Docker image to run the program in.
             Defaults to "mgggdev/replicate:v0.2".
         docker_client_args (dict, optional): Additional arguments to pass to the Docker client.
+        session (DockerSession, optional): A session whose container runs the tool.
+            Defaults to a container for this call alone.
     """
-    if docker_client_args is not None:
-        client = docker.DockerClient(**docker_client_args)
-    else:
-        client = docker.from_env()
-
-    try:
-        print(f"Pulling Docker image {docker_image_name}")
-        client.images.pull(docker_image_name)
-    except Exception as e:
-        print(
-            f"Error comparing docker container {docker_image_name} against web version. "
-            f"Attempting to run using local image"
-        )
-
-    dual_graph_parent_path = Path(dual_graph_path).parent
-    dual_graph_name = Path(dual_graph_path).name
-
     if output_file_path is not None:
-        output_parent_path = Path(output_file_path).parent
-        output_file_name = Path(output_file_path).name
-    else:
-        output_parent_path = dual_graph_parent_path
-        output_file_name = None
-
-    os.makedirs(output_parent_path, exist_ok=True)
-
-    config_args = {
-        "name": "reben_runner",
-        "image": docker_image_name,
-        "detach": True,
-        "auto_remove": True,
-        "tty": True,
-        "stdin_open": True,
-    }
-
-    if dual_graph_parent_path == output_parent_path:
-        config_args["volumes"] = {
-            dual_graph_parent_path.resolve(): {
-                "bind": "/home/ben/io",
-                "mode": "rw",
-            },
-        }
-        docker_output_path = "/home/ben/io"
-        docker_dual_graph_path = "/home/ben/io"
-
-    else:
-        config_args["volumes"] = {
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-            dual_graph_parent_path.resolve(): {
-                "bind": "/home/ben/dual_graph",
-                "mode": "rw",
-            },
-        }
-
-        docker_output_path = "/home/ben/output"
-        docker_dual_graph_path = "/home/ben/dual_graph"
-
-    with managed_docker_container(client, config_args) as container:
-        reben_cmd = f"reben {docker_dual_graph_path}/{dual_graph_name} -m json -k {key}"
-
-        if verbose:
-            reben_cmd += " -v"
-
-        if output_file_name is not None:
-            reben_cmd += f" -o {docker_output_path}/{output_file_name}"
-
-        cmd = ["sh", "-c", f"{reben_cmd}"]
+        os.makedirs(Path(output_file_path).parent, exist_ok=True)
 
-        logging.debug(f"Running command: {cmd}")
-        exec_id = client.api.exec_create(
-            container.id, cmd=cmd, tty=False, stdout=True, stderr=True, stdin=False
+    with _session(session, docker_image_name, docker_client_args) as session:
+        reben_cmd = (
+            f"reben {session.path(dual_graph_path)} -m json -k {shlex.quote(key)}"
         )
 
-        output_generator = client.api.exec_start(
-            exec_id=exec_id, stream=True, detach=False
-        )
+        if verbose:
+            reben_cmd += " -v"
 
-        for output in output_generator:
-            print(output.decode("utf-8"), end="")
+        if output_file_path is not None:
+            reben_cmd += f" -o {session.path(output_file_path)}"
 
-    client.close()
+        logger.debug(f"Running command: {reben_cmd}")
+        session.run(reben_cmd)
 
 
 def relabel_ben_file_by_key(
@@ -258,6 +127,7 @@ def relabel_ben_file_by_key(
     verbose: bool = True,
     docker_image_name: str = "mgggdev/replicate:v0.2",
     docker_client_args: Optional[dict] = None,
+    session: Optional[DockerSession] = None,
 ):
     """
     Runs the REBEN CLI tool from the
@@ -286,153 +156,26 @@ def relabel_ben_file_by_key(
         docker_image_name (str, optional): The name of the Docker image to run the program in.
             Defaults to "mgggdev/replicate:v0.2".
         docker_client_args (dict, optional): Additional arguments to pass to the Docker client.
+        session (DockerSession, optional): A session whose container runs the tool.
+            Defaults to a container for this call alone.
     """
-    if docker_client_args is not None:
-        client = docker.DockerClient(**docker_client_args)
-    else:
-        client = docker.from_env()
-
-    try:
-        print(f"Pulling Docker image {docker_image_name}")
-        client.images.pull(docker_image_name)
-    except Exception as e:
-        print(
-            f"Error comparing docker container {docker_image_name} against web version. "
-            f"Attempting to run using local image"
-        )
-
-    # Set up the input and output paths
-    input_parent_path = Path(input_file_path).parent
-    input_file_name = Path(input_file_path).name
-
-    dual_graph_parent_path = Path(dual_graph_path).parent
-    dual_graph_name = Path(dual_graph_path).name
-
     if output_file_path is not None:
-        output_parent_path = Path(output_file_path).parent
-        output_file_name = Path(output_file_path).name
-    else:
-        output_parent_path = input_parent_path
-        output_file_name = None
-
-    os.makedirs(output_parent_path, exist_ok=True)
-
-    config_args = {
-        "name": "reben_runner",
-        "image": docker_image_name,
-        "detach": True,
-        "auto_remove": True,
-        "tty": True,
-        "stdin_open": True,
-    }
-
-    if (
-        input_parent_path == output_parent_path
-        and input_parent_path == dual_graph_parent_path
-    ):
-        config_args["volumes"] = {
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/io",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/io"
-        docker_output_path = "/home/ben/io"
-        docker_dual_graph_path = "/home/ben/io"
-
-    # Now the dual graph path is different from the input path
-    elif input_parent_path == output_parent_path:
-        config_args["volumes"] = {
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/io",
-                "mode": "rw",
-            },
-            dual_graph_parent_path.resolve(): {
-                "bind": "/home/ben/dual_graph",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/io"
-        docker_output_path = "/home/ben/io"
-        docker_dual_graph_path = "/home/ben/dual_graph"
-
-    # Now the dual graph path might be the same as one of the paths, but
-    # the input and output paths are different
-    elif dual_graph_parent_path == input_parent_path:
-        config_args["volumes"] = {
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/input",
-                "mode": "rw",
-            },
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/input"
-        docker_output_path = "/home/ben/output"
-        docker_dual_graph_path = "/home/ben/input"
-
-    elif dual_graph_parent_path == output_parent_path:
-        config_args["volumes"] = {
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/input",
-                "mode": "rw",
-            },
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/input"
-        docker_output_path = "/home/ben/output"
-        docker_dual_graph_path = "/home/ben/output"
-
-    # Now all the paths are different
-    else:
-        config_args["volumes"] = {
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/input",
-                "mode": "rw",
-            },
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-            dual_graph_parent_path.resolve(): {
-                "bind": "/home/ben/dual_graph",
-                "mode": "rw",
-            },
-        }
-
-        docker_input_path = "/home/ben/input"
-        docker_output_path = "/home/ben/output"
-        docker_dual_graph_path = "/home/ben/dual_graph"
-
-    with managed_docker_container(client, config_args) as container:
-        reben_cmd = f"reben {docker_input_path}/{input_file_name} -m ben -k {key} -s {docker_dual_graph_path}/{dual_graph_name}"
-
-        if verbose:
-            reben_cmd += " -v"
-
-        if output_file_name is not None:
-            reben_cmd += f" -o {docker_output_path}/{output_file_name}"
+        os.makedirs(Path(output_file_path).parent, exist_ok=True)
 
-        cmd = ["sh", "-c", f"{reben_cmd}"]
-
-        logging.debug(f"Running command: {cmd}")
-        exec_id = client.api.exec_create(
-            container.id, cmd=cmd, tty=False, stdout=True, stderr=True, stdin=False
+    with _session(session, docker_image_name, docker_client_args) as session:
+        reben_cmd = (
+            f"reben {session.path(input_file_path)} -m ben -k {shlex.quote(key)}"
+            f" -s {session.path(dual_graph_path)}"
         )
 
-        output_generator = client.api.exec_start(
-            exec_id=exec_id, stream=True, detach=False
-        )
+        if verbose:
+            reben_cmd += " -v"
 
-        for output in output_generator:
-            print(output.decode("utf-8"), end="")
+        if output_file_path is not None:
+            reben_cmd += f" -o {session.path(output_file_path)}"
 
-    client.close()
+        logger.debug(f"Running command: {reben_cmd}")
+        session.run(reben_cmd)
 
 
 def relabel_ben_file_with_map(
@@ -442,6 +185,7 @@ def relabel_ben_file_with_map(
     verbose: bool = True,
     docker_image_name: str = "mgggdev/replicate:v0.2",
     docker_client_args: Optional[dict] = None,
+    session: Optional[DockerSession] = None,
 ):
     """
     Runs the REBEN CLI tool from the
@@ -467,150 +211,23 @@ def relabel_ben_file_with_map(
         docker_image_name (str, optional): The name of the Docker image to run the program in.
             Defaults to "mgggdev/replicate:v0.2".
         docker_client_args (dict, optional): Additional arguments to pass to the Docker client.
+        session (DockerSession, optional): A session whose container runs the tool.
+            Defaults to a container for this call alone.
     """
-    if docker_client_args is not None:
-        client = docker.DockerClient(**docker_client_args)
-    else:
-        client = docker.from_env()
-
-    try:
-        print(f"Pulling Docker image {docker_image_name}")
-        client.images.pull(docker_image_name)
-    except Exception as e:
-        print(
-            f"Error comparing docker container {docker_image_name} against web version. "
-            f"Attempting to run using local image"
-        )
-
-    # Set up the input and output paths
-    input_parent_path = Path(input_file_path).parent
-    input_file_name = Path(input_file_path).name
-
-    map_file_parent_path = Path(map_file_path).parent
-    map_file_name = Path(map_file_path).name
-
     if output_file_path is not None:
-        output_parent_path = Path(output_file_path).parent
-        output_file_name = Path(output_file_path).name
-    else:
-        output_parent_path = input_parent_path
-        output_file_name = None
-
-    os.makedirs(output_parent_path, exist_ok=True)
-
-    config_args = {
-        "name": "reben_runner",
-        "image": docker_image_name,
-        "detach": True,
-        "auto_remove": True,
-        "tty": True,
-        "stdin_open": True,
-    }
-
-    if (
-        input_parent_path == output_parent_path
-        and input_parent_path == map_file_parent_path
-    ):
-        config_args["volumes"] = {
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/io",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/io"
-        docker_output_path = "/home/ben/io"
-        docker_map_file_path = "/home/ben/io"
-
-    # Now the map file path is different from the input path
-    elif input_parent_path == output_parent_path:
-        config_args["volumes"] = {
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/io",
-                "mode": "rw",
-            },
-            map_file_parent_path.resolve(): {
-                "bind": "/home/ben/map_file",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/io"
-        docker_output_path = "/home/ben/io"
-        docker_map_file_path = "/home/ben/map_file"
-
-    # Now the map file path might be the same as one of the paths, but
-    # the input and output paths are different
-    elif map_file_parent_path == input_parent_path:
-        config_args["volumes"] = {
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/input",
-                "mode": "rw",
-            },
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/input"
-        docker_output_path = "/home/ben/output"
-        docker_map_file_path = "/home/ben/input"
-
-    elif map_file_parent_path == output_parent_path:
-        config_args["volumes"] = {
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/input",
-                "mode": "rw",
-            },
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-        }
-        docker_input_path = "/home/ben/input"
-        docker_output_path = "/home/ben/output"
-        docker_map_file_path = "/home/ben/output"
-
-    # Now all the paths are different
-    else:
-        config_args["volumes"] = {
-            input_parent_path.resolve(): {
-                "bind": "/home/ben/input",
-                "mode": "rw",
-            },
-            output_parent_path.resolve(): {
-                "bind": "/home/ben/output",
-                "mode": "rw",
-            },
-            map_file_parent_path.resolve(): {
-                "bind": "/home/ben/map_file",
-                "mode": "rw",
-            },
-        }
-
-        docker_input_path = "/home/ben/input"
-        docker_output_path = "/home/ben/output"
-        docker_map_file_path = "/home/ben/map_file"
-
-    with managed_docker_container(client, config_args) as container:
-        reben_cmd = f"reben {docker_input_path}/{input_file_name} -m ben -p {docker_map_file_path}/{map_file_name}"
-
-        if verbose:
-            reben_cmd += " -v"
+        os.makedirs(Path(output_file_path).parent, exist_ok=True)
 
-        if output_file_name is not None:
-            reben_cmd += f" -o {docker_output_path}/{output_file_name}"
-
-        cmd = ["sh", "-c", f"{reben_cmd}"]
-
-        logging.debug(f"Running command: {cmd}")
-        exec_id = client.api.exec_create(
-            container.id, cmd=cmd, tty=False, stdout=True, stderr=True, stdin=False
+    with _session(session, docker_image_name, docker_client_args) as session:
+        reben_cmd = (
+            f"reben {session.path(input_file_path)} -m ben"
+            f" -p {session.path(map_file_path)}"
         )
 
-        output_generator = client.api.exec_start(
-            exec_id=exec_id, stream=True, detach=False
-        )
+        if verbose:
+            reben_cmd += " -v"
 
-        for output in output_generator:
-            print(output.decode("utf-8"), end="")
+        if output_file_path is not None:
+            reben_cmd += f" -o {session.path(output_file_path)}"
 
-    client.close()
+        logger.debug(f"Running command: {reben_cmd}")
+        session.run(reben_cmd)
@@ -0,0 +1,368 @@
+"""
+Command-line tools.
+
+    gerrytools score ensemble.jsonl --graph graph.json --scores scores.yaml \\
+        --output scores.parquet --workers 8
+
+`score` summarizes every plan of an ensemble file by the scores named in a
+score spec, a YAML or JSON file like
+
+    updaters:
+      tallies: [TOTPOP, BVAP]
+      elections:
+        SEN16: {Dem: SEN16D, Rep: SEN16R}
+    scores:
+      - cut_edges
+      - splits: {unit: COUNTY}
+      - seats: {election_cols: [SEN16], party: Dem}
+      - demographic_shares: {population_cols: {TOTPOP: [BVAP]}}
+    geometries: units.shp   # only for dissolved scores
+    join_on: GEOID20
+
+Each score is the name of a constructor in `gerrytools.scoring`, alone or
+mapped to its keyword arguments.
+"""
+
+import argparse
+import gzip
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, Optional
+
+from gerrychain import Graph, Partition
+from gerrychain.updaters import Election, Tally
+
+from . import scoring
+from .scoring.types import Score
+
+# Score constructors a spec may name.
+SCORES: Dict[str, Callable] = {
+    name: getattr(scoring, name)
+    for name in [
+        "splits",
+        "pieces",
+        "competitive_contests",
+        "swing_districts",
+        "party_districts",
+        "opp_party_districts",
+        "party_wins_by_district",
+        "seats",
+        "aggregate_seats",
+        "responsive_proportionality",
+        "stable_proportionality",
+        "efficiency_gap",
+        "simplified_efficiency_gap",
+        "mean_median",
+        "partisan_bias",
+        "partisan_gini",
+        "eguia",
+        "demographic_tallies",
+        "demographic_shares",
+        "gingles_districts",
+        "max_deviation",
+        "reock",
+        "polsby_popper",
+        "schwartzberg",
+        "convex_hull",
+        "pop_polygon",
+        "cut_edges",
+        "district_components",
+        "stray_nodes",
+    ]
+}
+
+# Ensemble formats, by file suffix.
+ENSEMBLE_FORMATS = {
+    ".jsonl": "jsonl",
+    ".json": "jsonl",
+    ".ben": "ben",
+    ".xben": "xben",
+    ".ac": "ac",
+}
+
+# Output formats, by file suffix.
+OUTPUT_FORMATS = {
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".jsonl": "jsonl",
+}
+
+
+def _yaml():
+    """
+    Imports PyYAML, which is only needed for YAML score specs.
+    """
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError(
+            "YAML score specs require PyYAML; install it with "
+            "`pip install gerrytools[cli]`, or write the spec as JSON."
+        )
+    return yaml
+
+
+def load_spec(path: str) -> dict:
+    """
+    Reads a score spec from a JSON file, or a YAML file otherwise.
+
+    Args:
+        path (str): Where the spec is.
+
+    Returns:
+        The spec, as a dictionary.
+    """
+    with open(path) as f:
+        if Path(path).suffix == ".json":
+            return json.load(f)
+        return _yaml().safe_load(f)
+
+
+def build_scores(entries: List) -> List[Score]:
+    """
+    Builds the scores listed in a spec.
+
+    Args:
+        entries (list): Score constructor names, or single-entry mappings from a
+            constructor name to its keyword arguments.
+
+    Raises:
+        ValueError: If an entry isn't a name or a single-entry mapping, or names
+            an unknown score.
+
+    Returns:
+        The scores, with those of constructors returning several (such as
+        `demographic_tallies`) listed in turn.
+    """
+    scores = []
+    for entry in entries:
+        if isinstance(entry, str):
+            name, kwargs = entry, {}
+        elif isinstance(entry, Mapping) and len(entry) == 1:
+            ((name, kwargs),) = entry.items()
+            kwargs = kwargs or {}
+        else:
+            raise ValueError(
+                f"Score entry {entry!r} isn't a score name or a mapping from one "
+                "score name to its arguments."
+            )
+        if name not in SCORES:
+            raise ValueError(
+                f'Unknown score "{name}"; use one of {", ".join(sorted(SCORES))}.'
+            )
+        built = SCORES[name](**kwargs)
+        scores.extend(built if isinstance(built, list) else [built])
+    return scores
+
+
+def build_updaters(spec: Mapping) -> dict:
+    """
+    Builds the updaters a spec asks for: a `Tally` for each column listed under
+    `tallies` and an `Election` for each entry of `elections`, which maps
+    parties to vote columns.
+    """
+    updaters = {
+        column: Tally(column, alias=column) for column in spec.get("tallies", [])
+    }
+    for name, parties in spec.get("elections", {}).items():
+        updaters[name] = Election(name, dict(parties))
+    return updaters
+
+
+def _open(path: str):
+    return gzip.open(path, "rt") if path.endswith(".gz") else open(path)
+
+
+def _format(path: str, formats: Mapping[str, str], kind: str) -> str:
+    suffixes = Path(path[:-3] if path.endswith(".gz") else path).suffixes
+    if suffixes and suffixes[-1] in formats:
+        return formats[suffixes[-1]]
+    raise ValueError(
+        f'Can\'t tell the {kind} format of "{path}" from its extension; pass it '
+        "explicitly."
+    )
+
+
+def read_assignments(
+    path: str, graph: Graph, ensemble_format: Optional[str] = None, key: str = None
+) -> Iterator[dict]:
+    """
+    Reads the plans of an ensemble file one at a time.
+
+    Args:
+        path (str): The ensemble file.
+        graph (Graph): The dual graph the plans are drawn on.
+        ensemble_format (str, optional): `"jsonl"`, one plan per line, each a
+            mapping from nodes to districts, a list of districts in the order
+            of the graph's nodes, or an object holding either under
+            `"assignment"` (as BEN's JSON lines do), optionally gzipped;
+            `"ben"` or `"xben"`, decoded in process; or `"ac"`, an
+            `AssignmentCompressor` file. Inferred from the file's extension if
+            not passed.
+        key (str, optional): Node attribute identifying the nodes in mappings
+            and `AssignmentCompressor` files. Defaults to the node ids.
+
+    Yields:
+        Mappings from the graph's nodes to districts.
+    """
+    if ensemble_format is None:
+        ensemble_format = _format(path, ENSEMBLE_FORMATS, "ensemble")
+
+    nodes = list(graph.nodes)
+    ids = [graph.nodes[n][key] for n in nodes] if key is not None else nodes
+    # JSON object keys are always strings.
+    lookup = {str(i): n for i, n in zip(ids, nodes)}
+
+    def mapped(assignment):
+        if isinstance(assignment, Mapping):
+            return {lookup[str(i)]: d for i, d in assignment.items()}
+        return dict(zip(nodes, assignment))
+
+    if ensemble_format == "jsonl":
+        with _open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                plan = json.loads(line)
+                if isinstance(plan, Mapping) and "assignment" in plan:
+                    plan = plan["assignment"]
+                yield mapped(plan)
+    elif ensemble_format in ("ben", "xben"):
+        from .ben.codec import read_ben
+
+        for assignment in read_ben(path):
+            yield dict(zip(nodes, assignment.tolist()))
+    elif ensemble_format == "ac":
+        from .data.AssignmentCompressor import AssignmentCompressor
+
+        for assignment in AssignmentCompressor(ids, location=path).decompress():
+            yield mapped({i: _label(d) for i, d in assignment.items()})
+    else:
+        raise ValueError(
+            f'Unknown ensemble format "{ensemble_format}"; use "jsonl", "ben", '
+            '"xben" or "ac".'
+        )
+
+
+def _label(district: str):
+    # AssignmentCompressor writes districts as text; restore integer labels.
+    try:
+        return int(district)
+    except ValueError:
+        return district
+
+
+def score(options: argparse.Namespace):
+    """
+    Runs `gerrytools score`.
+    """
+    spec = load_spec(options.scores)
+    graph = Graph.from_json(options.graph)
+    scores = build_scores(spec.get("scores", []))
+    updaters = build_updaters(spec.get("updaters", {}))
+
+    gdf = None
+    if spec.get("geometries") is not None:
+        import geopandas
+
+        # Without `join_on`, rows are matched to nodes by index.
+        gdf = geopandas.read_file(spec["geometries"])
+
+    output = options.output
+    output_format = options.output_format or _format(output, OUTPUT_FORMATS, "output")
+    compress = output_format == "jsonl" and output.endswith(".gz")
+    if compress:
+        output = output[:-3]
+
+    assignments = read_assignments(
+        options.ensemble, graph, options.ensemble_format, options.key
+    )
+    parts = (Partition(graph, assignment, updaters) for assignment in assignments)
+    scoring.summarize_many(
+        parts,
+        scores,
+        gdf=gdf,
+        join_on=spec.get("join_on"),
+        output_file=output,
+        compress=compress,
+        output_format=output_format,
+        row_group_size=options.row_group_size,
+        workers=options.workers,
+        chunksize=options.chunksize,
+        shard=tuple(options.shard) if options.shard else None,
+        dedupe=options.dedupe,
+        pipeline=options.pipeline,
+        queue_size=options.queue_size,
+        verbose=options.verbose,
+    )
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="gerrytools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scorer = commands.add_parser(
+        "score",
+        help="Score the plans of an ensemble file.",
+        description="Summarize every plan of an ensemble by the scores in a spec.",
+    )
+    scorer.add_argument(
+        "ensemble", help="Ensemble file: JSON lines, BEN, XBEN, or .ac."
+    )
+    scorer.add_argument("--graph", required=True, help="Dual graph, as JSON.")
+    scorer.add_argument("--scores", required=True, help="Score spec, as YAML or JSON.")
+    scorer.add_argument(
+        "--output",
+        required=True,
+        help="Where to write the summaries: .parquet, .arrow, or .jsonl(.gz).",
+    )
+    scorer.add_argument(
+        "--ensemble-format",
+        choices=["jsonl", "ben", "xben", "ac"],
+        help="Format of the ensemble; inferred from its extension if unset.",
+    )
+    scorer.add_argument(
+        "--output-format",
+        choices=["parquet", "arrow", "jsonl"],
+        help="Format of the output; inferred from its extension if unset.",
+    )
+    scorer.add_argument(
+        "--key", help="Node attribute identifying nodes in the ensemble's plans."
+    )
+    scorer.add_argument("--workers", type=int, default=1)
+    scorer.add_argument("--chunksize", type=int, default=64)
+    scorer.add_argument("--row-group-size", type=int, default=10_000)
+    scorer.add_argument(
+        "--shard",
+        nargs=2,
+        type=int,
+        metavar=("K", "N"),
+        help="Score only the plans whose index is K modulo N.",
+    )
+    scorer.add_argument(
+        "--dedupe", action="store_true", help="Score repeated plans once."
+    )
+    scorer.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Read, score and write plans concurrently.",
+    )
+    scorer.add_argument("--queue-size", type=int, default=256)
+    scorer.add_argument("--verbose", action="store_true")
+    scorer.set_defaults(run=score)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    options = parser().parse_args(argv)
+    try:
+        options.run(options)
+    except (ValueError, ImportError, OSError) as error:
+        print(f"gerrytools {options.command}: {error}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 from math import pi, sqrt
+from typing import Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
 
-import geopandas as gpd
 import numpy as np
-from cv2 import minEnclosingCircle
+from cv2 import convexHull, minEnclosingCircle
 from geopandas import GeoDataFrame
 from gerrychain import Graph, Partition
+from gerrychain.graph import FrozenGraph
 from gerrychain.updaters import (
     Tally,
     boundary_nodes,
@@ -13,6 +15,8 @@ from gerrychain.updaters import (
     interior_boundaries,
     perimeter,
 )
+import shapely
+from shapely import STRtree
 from shapely.ops import unary_union
 
 
@@ -52,15 +56,31 @@ def _reock(dissolved_gdf: GeoDataFrame):
     return part_scores
 
 
-def _polsby_popper(dissolved_gdf: GeoDataFrame):
+def _dissolved_boundaries(dissolved_gdf: GeoDataFrame):
     """
+    District areas and perimeters of a dissolved plan, computed once per plan
+    and shared by the Polsby-Popper and Schwartzberg scores.
+
     Arguments:
         dissolved_gdf (GeoDataFrame): GeoDataFrame corresponding to
             the plan's districts.
 
     Returns:
-        Dictionary of polsby popper scores by district.
+        A pair of dictionaries mapping districts to areas and perimeters.
     """
+    # Imported here to avoid a circular import with `gerrytools.scoring`.
+    from ..scoring.context import _scoped
+
+    # The GeoDataFrame is kept with its boundaries so an `id` reused by
+    # another frame later in the plan can't match.
+    gdf, boundaries = _scoped(
+        ("dissolved_boundaries", id(dissolved_gdf)),
+        lambda: (dissolved_gdf, _measure_dissolved(dissolved_gdf)),
+    )
+    return boundaries if gdf is dissolved_gdf else _measure_dissolved(dissolved_gdf)
+
+
+def _measure_dissolved(dissolved_gdf: GeoDataFrame):
     gdf_graph = Graph.from_geodataframe(dissolved_gdf, ignore_errors=True)
     geo_partition = Partition(
         graph=gdf_graph,
@@ -74,12 +94,20 @@ def _polsby_popper(dissolved_gdf: GeoDataFrame):
             "cut_edges_by_part": cut_edges_by_part,
         },
     )
-    part_scores = {}
-    for part, _ in geo_partition.parts.items():
-        part_scores[part] = (4 * pi * geo_partition["area"][part]) / (
-            geo_partition["perimeter"][part] ** 2
-        )
-    return part_scores
+    return dict(geo_partition["area"]), dict(geo_partition["perimeter"])
+
+
+def _polsby_popper(dissolved_gdf: GeoDataFrame):
+    """
+    Arguments:
+        dissolved_gdf (GeoDataFrame): GeoDataFrame corresponding to
+            the plan's districts.
+
+    Returns:
+        Dictionary of polsby popper scores by district.
+    """
+    area, perim = _dissolved_boundaries(dissolved_gdf)
+    return {part: (4 * pi * area[part]) / (perim[part] ** 2) for part in area}
 
 
 def _schwartzberg(dissolved_gdf: GeoDataFrame):
@@ -90,9 +118,425 @@ def _schwartzberg(dissolved_gdf: GeoDataFrame):
     Returns:
         Dictionary of schwartzberg scores by district.
     """
-    polsby_scores = _polsby_popper(dissolved_gdf)
-    part_scores = {k: 1 / sqrt(polsby_scores[k]) for k in polsby_scores.keys()}
-    return part_scores
+    area, perim = _dissolved_boundaries(dissolved_gdf)
+    return {part: perim[part] / (2 * sqrt(pi * area[part])) for part in area}
+
+
+class UnitGeometry:
+    """
+    The boundary data of a dual graph's units, stored as arrays so that the
+    area and perimeter of every district of any assignment are O(E) sums: each
+    unit's area and exterior boundary length (the part of its boundary on the
+    edge of the map) and the length of the boundary each adjacent pair of
+    units shares. A district's area is the sum of its units' areas, and its
+    perimeter is the sum of its units' exterior boundaries plus the shared
+    boundaries of its cut edges.
+
+    Attributes:
+        nodes (list): Node labels, in the order of the node arrays.
+        area (np.ndarray): Area of each node.
+        exterior (np.ndarray): Exterior boundary length of each node.
+        edges (tuple): Positions of the endpoints of each edge, as two arrays.
+        shared (np.ndarray): Shared boundary length of each edge.
+        hulls (list): The vertices of each node's convex hull, as float32
+            arrays for OpenCV; only available when measured from geometries.
+    """
+
+    def __init__(
+        self,
+        nodes: list,
+        area: np.ndarray,
+        exterior: np.ndarray,
+        edges: Tuple[np.ndarray, np.ndarray],
+        shared: np.ndarray,
+        hulls: Optional[List[np.ndarray]] = None,
+    ):
+        self.nodes = nodes
+        self.position = {node: i for i, node in enumerate(nodes)}
+        self.area = np.asarray(area, dtype=float)
+        self.exterior = np.asarray(exterior, dtype=float)
+        self.edges = edges
+        self.shared = np.asarray(shared, dtype=float)
+        self.hulls = hulls
+        self.exterior_nodes = [nodes[i] for i in np.flatnonzero(self.exterior > 0)]
+
+        # Each node's neighbors and shared boundary lengths, for updating a
+        # plan's sums when a few nodes are flipped.
+        u, v = edges
+        ends = np.concatenate([u, v])
+        order = np.argsort(ends, kind="stable")
+        self._neighbors = np.concatenate([v, u])[order]
+        self._weights = np.concatenate([self.shared, self.shared])[order]
+        self._indptr = np.searchsorted(ends[order], np.arange(len(nodes) + 1))
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "UnitGeometry":
+        """
+        Reads the boundary data GerryChain stores on a dual graph built by
+        `Graph.from_geodataframe`: each node's `area` and `boundary_perim`, and
+        each edge's `shared_perim`.
+
+        Args:
+            graph (Graph): The dual graph.
+
+        Returns:
+            The `UnitGeometry` of `graph`.
+        """
+        graph = graph.graph if isinstance(graph, FrozenGraph) else graph
+        nodes = list(graph.nodes)
+        position = {node: i for i, node in enumerate(nodes)}
+        edges = list(graph.edges(data="shared_perim"))
+        return cls(
+            nodes,
+            [graph.nodes[n]["area"] for n in nodes],
+            [graph.nodes[n].get("boundary_perim", 0) for n in nodes],
+            (
+                np.array([position[u] for u, _, _ in edges], dtype=np.int64),
+                np.array([position[v] for _, v, _ in edges], dtype=np.int64),
+            ),
+            [shared for _, _, shared in edges],
+        )
+
+    @classmethod
+    def from_geodataframe(
+        cls, graph: Graph, gdf: GeoDataFrame, join_on: Optional[str] = None
+    ) -> "UnitGeometry":
+        """
+        Measures the boundary data from the geometries of the dual graph's
+        units, e.g. to use a different projection than the graph was built
+        with. Shared boundaries are measured along the graph's edges, and a
+        unit's exterior boundary is whatever of its perimeter it doesn't share
+        with a neighbor. Also keeps the vertices of each unit's convex hull,
+        for the Reock score.
+
+        Args:
+            graph (Graph): The dual graph.
+            gdf (GeoDataFrame): Geometries of the nodes of `graph`.
+            join_on (str, optional): Field used to join `graph` to `gdf`. If not
+                specified, `gdf`'s index is matched to the node keys of `graph`.
+
+        Returns:
+            The `UnitGeometry` of `graph`, measured in `gdf`'s CRS.
+        """
+        graph = graph.graph if isinstance(graph, FrozenGraph) else graph
+        nodes = list(graph.nodes)
+        position = {node: i for i, node in enumerate(nodes)}
+        keys = [graph.nodes[n][join_on] for n in nodes] if join_on else nodes
+        geometries = (gdf.set_index(join_on) if join_on else gdf).geometry.loc[keys]
+        geometries = geometries.reset_index(drop=True)
+
+        u = np.array([position[u] for u, _ in graph.edges], dtype=np.int64)
+        v = np.array([position[v] for _, v in graph.edges], dtype=np.int64)
+        shared = (
+            geometries.iloc[u]
+            .reset_index(drop=True)
+            .intersection(geometries.iloc[v].reset_index(drop=True))
+            .length.to_numpy()
+        )
+        adjacent = np.bincount(u, shared, len(nodes)) + np.bincount(
+            v, shared, len(nodes)
+        )
+        perimeters = geometries.length.to_numpy()
+        exterior = perimeters - adjacent
+        # Treat rounding error in the subtraction as an interior unit.
+        exterior[exterior < 1e-9 * perimeters] = 0
+        hulls = [_hull_vertices(geometry) for geometry in geometries]
+        return cls(nodes, geometries.area.to_numpy(), exterior, (u, v), shared, hulls)
+
+    def sums(self, codes: np.ndarray, width: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the areas and perimeters of the districts of one or more plans.
+
+        Args:
+            codes (np.ndarray): (plans × nodes) or (nodes,) array of district
+                positions between 0 and `width`.
+            width (int): Number of district positions.
+
+        Returns:
+            Two arrays of shape (plans × width), or (width,) for a single plan.
+        """
+        single = codes.ndim == 1
+        codes = np.atleast_2d(codes)
+        plans = len(codes)
+        offset = np.arange(plans, dtype=np.int64)[:, None] * width
+        flat = (codes + offset).ravel()
+        size = plans * width
+
+        area = np.bincount(flat, np.tile(self.area, plans), size)
+        perim = np.bincount(flat, np.tile(self.exterior, plans), size)
+
+        u, v = self.edges
+        cu, cv = codes[:, u] + offset, codes[:, v] + offset
+        cut = cu != cv
+        weights = np.broadcast_to(self.shared, cut.shape)[cut]
+        perim += np.bincount(cu[cut], weights, size)
+        perim += np.bincount(cv[cut], weights, size)
+
+        area, perim = area.reshape(plans, width), perim.reshape(plans, width)
+        return (area[0], perim[0]) if single else (area, perim)
+
+    def neighbors(self, position: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the positions of the neighbors of the node at `position` and
+        the boundary lengths it shares with them.
+        """
+        start, stop = self._indptr[position], self._indptr[position + 1]
+        return self._neighbors[start:stop], self._weights[start:stop]
+
+
+# Geometry tables read from the boundary data of a graph, by graph.
+_UNIT_GEOMETRIES = WeakKeyDictionary()
+
+
+def _unit_geometry(graph: Graph) -> UnitGeometry:
+    """
+    Returns the `UnitGeometry` stored on `graph`, reading it on first use.
+    """
+    graph = graph.graph if isinstance(graph, FrozenGraph) else graph
+    geometry = _UNIT_GEOMETRIES.get(graph)
+    if geometry is None:
+        geometry = _UNIT_GEOMETRIES[graph] = UnitGeometry.from_graph(graph)
+    return geometry
+
+
+def _district_boundaries(
+    partition: Partition, geometry: Optional[UnitGeometry] = None
+) -> Tuple[Dict, Dict]:
+    """
+    District areas and perimeters summed from `geometry`, or from the boundary
+    data on the partition's dual graph. Along a chain, the parent plan's sums
+    are adjusted for the flipped nodes only.
+
+    Arguments:
+        partition (Partition): The plan.
+        geometry (UnitGeometry, optional): Boundary data of the dual graph's
+            units.
+
+    Returns:
+        A pair of dictionaries mapping districts to areas and perimeters.
+    """
+    # Imported here to avoid a circular import with `gerrytools.scoring`.
+    from ..scoring.context import _plan_cached
+
+    if geometry is None:
+        geometry = _unit_geometry(partition.graph)
+    return _plan_cached(
+        partition,
+        ("district_boundaries", geometry),
+        lambda: _sum_boundaries(partition, geometry),
+        lambda previous: _update_boundaries(previous, partition, geometry),
+    )
+
+
+def _sum_boundaries(partition: Partition, geometry: UnitGeometry):
+    districts = sorted(partition.parts)
+    position = {d: i for i, d in enumerate(districts)}
+    codes = np.fromiter(
+        (position[partition.assignment[n]] for n in geometry.nodes),
+        dtype=np.int64,
+        count=len(geometry.nodes),
+    )
+    area, perim = geometry.sums(codes, len(districts))
+    return (
+        dict(zip(districts, area.tolist())),
+        dict(zip(districts, perim.tolist())),
+    )
+
+
+def _update_boundaries(boundaries, partition: Partition, geometry: UnitGeometry):
+    area, perim = boundaries
+    if partition.parent.parts.keys() != partition.parts.keys():
+        return _sum_boundaries(partition, geometry)
+
+    # Move flipped nodes one at a time, looking up neighbors' districts in
+    # `moved` first so that adjacent flipped nodes are accounted for.
+    assignment, nodes = partition.parent.assignment, geometry.nodes
+    moved = {}
+    for node, new in partition.flips.items():
+        old = assignment[node]
+        if old == new:
+            continue
+        i = geometry.position[node]
+        area[old] -= geometry.area[i]
+        area[new] += geometry.area[i]
+        perim[old] -= geometry.exterior[i]
+        perim[new] += geometry.exterior[i]
+        for j, shared in zip(*geometry.neighbors(i)):
+            neighbor = nodes[j]
+            district = moved.get(neighbor, assignment[neighbor])
+            if district != old:
+                perim[old] -= shared
+                perim[district] -= shared
+            if district != new:
+                perim[new] += shared
+                perim[district] += shared
+        moved[node] = new
+    return area, perim
+
+
+def _polsby_popper_graph(partition: Partition, geometry: UnitGeometry = None):
+    """
+    Arguments:
+        partition (Partition): The plan.
+        geometry (UnitGeometry, optional): Boundary data of the dual graph's
+            units. Read from the dual graph if not passed.
+
+    Returns:
+        Dictionary of polsby popper scores by district.
+    """
+    area, perim = _district_boundaries(partition, geometry)
+    return {part: (4 * pi * area[part]) / (perim[part] ** 2) for part in area}
+
+
+def _schwartzberg_graph(partition: Partition, geometry: UnitGeometry = None):
+    """
+    Arguments:
+        partition (Partition): The plan.
+        geometry (UnitGeometry, optional): Boundary data of the dual graph's
+            units. Read from the dual graph if not passed.
+
+    Returns:
+        Dictionary of schwartzberg scores by district.
+    """
+    area, perim = _district_boundaries(partition, geometry)
+    return {part: perim[part] / (2 * sqrt(pi * area[part])) for part in area}
+
+
+def _hull_vertices(geometry) -> np.ndarray:
+    hull = geometry.convex_hull
+    coords = hull.exterior.coords if hull.geom_type == "Polygon" else hull.coords
+    return np.asarray(coords, dtype=np.float32)
+
+
+class _DistrictHulls:
+    """
+    The convex hull of each district of a plan, with the boundary units it's
+    spanned by: those on the edge of the map or on a cut edge. Along a chain,
+    the boundary units are adjusted for the flipped nodes, as
+    `_update_boundaries` does for perimeters, and only the hulls of districts
+    whose boundary units changed are recomputed.
+
+    Attributes:
+        boundary (dict): Maps each district to the positions of its boundary
+            units.
+        hulls (dict): Maps each district to the vertices of its convex hull.
+    """
+
+    __slots__ = ("boundary", "hulls")
+
+    def __init__(self, boundary: Dict, geometry: UnitGeometry):
+        self.boundary = boundary
+        self.hulls = {
+            district: _hull_of(geometry, positions)
+            for district, positions in boundary.items()
+        }
+
+
+def _district_hulls(partition: Partition, geometry: UnitGeometry) -> Dict:
+    """
+    Vertices of each district's convex hull. A district's convex hull is
+    spanned by the hull vertices of its boundary units (those on the edge of
+    the map or on a cut edge), so only those are stacked, with no polygon
+    union; along a chain, only the districts whose boundary units changed are
+    recomputed.
+    """
+    # Imported here to avoid a circular import with `gerrytools.scoring`.
+    from ..scoring.context import _plan_cached
+
+    return _plan_cached(
+        partition,
+        ("district_hulls", geometry),
+        lambda: _stack_hulls(partition, geometry),
+        lambda previous: _update_hulls(previous, partition, geometry),
+    ).hulls
+
+
+def _stack_hulls(partition: Partition, geometry: UnitGeometry) -> _DistrictHulls:
+    assignment, position = partition.assignment, geometry.position
+    boundary = {district: set() for district in partition.parts}
+    for node in geometry.exterior_nodes:
+        boundary[assignment[node]].add(position[node])
+    for edge in partition["cut_edges"]:
+        for node in edge:
+            boundary[assignment[node]].add(position[node])
+    return _DistrictHulls(boundary, geometry)
+
+
+def _update_hulls(
+    previous: _DistrictHulls, partition: Partition, geometry: UnitGeometry
+) -> _DistrictHulls:
+    if partition.parent.parts.keys() != partition.parts.keys():
+        return _stack_hulls(partition, geometry)
+
+    # Only the flipped nodes and their neighbors can join or leave a
+    # district's boundary.
+    nearby = set()
+    for node in partition.flips:
+        i = geometry.position[node]
+        nearby.add(i)
+        nearby.update(geometry.neighbors(i)[0].tolist())
+
+    assignment, parent, nodes = partition.assignment, partition.parent, geometry.nodes
+    boundary, changed = previous.boundary, set()
+    for i in nearby:
+        old, new = parent.assignment[nodes[i]], assignment[nodes[i]]
+        on_boundary = geometry.exterior[i] > 0 or any(
+            assignment[nodes[j]] != new for j in geometry.neighbors(i)[0]
+        )
+        if i in boundary[old] and (old != new or not on_boundary):
+            boundary[old].remove(i)
+            changed.add(old)
+        if on_boundary and i not in boundary[new]:
+            boundary[new].add(i)
+            changed.add(new)
+
+    for district in changed:
+        previous.hulls[district] = _hull_of(geometry, boundary[district])
+    return previous
+
+
+def _hull_of(geometry: UnitGeometry, positions) -> np.ndarray:
+    vertices = np.concatenate([geometry.hulls[i] for i in sorted(positions)])
+    return convexHull(vertices).reshape(-1, 2)
+
+
+def _reock_graph(partition: Partition, geometry: UnitGeometry):
+    """
+    Arguments:
+        partition (Partition): The plan.
+        geometry (UnitGeometry): Boundary data and hull vertices of the dual
+            graph's units.
+
+    Returns:
+        Dictionary of reock scores by district.
+    """
+    area, _ = _district_boundaries(partition, geometry)
+    hulls = _district_hulls(partition, geometry)
+    scores = {}
+    for part in area:
+        _, radius = minEnclosingCircle(hulls[part])
+        scores[part] = float(area[part] / (pi * radius**2))
+    return scores
+
+
+def _block_boundaries(block, geometry: UnitGeometry = None):
+    if geometry is None:
+        geometry = _unit_geometry(block.columns.graph)
+    return geometry.sums(block.codes, len(block.labels))
+
+
+def _polsby_popper_batch(block, geometry: UnitGeometry = None):
+    area, perim = _block_boundaries(block, geometry)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = 4 * pi * area / perim**2
+    return block.to_dicts(scores, block.present)
+
+
+def _schwartzberg_batch(block, geometry: UnitGeometry = None):
+    area, perim = _block_boundaries(block, geometry)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = perim / (2 * np.sqrt(pi * area))
+    return block.to_dicts(scores, block.present)
 
 
 def _convex_hull(dissolved_gdf: GeoDataFrame):
@@ -121,33 +565,111 @@ def _cut_edges(partition: Partition):
     return len(partition["cut_edges"])
 
 
-def _pop_polygon(dissolved_gdf: GeoDataFrame, block_gdf: GeoDataFrame, pop_col: str):
+def _cut_edges_batch(block):
+    u, v = block.columns.edge_index()
+    return (block.codes[:, u] != block.codes[:, v]).sum(axis=1).tolist()
+
+
+class _BlockIndex:
+    """
+    Block representative points in an STRtree, with their populations. Built
+    once per `pop_polygon` score, so each plan's population counts are a
+    single vectorized tree query rather than a clip of every block.
+    """
+
+    def __init__(self, block_gdf: GeoDataFrame, pop_col: str):
+        self.points = block_gdf.geometry.representative_point().to_numpy()
+        self.population = block_gdf[pop_col].to_numpy(dtype=float)
+        self.tree = STRtree(self.points)
+
+    def enclosed(self, polygons) -> np.ndarray:
+        """
+        Returns the population of the blocks whose representative points lie
+        in each of `polygons`.
+        """
+        polygons = np.asarray(polygons, dtype=object)
+        which, blocks = self.tree.query(polygons, predicate="intersects")
+        return np.bincount(which, self.population[blocks], len(polygons))
+
+
+def _pop_polygon(dissolved_gdf: GeoDataFrame, blocks: _BlockIndex):
     """
     Arguments:
         dissolved_gdf (GeoDataFrame): GeoDataFrame corresponding to
             the plan's districts.
-        block_gdf (GeoDataFrame): Block level GeoDataFrame corresponding
-            to the area covered by the plan.
-        pop_col (str): Field specifying total population data for the plan.
+        blocks (_BlockIndex): Block points and populations for the area
+            covered by the plan.
 
     Returns:
         Dictionary of population polygon scores by district.
     """
-    gdf_graph = Graph.from_geodataframe(dissolved_gdf)
-
-    geo_partition = Partition(
-        graph=gdf_graph,
-        assignment={n: n for n in gdf_graph.nodes},
-        updaters={"population": Tally(pop_col, alias="population")},
+    districts = dissolved_gdf.geometry.to_numpy()
+    population = blocks.enclosed(
+        np.concatenate([districts, shapely.convex_hull(districts)])
     )
+    inside, hull = population[: len(districts)], population[len(districts) :]
+    return {
+        part: float(inside[i] / hull[i])
+        for i, part in enumerate(dissolved_gdf.index.tolist())
+    }
 
-    district_hulls = dict(dissolved_gdf.geometry.apply(lambda p: p.convex_hull))
 
-    pop_polygon_scores = {}
-    for part in geo_partition.parts:
-        hull_gdf = gpd.clip(block_gdf, district_hulls[part - 1])
-        pop_polygon_scores[part] = geo_partition["population"][part] / sum(
-            hull_gdf[pop_col]
-        )
+def _pop_polygon_graph(
+    partition: Partition, blocks: _BlockIndex, geometry: UnitGeometry, pop_col: str
+):
+    """
+    Arguments:
+        partition (Partition): The plan.
+        blocks (_BlockIndex): Block points and populations for the area
+            covered by the plan.
+        geometry (UnitGeometry): Boundary data and hull vertices of the dual
+            graph's units.
+        pop_col (str): Population column on the dual graph.
+
+    Returns:
+        Dictionary of population polygon scores by district.
+    """
+    hulls = _district_hulls(partition, geometry)
+    parts = list(hulls)
+    hull = blocks.enclosed(_polygons([hulls[part] for part in parts]))
+
+    if pop_col in partition.updaters:
+        population = partition[pop_col]
+    else:
+        nodes = partition.graph.nodes
+        population = {
+            part: sum(nodes[n][pop_col] for n in partition.parts[part])
+            for part in parts
+        }
+    return {part: float(population[part] / hull[i]) for i, part in enumerate(parts)}
+
+
+def _pop_polygon_batch(
+    block, blocks: _BlockIndex, geometry: UnitGeometry, pop_col: str
+):
+    plans, width = block.present.shape
+    u, v = geometry.edges
+    exterior = geometry.exterior > 0
+
+    # Hull every district of every plan in the block, then count the
+    # population inside all of them with one tree query.
+    hulls, cells = [], []
+    for i, codes in enumerate(block.codes):
+        boundary = exterior.copy()
+        cut = codes[u] != codes[v]
+        boundary[u[cut]] = boundary[v[cut]] = True
+        positions = np.flatnonzero(boundary)
+        owners = codes[positions]
+        for code in np.unique(owners):
+            hulls.append(_hull_of(geometry, positions[owners == code]))
+            cells.append(i * width + code)
+
+    hull = np.zeros(plans * width)
+    hull[cells] = blocks.enclosed(_polygons(hulls))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = block.tally(pop_col) / hull.reshape(plans, width)
+    return block.to_dicts(scores, block.present)
+
 
-    return pop_polygon_scores
+def _polygons(hulls) -> np.ndarray:
+    return shapely.convex_hull([shapely.multipoints(hull) for hull in hulls])
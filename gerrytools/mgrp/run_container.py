@@ -1,11 +1,17 @@
 import docker
 import traceback
 from abc import ABC, abstractmethod
-from typing import Union, Optional, Type
+from typing import Iterable, Union, Optional, Type, TYPE_CHECKING
 from types import TracebackType
 import json
 from gerrychain import Graph, Partition
+import numpy as np
 import os
+from ..ben.codec import assignment_arrays
+
+if TYPE_CHECKING:
+    from ..scoring.incremental import IncrementalSummarizer
+    from ..scoring.types import Score
 
 
 class RunnerConfig(ABC):
@@ -206,13 +212,33 @@ class RunContainer:
                     f.write(output[1].decode("utf-8"))
                     f.flush()  # Ensure the output is written immediately
 
-    def run_iter(self, *args, **kwargs):
+    def run_iter(
+        self,
+        *args,
+        array: bool = False,
+        dtype=np.uint16,
+        out: Optional[np.ndarray] = None,
+        chunk: Optional[int] = None,
+        **kwargs,
+    ):
         """
         Calls the run method of the provided runner variant with
         the given arguments
 
         Args:
             *args: Variable length argument list.
+            array (bool, optional): Whether to turn the `"assignment"` of each
+                output into a read-only NumPy vector (see
+                `gerrytools.ben.assignment_arrays`), so plans can be scored with
+                vectorized code. Anything written to stderr is then returned
+                with the next plan. Defaults to False.
+            dtype (optional): The type of the vectors, `np.uint16` or `np.uint8`.
+                Defaults to `np.uint16`.
+            out (np.ndarray, optional): A buffer to reuse for every vector (or
+                chunk); each is overwritten by the next. Defaults to None.
+            chunk (int, optional): Collect `chunk` outputs at a time, yielding
+                their assignments as the rows of a matrix and their sample
+                numbers as a list; implies `array`. Defaults to None.
             **kwargs: Variable length keyword argument list.
 
         Yields:
@@ -243,50 +269,46 @@ class RunContainer:
             demux=True,
         )
 
-        # Sometimes the output is split between multiple lines
-        # So this will take care of that issue by accumulating the
-        # output until a newline is reached
-        stdout_buffer = ""
-        for stdout, stderr in output_generator:
-            if stdout:
-                stdout_buffer += stdout.decode("utf-8")
-                # Process any complete JSON objects in the buffer
-                while "\n" in stdout_buffer and "}" in stdout_buffer:
-                    newline_index = stdout_buffer.find("\n")
-                    possible_json = stdout_buffer[:newline_index]
-
-                    if "}" in possible_json:
-                        try:
-                            json_obj = json.loads(possible_json)
-                            yield (json_obj, stderr.decode("utf-8") if stderr else None)
-                        except json.JSONDecodeError:
-                            print(f"Error parsing JSON: {possible_json}")
-                            exit(1)
-
-                        stdout_buffer = stdout_buffer[newline_index + 1 :]
-                    else:
-                        # If no complete JSON object, wait for more data
-                        break
-
-            elif stderr:
-                yield (None, stderr.decode("utf-8"))
+        outputs = _json_outputs(output_generator)
+        if array or chunk is not None:
+            outputs = _array_outputs(outputs, dtype, out, chunk)
+        yield from outputs
 
     # Need the strings here to avoid the circular import
-    def mcmc_run_with_updaters(self, run_info: "Union[RecomRunInfo, ForestRunInfo]"):
+    def mcmc_run_with_updaters(
+        self,
+        run_info: "Union[RecomRunInfo, ForestRunInfo]",
+        scores: "Optional[Iterable[Score]]" = None,
+        partition_updaters: Optional[dict] = None,
+    ):
         """
         Calls the run method of the provided runner variant with
         with the given arguments and then applies the updater functions
         specified in the run_info object and yields them as output.
 
+        Each sample is built by flipping the nodes that changed since the
+        previous sample, so updaters and scores are updated for the districts
+        that changed instead of being recomputed over the whole graph (see
+        `gerrytools.scoring.IncrementalSummarizer`).
+
         This method only works with the Markov Chain Monte Carlo type runners.
 
         Args:
             run_info (Union[RecomRunInfo, ForestRunInfo]): Information about the run
+            scores (Iterable[Score], optional): Scores to summarize each sample
+                by. If passed, each output dictionary has a `"scores"` entry.
+            partition_updaters (dict, optional): GerryChain updaters for the
+                sample partitions, e.g. the tallies and elections `scores`
+                rely on.
 
         Yields:
             Tuple[Dict, str]: Dictionary of the sample number and updater values and the
             error message (if any)
         """
+        # Imported here so that the scoring dependencies are only needed when
+        # samples are actually scored.
+        from ..scoring.incremental import IncrementalSummarizer
+
         if not hasattr(self.config, "run_command"):
             raise NotImplementedError(
                 f"The runner of type {type(self.config)} does not have "
@@ -327,38 +349,21 @@ class RunContainer:
         )
 
         updater_values = {}
-
-        stdout_buffer = ""
-        for stdout, stderr in output_generator:
-            if stdout:
-                stdout_buffer += stdout.decode("utf-8")
-                # Process any complete JSON objects in the buffer
-                while "\n" in stdout_buffer and "}" in stdout_buffer:
-                    newline_index = stdout_buffer.find("\n")
-                    possible_json = stdout_buffer[:newline_index]
-
-                    if "}" in possible_json:
-                        try:
-                            json_obj = json.loads(possible_json)
-                            yield from (
-                                self._process_output(
-                                    json_obj,
-                                    run_info.updaters,
-                                    updater_values,
-                                    stderr.decode("utf-8") if stderr else None,
-                                )
-                            )
-                        except json.JSONDecodeError:
-                            print(f"Error parsing JSON: {possible_json}")
-                            exit(1)
-
-                        stdout_buffer = stdout_buffer[newline_index + 1 :]
-                    else:
-                        # If no complete JSON object, wait for more data
-                        break
-
-            elif stderr:
-                yield (None, stderr.decode("utf-8"))
+        summarizer = IncrementalSummarizer(scores or [])
+
+        for json_obj, error in _json_outputs(output_generator):
+            if json_obj is None:
+                yield (None, error)
+                continue
+            yield from self._process_output(
+                json_obj,
+                run_info.updaters,
+                updater_values,
+                error,
+                summarizer=summarizer,
+                partition_updaters=partition_updaters,
+                scored=scores is not None,
+            )
 
     def _process_output(
         self,
@@ -366,6 +371,9 @@ class RunContainer:
         updater_dict: dict[str, callable],
         updater_values: dict[str, float],
         error=None,
+        summarizer: "Optional[IncrementalSummarizer]" = None,
+        partition_updaters: Optional[dict] = None,
+        scored: bool = False,
     ):
         """
         Processes the output of the run and applies the updater functions
@@ -376,22 +384,111 @@ class RunContainer:
                 to be in the standart `{'assignment': List[int], 'sample': int}` format
             updater_values (Dict): Dictionary of the updater values to return
             error (str, optional): Error message if there is one. Defaults to None.
+            summarizer (IncrementalSummarizer, optional): Scores the sample as a
+                step from the previous sample. If not passed, the sample is
+                built from scratch.
+            partition_updaters (dict, optional): GerryChain updaters for the
+                first sample's partition; later samples inherit them.
+            scored (bool, optional): Whether to include the summary of the
+                sample under `"scores"`. Defaults to False.
 
         Yields:
             Tuple[Dict, str]: Dictionary of the sample number and updater values and the
             error message (if any)
         """
-        partition = Partition(
-            self.graph, dict(enumerate(canon_json_line["assignment"]))
-        )
+        assignment = canon_json_line["assignment"]
+        if summarizer is None:
+            summary = None
+            partition = Partition(
+                self.graph, dict(enumerate(assignment)), partition_updaters
+            )
+        elif summarizer.part is None:
+            summary = summarizer.step(
+                Partition(self.graph, dict(enumerate(assignment)), partition_updaters)
+            )
+            partition = summarizer.part
+        else:
+            previous = summarizer.part.assignment
+            summary = summarizer.flip(
+                {
+                    node: district
+                    for node, district in enumerate(assignment)
+                    if previous[node] != district
+                }
+            )
+            partition = summarizer.part
 
         for func_name, func in updater_dict.items():
             updater_values[func_name] = func(partition)
 
-        yield (
-            {
-                "sample": canon_json_line["sample"],
-                "updaters": updater_values,
-            },
-            error,
-        )
+        output = {
+            "sample": canon_json_line["sample"],
+            "updaters": updater_values,
+        }
+        if scored:
+            output["scores"] = summary
+
+        yield (output, error)
+
+
+def _json_outputs(output_generator):
+    """
+    Parses the JSON lines a runner writes to stdout, yielding each with
+    whatever it wrote to stderr at the same time.
+    """
+    # Sometimes the output is split between multiple lines
+    # So this will take care of that issue by accumulating the
+    # output until a newline is reached
+    stdout_buffer = ""
+    for stdout, stderr in output_generator:
+        if stdout:
+            stdout_buffer += stdout.decode("utf-8")
+            # Process any complete JSON objects in the buffer
+            while "\n" in stdout_buffer and "}" in stdout_buffer:
+                newline_index = stdout_buffer.find("\n")
+                possible_json = stdout_buffer[:newline_index]
+
+                if "}" in possible_json:
+                    try:
+                        json_obj = json.loads(possible_json)
+                        yield (json_obj, stderr.decode("utf-8") if stderr else None)
+                    except json.JSONDecodeError:
+                        print(f"Error parsing JSON: {possible_json}")
+                        exit(1)
+
+                    stdout_buffer = stdout_buffer[newline_index + 1 :]
+                else:
+                    # If no complete JSON object, wait for more data
+                    break
+
+        elif stderr:
+            yield (None, stderr.decode("utf-8"))
+
+
+def _array_outputs(outputs, dtype, out, chunk):
+    """
+    Replaces the assignment lists of runner outputs by arrays, or by matrices
+    of `chunk` of them.
+    """
+    samples, errors = [], []
+
+    def assignments():
+        for json_obj, error in outputs:
+            if error:
+                errors.append(error)
+            if json_obj is not None:
+                samples.append(json_obj.get("sample"))
+                yield json_obj["assignment"]
+
+    # Each array is yielded as soon as its last plan is read, so `samples`
+    # holds exactly the plans in it.
+    for assignment in assignment_arrays(assignments(), dtype, out, chunk):
+        output = {
+            "assignment": assignment,
+            "sample": samples[0] if chunk is None else list(samples),
+        }
+        yield (output, "".join(errors) or None)
+        samples.clear()
+        errors.clear()
+    if errors:
+        yield (None, "".join(errors))
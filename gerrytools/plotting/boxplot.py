@@ -2,6 +2,7 @@ import random
 
 from matplotlib.axes import Axes
 
+from ..scoring.streaming import QuantileSketch
 from .colors import citizenBlue, defaultGray, districtr
 
 
@@ -27,7 +28,11 @@ def boxplot(
     Args:
         ax (Axes): `Axes` object on which the boxplots are plotted.
         scores (dict): Dictionary with keys of `ensemble`, `citizen`, `proposed`
-            which map to lists of numerical scores.
+            which map to lists of numerical scores. The boxes of the `ensemble`
+            or `citizen` scores may instead be streamed `QuantileSketch`es,
+            such as the ranks of a district-wide score in
+            `EnsembleStatistics.ranks`; their boxes and whiskers are drawn from
+            approximate quantiles.
         proposed_info (dict, optional): Dictionary with keys of `colors`, `names`;
             the \(i\)th color in `color` corresponds to the \(i\)th name in `names`.
         percentiles (tuple, optional): Observations outside this range of
@@ -56,16 +61,30 @@ def boxplot(
         "color": facecolor,
     }
 
-    # Plot boxplots.
-    ax.boxplot(
-        ensemble,
-        whis=percentiles,
-        boxprops=boxstyle,
-        whiskerprops=boxstyle,
-        capprops=boxstyle,
-        medianprops=boxstyle,
-        showfliers=False,
-    )
+    # Plot boxplots; streamed scores come with their own quantiles.
+    if ensemble and all(isinstance(box, QuantileSketch) for box in ensemble):
+        lo, hi = percentiles
+        quantiles = [
+            box.quantiles([lo / 100, 0.25, 0.5, 0.75, hi / 100]) for box in ensemble
+        ]
+        ax.bxp(
+            [dict(zip(["whislo", "q1", "med", "q3", "whishi"], q)) for q in quantiles],
+            boxprops=boxstyle,
+            whiskerprops=boxstyle,
+            capprops=boxstyle,
+            medianprops=boxstyle,
+            showfliers=False,
+        )
+    else:
+        ax.boxplot(
+            ensemble,
+            whis=percentiles,
+            boxprops=boxstyle,
+            whiskerprops=boxstyle,
+            capprops=boxstyle,
+            medianprops=boxstyle,
+            showfliers=False,
+        )
 
     # Set xticks, xlabels, and x-axis limits
     if not xticklabels:
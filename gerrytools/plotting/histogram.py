@@ -3,10 +3,21 @@ import random
 from matplotlib.axes import Axes
 import numpy as np
 
+from ..scoring.streaming import Histogram
 from .bins import bins
 from .colors import citizenBlue, defaultGray, districtr
 
 
+def _range(histogram: Histogram) -> list:
+    """
+    The edges of the first and last nonempty bins of a streamed histogram.
+    """
+    nonempty = np.flatnonzero(histogram.counts)
+    if not len(nonempty):
+        return []
+    return [histogram.edges[nonempty[0]], histogram.edges[nonempty[-1] + 1]]
+
+
 def histogram(
     ax,
     scores,
@@ -28,7 +39,9 @@ def histogram(
     Args:
         ax (Axes): `Axes` object on which the histogram is plotted.
         scores (dict): Dictionary with keys of `ensemble`, `citizen`, `proposed`
-            which map to lists of numerical scores.
+            which map to lists of numerical scores. The `ensemble` and `citizen`
+            scores may instead be streamed `Histogram`s (see
+            `EnsembleStatistics`), which are drawn in their own bins.
         label (str, optional): String for x-axis label.
         limits (tuple, optional): X-axis limits (specify to force histogram to extend to
             these limits).
@@ -43,8 +56,17 @@ def histogram(
     Returns:
         Axes object on which the histogram is plotted.
     """
-    # Put all scores into a single list.
-    all_scores = scores["ensemble"] + scores["citizen"] + scores["proposed"]
+    # Put all scores into a single list; streamed histograms contribute the
+    # range of their nonempty bins.
+    all_scores = [
+        score
+        for kind in ["ensemble", "citizen", "proposed"]
+        for score in (
+            _range(scores[kind])
+            if isinstance(scores[kind], Histogram)
+            else scores[kind]
+        )
+    ]
     if not bin_width:
         # Get the necessary bins, ticks, labels, and bin width.
         hist_bins, tick_bins, tick_labels, bin_width = bins(
@@ -65,13 +87,27 @@ def histogram(
     # a citizen ensemble.
     rwidth = 0.8 if len(set(scores)) < 20 else 1
     edgecolor = "black" if len(set(scores)) < 20 else "white"
-    alpha = 0.7 if scores["ensemble"] and scores["citizen"] else 1
+    nonempty = {
+        kind: (
+            scores[kind].counts.any()
+            if isinstance(scores[kind], Histogram)
+            else bool(scores[kind])
+        )
+        for kind in ["ensemble", "citizen"]
+    }
+    alpha = 0.7 if nonempty["ensemble"] and nonempty["citizen"] else 1
 
     for kind in ["ensemble", "citizen"]:
-        if scores[kind]:
+        if nonempty[kind]:
+            if isinstance(scores[kind], Histogram):
+                values, kind_bins = scores[kind].centers, scores[kind].edges
+                weights = scores[kind].counts
+            else:
+                values, kind_bins, weights = scores[kind], hist_bins, None
             ax.hist(
-                scores[kind],
-                bins=hist_bins,
+                values,
+                bins=kind_bins,
+                weights=weights,
                 color=defaultGray if kind == "ensemble" else citizenBlue,
                 rwidth=rwidth,
                 edgecolor=edgecolor,
@@ -2,9 +2,24 @@
 Basic functionality for evaluating districting plans.
 """
 
-from .contiguity import contiguous, unassigned_units
+from ..geometry.compactness import UnitGeometry
+from .batch import assignment_matrix, summarize_batch
+from .checkpoint import merge_shards
+from .columnar import ColumnarWriter, read_columns
+from .context import CacheStats, PlanContext, plan_context
+from .contiguity import (
+    ContiguityReport,
+    check_contiguity,
+    contiguous,
+    unassigned_units,
+)
+from .dedupe import DedupeStats, PlanMemo, plan_hash, unique_plans
 from .demographics import demographic_updaters
+from .incremental import IncrementalSummarizer
+from .parallel import summarize_parallel
+from .pipeline import PipelineStats
 from .population import deviations, unassigned_population
+from .profiling import Profiler
 from .scores import (
     aggregate_seats,
     competitive_contests,
@@ -12,6 +27,7 @@ from .scores import (
     cut_edges,
     demographic_shares,
     demographic_tallies,
+    district_components,
     efficiency_gap,
     eguia,
     gingles_districts,
@@ -32,10 +48,12 @@ from .scores import (
     simplified_efficiency_gap,
     splits,
     stable_proportionality,
+    stray_nodes,
     summarize,
     summarize_many,
     swing_districts,
 )
+from .streaming import EnsembleStatistics, Histogram, Moments, QuantileSketch
 
 __all__ = [
     "splits",
@@ -56,10 +74,35 @@ __all__ = [
     "partisan_gini",
     "summarize",
     "summarize_many",
+    "summarize_batch",
+    "summarize_parallel",
+    "plan_context",
+    "PlanContext",
+    "CacheStats",
+    "IncrementalSummarizer",
+    "ColumnarWriter",
+    "read_columns",
+    "merge_shards",
+    "plan_hash",
+    "unique_plans",
+    "PlanMemo",
+    "DedupeStats",
+    "PipelineStats",
+    "EnsembleStatistics",
+    "Moments",
+    "QuantileSketch",
+    "Histogram",
+    "Profiler",
+    "UnitGeometry",
+    "assignment_matrix",
     "deviations",
     "unassigned_population",
     "unassigned_units",
     "contiguous",
+    "check_contiguity",
+    "ContiguityReport",
+    "district_components",
+    "stray_nodes",
     "reock",
     "demographic_updaters",
     "demographic_tallies",
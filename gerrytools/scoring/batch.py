@@ -0,0 +1,400 @@
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from weakref import WeakKeyDictionary
+
+import numpy as np
+from gerrychain import Graph, Partition
+from gerrychain.graph import FrozenGraph
+from gerrychain.updaters import Election
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from .types import Score, ScoreValue
+
+
+def _nodes(graph) -> list:
+    """
+    Returns the nodes of `graph` in the order used for the columns of an
+    assignment matrix. Unwraps GerryChain's `FrozenGraph` so the order matches
+    the order of the `Graph` the partitions were built from.
+    """
+    return list((graph.graph if isinstance(graph, FrozenGraph) else graph).nodes)
+
+
+class NodeColumns:
+    """
+    Node attributes pulled out of a dual graph once and stored as NumPy arrays,
+    ordered by the graph's nodes. Shared by every block of plans scored against
+    the same graph.
+
+    Attributes:
+        nodes (list): Node labels, in column order.
+        elections (dict): Maps election updater names (aliases) to GerryChain
+            `Election` objects.
+    """
+
+    def __init__(self, graph: Graph, elections: Optional[Iterable[Election]] = None):
+        """
+        Args:
+            graph (Graph): The dual graph the plans are drawn on.
+            elections (Iterable[Election], optional): The `Election` objects
+                used to build election updaters. Required when scoring any
+                election-based score; scores refer to elections by the name
+                they're registered under on a `Partition` (the `alias`).
+        """
+        self.graph = graph.graph if isinstance(graph, FrozenGraph) else graph
+        self.nodes = _nodes(graph)
+        self.elections = {e.alias: e for e in elections} if elections else {}
+        self._columns = {}
+        self._edge_index = None
+        self._adjacency = None
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns the values of the node attribute `name` as an array.
+        """
+        if name not in self._columns:
+            self._columns[name] = np.array(
+                [self.graph.nodes[n][name] for n in self.nodes]
+            )
+        return self._columns[name]
+
+    def edge_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the edges of the graph as a pair of arrays of column positions.
+        """
+        if self._edge_index is None:
+            position = {n: i for i, n in enumerate(self.nodes)}
+            self._edge_index = (
+                np.array([position[u] for u, _ in self.graph.edges], dtype=np.int64),
+                np.array([position[v] for _, v in self.graph.edges], dtype=np.int64),
+            )
+        return self._edge_index
+
+    def adjacency(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the adjacency of the graph in CSR form, as the `(indptr,
+        indices)` arrays of column positions, with each edge in both directions.
+        """
+        if self._adjacency is None:
+            u, v = self.edge_index()
+            n = len(self)
+            matrix = csr_matrix(
+                (
+                    np.ones(2 * len(u), dtype=np.int8),
+                    (np.concatenate([u, v]), np.concatenate([v, u])),
+                ),
+                shape=(n, n),
+            )
+            self._adjacency = (matrix.indptr, matrix.indices)
+        return self._adjacency
+
+    def election(self, alias: str) -> Election:
+        """
+        Returns the `Election` registered under the updater name `alias`.
+        """
+        try:
+            return self.elections[alias]
+        except KeyError:
+            raise ValueError(
+                f'No election named "{alias}" was provided; pass the Election '
+                "objects used to build the election updaters."
+            )
+
+
+_NODE_COLUMNS = WeakKeyDictionary()
+
+
+def _node_columns(graph: Graph) -> NodeColumns:
+    """
+    Returns the `NodeColumns` of `graph`, built on first use and shared by every
+    plan drawn on it, so single plans can be read in a fixed node order and
+    checked against a cached adjacency.
+    """
+    graph = graph.graph if isinstance(graph, FrozenGraph) else graph
+    columns = _NODE_COLUMNS.get(graph)
+    if columns is None:
+        columns = _NODE_COLUMNS[graph] = NodeColumns(graph)
+    return columns
+
+
+class PlanBlock:
+    """
+    A block of plans, stored as the rows of a (plans × nodes) assignment matrix,
+    together with the district-level quantities batch-capable scores share.
+    District labels are pooled over the whole block so every tally is a single
+    `np.bincount` over all plans in the block; a label that doesn't appear in a
+    plan is masked out by `present`.
+
+    Attributes:
+        labels (np.ndarray): Sorted district labels appearing anywhere in the block.
+        codes (np.ndarray): The assignment matrix rewritten as positions in
+            `labels`.
+        present (np.ndarray): (plans × labels) boolean mask of the districts
+            each plan actually uses.
+    """
+
+    def __init__(self, assignments: np.ndarray, columns: NodeColumns):
+        """
+        Args:
+            assignments (np.ndarray): (plans × nodes) integer assignment matrix
+                whose columns follow `columns.nodes`.
+            columns (NodeColumns): Node data for the underlying graph.
+        """
+        if assignments.shape[1] != len(columns):
+            raise ValueError(
+                f"Assignments have {assignments.shape[1]} columns, but the graph "
+                f"has {len(columns)} nodes."
+            )
+
+        self.columns = columns
+        self.labels, codes = np.unique(assignments, return_inverse=True)
+        self.codes = codes.reshape(assignments.shape)
+
+        # Offset each plan's codes so one bincount covers the whole block.
+        plans, labels = len(assignments), len(self.labels)
+        self._flat = (
+            np.arange(plans, dtype=np.int64)[:, None] * labels + self.codes
+        ).ravel()
+        self.present = (
+            np.bincount(self._flat, minlength=plans * labels).reshape(plans, labels) > 0
+        )
+        self._tallies = {}
+        self._votes = {}
+        self._components = None
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    @property
+    def districts(self) -> np.ndarray:
+        """
+        (plans × labels) mask of the districts used by each plan, excluding the
+        unassigned label `-1`.
+        """
+        return self.present & (self.labels != -1)
+
+    def parts(self, i: int) -> list:
+        """
+        Returns the district labels used by the `i`th plan, as Python objects.
+        """
+        return self.labels[self.present[i]].tolist()
+
+    def tally(self, column: str) -> np.ndarray:
+        """
+        Returns a (plans × labels) array of the sum of node attribute `column`
+        over each district of each plan. Integer columns give integer tallies.
+        """
+        if column not in self._tallies:
+            values = self.columns.column(column)
+            weights = np.broadcast_to(values, self.codes.shape).ravel()
+            tally = np.bincount(
+                self._flat, weights=weights, minlength=self.present.size
+            ).reshape(self.present.shape)
+            if np.issubdtype(values.dtype, np.integer):
+                tally = tally.round().astype(values.dtype)
+            self._tallies[column] = tally
+        return self._tallies[column]
+
+    def votes(self, election_cols: Sequence[str]) -> Tuple[np.ndarray, List[list]]:
+        """
+        Returns a (plans × elections × labels × parties) tensor of vote totals
+        and the list of parties for each election. Elections with fewer parties
+        than the widest election are padded with zero votes.
+        """
+        key = tuple(election_cols)
+        if key not in self._votes:
+            elections = [self.columns.election(e) for e in key]
+            width = max(len(election.parties) for election in elections)
+            votes = np.zeros((len(self), len(key), len(self.labels), width))
+            for i, election in enumerate(elections):
+                for j, party in enumerate(election.parties):
+                    votes[:, i, :, j] = self.tally(election.parties_to_columns[party])
+            self._votes[key] = (votes, [list(e.parties) for e in elections])
+        return self._votes[key]
+
+    def components(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns a (plans × labels) array of the number of connected components
+        of each district, and a (plans × nodes) mask of the nodes outside the
+        largest component of their district. The district subgraphs of every
+        plan in the block are found by a single `connected_components` pass over
+        a block-diagonal graph holding one copy of the dual graph per plan,
+        keeping only the edges within a district.
+        """
+        if self._components is None:
+            indptr, indices = self.columns.adjacency()
+            plans, n = self.codes.shape
+
+            # Each edge once, from its lower endpoint: the components of an
+            # undirected graph don't need both directions.
+            rows = np.repeat(np.arange(n), np.diff(indptr))
+            upper = indices > rows
+            rows, indices = rows[upper], indices[upper]
+            indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))])
+            edges = len(indices)
+
+            # Filter the CSR entries of every plan's copy at once: an entry
+            # survives if both endpoints are in the same district, and each
+            # row's new offset is the number of entries kept before it.
+            keep = (self.codes[:, rows] == self.codes[:, indices]).ravel()
+            kept = np.concatenate([[0], np.cumsum(keep)])
+            offsets = np.arange(plans, dtype=np.int64)[:, None]
+            block_indptr = np.append((offsets * edges + indptr[:-1]).ravel(), keep.size)
+            block_indices = (offsets * n + indices).ravel()[keep]
+            graph = csr_matrix(
+                (
+                    np.ones(len(block_indices), dtype=np.int8),
+                    block_indices,
+                    kept[block_indptr],
+                ),
+                shape=(plans * n, plans * n),
+            )
+            count, component = connected_components(graph, directed=False)
+
+            # Each component lies in one district of one plan.
+            district = np.empty(count, dtype=np.int64)
+            district[component] = self._flat
+            counts = np.bincount(district, minlength=self.present.size)
+
+            # The largest component of each district, ties going to the one
+            # holding the earliest node.
+            size = np.bincount(component, minlength=count)
+            order = np.lexsort((-size, district))
+            first = np.ones(count, dtype=bool)
+            first[1:] = district[order][1:] != district[order][:-1]
+            largest = np.zeros(count, dtype=bool)
+            largest[order[first]] = True
+
+            self._components = (
+                counts.reshape(self.present.shape),
+                ~largest[component].reshape(plans, n),
+            )
+        return self._components
+
+    def to_dicts(self, values: np.ndarray, mask: np.ndarray) -> List[dict]:
+        """
+        Converts a (plans × labels) array into one `{district: value}` mapping
+        per plan, keeping only the districts selected by `mask`.
+        """
+        labels = self.labels.tolist()
+        dicts = []
+        for row, keep in zip(values, mask):
+            where = np.flatnonzero(keep)
+            dicts.append(dict(zip([labels[j] for j in where], row[where].tolist())))
+        return dicts
+
+
+def assignment_matrix(
+    plans: Iterable[Union[Partition, Mapping]], graph: Graph
+) -> np.ndarray:
+    """
+    Stacks plans into a (plans × nodes) assignment matrix whose columns follow
+    the node order of `graph`.
+
+    Args:
+        plans (Iterable[Union[Partition, Mapping]]): Partitions or assignment
+            mappings from nodes to integer district labels.
+        graph (Graph): The dual graph the plans are drawn on.
+
+    Returns:
+        An integer `np.ndarray` with one row per plan.
+    """
+    nodes = _nodes(graph)
+    rows = []
+    for plan in plans:
+        assignment = plan.assignment if isinstance(plan, Partition) else plan
+        rows.append([assignment[n] for n in nodes])
+    return np.array(rows, dtype=np.int64).reshape(-1, len(nodes))
+
+
+def _blocks(
+    assignments: Union[np.ndarray, Iterable[Sequence[int]]], block_size: int
+) -> Iterator[np.ndarray]:
+    """
+    Splits an assignment matrix, or an iterable of assignment rows, into
+    matrices of at most `block_size` rows.
+    """
+    if isinstance(assignments, np.ndarray):
+        if assignments.ndim == 1:
+            assignments = assignments[None, :]
+        for start in range(0, len(assignments), block_size):
+            yield assignments[start : start + block_size]
+        return
+
+    block = []
+    for row in assignments:
+        block.append(np.asarray(row))
+        if len(block) == block_size:
+            yield np.stack(block)
+            block = []
+    if block:
+        yield np.stack(block)
+
+
+def summarize_batch(
+    assignments: Union[np.ndarray, Iterable[Sequence[int]]],
+    scores: Iterable[Score],
+    graph: Graph,
+    elections: Optional[Iterable[Election]] = None,
+    block_size: int = 1000,
+) -> List[Dict[str, ScoreValue]]:
+    """
+    Summarize many plans at once by the passed scores. Rather than building a
+    `Partition` per plan, node attributes are read from `graph` once and each
+    block of plans is tallied with NumPy scatter-adds, so every score in
+    `scores` must have a batch implementation (see `Score.batch`).
+
+    Tallies are taken from the node attribute of the same name as the
+    corresponding updater, which is how `demographic_updaters` names them;
+    election-based scores read vote totals from the columns of the `Election`
+    objects passed in `elections`.
+
+    Args:
+        assignments (Union[np.ndarray, Iterable[Sequence[int]]]): A
+            (plans × nodes) integer assignment matrix, or an iterable of
+            assignment rows, with columns in the node order of `graph`. See
+            `assignment_matrix`.
+        scores (Iterable[Score]): Which scores to include in the summaries.
+        graph (Graph): The dual graph the plans are drawn on.
+        elections (Iterable[Election], optional): Elections referred to by
+            election-based scores.
+        block_size (int, optional): Number of plans tallied together. Memory
+            use grows with `block_size` × nodes. Defaults to 1000.
+
+    Raises:
+        ValueError: If a score in `scores` has no batch implementation.
+
+    Returns:
+        A list of dictionaries, one per plan, mapping score names to the same
+        ScoreValues `summarize` would produce for that plan.
+    """
+    scores = list(scores)
+    unsupported = [score.name for score in scores if score.batch is None]
+    if unsupported:
+        raise ValueError(
+            f"Scores {unsupported} have no batch implementation; use summarize_many."
+        )
+
+    columns = NodeColumns(graph, elections)
+    summaries = []
+    for assignment_block in _blocks(assignments, block_size):
+        block = PlanBlock(assignment_block, columns)
+        values = {score.name: score.batch(block) for score in scores}
+        summaries.extend(
+            {name: value[i] for name, value in values.items()}
+            for i in range(len(block))
+        )
+    return summaries
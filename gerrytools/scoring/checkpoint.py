@@ -0,0 +1,216 @@
+import gzip
+import json
+import os
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def _select(
+    items: Iterable[T],
+    id_range: Optional[Tuple[int, Optional[int]]] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    start: int = 0,
+) -> Iterator[Tuple[int, T]]:
+    """
+    Yields the items, with their indices, that fall in `id_range` and belong to
+    `shard`, skipping those before index `start`. Items that aren't selected are
+    still drawn from `items` (so a chain still advances past them) but are not
+    yielded.
+
+    Args:
+        items (Iterable): The items to select from.
+        id_range (Tuple[int, Optional[int]], optional): Half-open range of
+            indices to keep; a stop of `None` keeps everything from the start.
+        shard (Tuple[int, int], optional): A pair `(k, N)`; keeps the indices
+            `i` with `i % N == k`.
+        start (int, optional): Index of the first item to keep.
+    """
+    first, stop = id_range if id_range is not None else (0, None)
+    first = max(first, start)
+    for i, item in enumerate(items):
+        if stop is not None and i >= stop:
+            return
+        if i < first:
+            continue
+        if shard is not None and i % shard[1] != shard[0]:
+            continue
+        yield i, item
+
+
+def _validate_selection(
+    id_range: Optional[Tuple[int, Optional[int]]], shard: Optional[Tuple[int, int]]
+):
+    if shard is not None:
+        k, n = shard
+        if n < 1 or not 0 <= k < n:
+            raise ValueError(f"Shard {shard} isn't a pair (k, N) with 0 <= k < N.")
+    if id_range is not None:
+        first, stop = id_range
+        if first < 0 or (stop is not None and stop < first):
+            raise ValueError(f"Id range {id_range} isn't a range of plan indices.")
+
+
+class _Checkpoint:
+    """
+    Writes JSON lines to `{path}.partial`, recording in the sidecar file
+    `{path}.checkpoint` the index of the next plan to score and the size of the
+    partial file each time a batch of lines has been flushed to disk. A rerun
+    with the same arguments truncates the partial file to the recorded size,
+    dropping any lines written after the last checkpoint, and resumes from the
+    recorded plan. Once every plan has been written, the partial file is
+    renamed to `path` and the sidecar removed.
+
+    When compressing, each flushed batch is written as its own gzip member;
+    concatenated members form a valid gzip file, and a file truncated at a
+    member boundary is still valid. If `finish` is given, it's called with the
+    partial file and `path` to write the finished output (a columnar file, say)
+    instead of renaming the partial file, which is then removed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compress: bool,
+        every: int,
+        selection: dict,
+        finish: Optional[Callable[[str, str], None]] = None,
+    ):
+        self.path = path
+        self.partial = f"{path}.partial"
+        self.sidecar = f"{path}.checkpoint"
+        self.compress = compress
+        self.every = every
+        self.selection = selection
+        self.finish = finish
+        self.next = 0
+        self.offset = 0
+        self._lines = []
+        self._upto = 0
+
+        if os.path.exists(self.sidecar):
+            with open(self.sidecar) as f:
+                state = json.load(f)
+            if state["selection"] != selection:
+                raise ValueError(
+                    f"The checkpoint {self.sidecar} was written for plans "
+                    f"{state['selection']}, not {selection}; remove it to start over."
+                )
+            self.next, self.offset = state["next"], state["offset"]
+        elif os.path.exists(self.partial):
+            # Written before the first checkpoint; nothing in it is recorded.
+            os.remove(self.partial)
+        self._upto = self.next
+
+        self._file = open(self.partial, "ab")
+        self._file.truncate(self.offset)
+        self._file.seek(self.offset)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        if exc_type is not None:
+            # Leave the partial file and sidecar as they were at the last
+            # checkpoint, ready to resume.
+            self._file.close()
+            return
+        self.flush(self._upto)
+        self._file.close()
+        if self.finish is None:
+            os.replace(self.partial, self.path)
+        else:
+            self.finish(self.partial, self.path)
+            os.remove(self.partial)
+        os.remove(self.sidecar)
+
+    def write(self, line: str, index: int):
+        """
+        Buffers the line for plan `index`, checkpointing after every `every`
+        lines.
+        """
+        self._lines.append(line)
+        self._upto = index + 1
+        if len(self._lines) >= self.every:
+            self.flush(self._upto)
+
+    def flush(self, resume_at: int):
+        """
+        Writes the buffered lines to disk and records that scoring resumes at
+        plan `resume_at`.
+        """
+        data = "".join(self._lines).encode()
+        self._lines = []
+        if data:
+            self._file.write(gzip.compress(data) if self.compress else data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self.next, self.offset = resume_at, self._file.tell()
+
+        state = {"next": self.next, "offset": self.offset, "selection": self.selection}
+        temporary = f"{self.sidecar}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.sidecar)
+
+
+def _open_lines(path: str):
+    return gzip.open(path, "rt") if path.endswith(".gz") else open(path)
+
+
+def merge_shards(paths: List[str], output_file: str, interleave: bool = True):
+    """
+    Merges the JSON-lines outputs of `summarize_many` run on separate shards of
+    one ensemble into a single file, in the order the plans were drawn. Files
+    compressed with gzip (named `*.gz`) are read and, if `output_file` ends in
+    `.gz`, written compressed.
+
+    Args:
+        paths (List[str]): The shards' output files. With `interleave`, the
+            output of shard `(k, N)` must be `paths[k]`; otherwise, the outputs
+            of consecutive id ranges, in order.
+        output_file (str): Where to write the merged file.
+        interleave (bool, optional): Whether the shards were made with `shard`,
+            so that plan `i` is line `i // N` of shard `i % N`. If False, the
+            files (made with `id_range`) are concatenated. Defaults to True.
+
+    Raises:
+        ValueError: If `interleave` is passed with shards whose repeated plans
+            were folded into multiplicities, which breaks the round-robin.
+    """
+    files = [_open_lines(path) for path in paths]
+    try:
+        if interleave:
+            for path, f in zip(paths, files):
+                line = f.readline()
+                if line and "multiplicity" in json.loads(line):
+                    raise ValueError(
+                        f"{path} was deduplicated, so its plans can't be put "
+                        "back in order; score shards without `dedupe`."
+                    )
+                f.seek(0)
+
+        with (
+            gzip.open(output_file, "wt")
+            if output_file.endswith(".gz")
+            else open(output_file, "w")
+        ) as fout:
+            if not interleave:
+                for f in files:
+                    for line in f:
+                        fout.write(line)
+                return
+
+            # Shard k holds as many plans as shard k + 1, or one more, so the
+            # round-robin ends at the first shard to run out.
+            while True:
+                for f in files:
+                    line = f.readline()
+                    if not line:
+                        return
+                    fout.write(line)
+    finally:
+        for f in files:
+            f.close()
@@ -0,0 +1,295 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .types import ScoreValue
+
+# File formats the columnar writer and reader support.
+FORMATS = {"parquet", "arrow"}
+
+
+def _pyarrow():
+    """
+    Imports pyarrow, which is only needed for columnar output.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "Columnar output requires pyarrow; install it with "
+            "`pip install gerrytools[columnar]`."
+        )
+    return pyarrow
+
+
+def flatten(summary: Dict[str, ScoreValue]) -> Dict[str, Any]:
+    """
+    Flattens a plan summary into columns. Plan-wide scores keep their names;
+    district-wide and election-wide scores (dictionaries) get one column per
+    key, named `"{score}.{key}"`. Lists, like the names of split units, are
+    kept whole as list-valued columns.
+
+    Args:
+        summary (dict): A summary produced by `summarize`.
+
+    Returns:
+        A dictionary mapping column names to scalar (or list) values.
+    """
+    row = {}
+    for name, value in summary.items():
+        if isinstance(value, dict):
+            for key, v in value.items():
+                row[f"{name}.{key}"] = v
+        else:
+            row[name] = value
+    return row
+
+
+def _scalar(value: Any) -> Any:
+    # NumPy scalars (e.g. from batch scores) as plain Python values.
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# How many row groups' worth of plans are held back, at most, waiting for a
+# value that gives an untyped column its type.
+_DEFERRED_ROW_GROUPS = 10
+
+
+def _untyped(pa, type) -> bool:
+    # Columns of nulls, or of lists that are all empty or null, say nothing
+    # about the values that will come later.
+    return pa.types.is_null(type) or (
+        pa.types.is_list(type) and pa.types.is_null(type.value_type)
+    )
+
+
+def _widen(pa, type):
+    # Scores that are whole numbers for some plans may be fractional for
+    # others, so numbers are stored as floats. Lists seen only empty hold the
+    # names of units, which are usually strings.
+    if pa.types.is_integer(type) or pa.types.is_null(type):
+        return pa.float64()
+    if pa.types.is_list(type) and pa.types.is_null(type.value_type):
+        return pa.list_(pa.string())
+    return type
+
+
+class ColumnarWriter:
+    """
+    Streams plan summaries into a columnar file, a row group at a time, so the
+    file never has to be held in memory. Columns are taken from the first row
+    group; later plans may omit columns (they're written as nulls), but can't
+    add new ones, so scores whose keys vary from plan to plan can't be
+    written.
+
+    Numeric columns are stored as 64-bit floats, except for the `"id"`
+    column. A column of lists takes its type from its first non-empty list:
+    plans are held back, up to ten row groups' worth, until one appears, and
+    lists that are still all empty after that are typed as lists of strings.
+    Later values that can't be converted to a column's type without loss
+    raise an error rather than being truncated.
+
+    Two formats are supported: Parquet, which is compact and readable by most
+    data tools, and the Arrow IPC (Feather) format, whose uncompressed columns
+    can be memory-mapped by `read_columns` without copying.
+
+    Example:
+
+        with ColumnarWriter("scores.parquet") as writer:
+            for i, summary in enumerate(summaries):
+                writer.write(summary, id=i)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        output_format: str = "parquet",
+        row_group_size: int = 10_000,
+        compression: Optional[str] = None,
+    ):
+        """
+        Args:
+            path (str): Where to write the file.
+            output_format (str, optional): `"parquet"` or `"arrow"`. Defaults to
+                `"parquet"`.
+            row_group_size (int, optional): Number of plans buffered and written
+                together. Defaults to 10,000.
+            compression (str, optional): Compression codec, e.g. `"zstd"`.
+                Defaults to Parquet's default (snappy) and to no compression for
+                Arrow files, which keeps them memory-mappable.
+        """
+        if output_format not in FORMATS:
+            raise ValueError(
+                f'"{output_format}" is not a columnar format; use one of {FORMATS}.'
+            )
+        self.path = path
+        self.output_format = output_format
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.schema = None
+        self._rows = []
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def write(self, summary: Dict[str, ScoreValue], id: Any = None):
+        """
+        Buffers one plan's summary, writing a row group once enough have been
+        buffered.
+
+        Args:
+            summary (dict): A summary produced by `summarize`.
+            id (Any, optional): The plan's identifier, written to the `"id"`
+                column.
+        """
+        row = flatten(summary)
+        if id is not None:
+            row = {"id": id, **row}
+        self._rows.append(row)
+        if len(self._rows) % self.row_group_size == 0:
+            self._flush(final=False)
+
+    def flush(self):
+        """
+        Writes the buffered plans, fixing the columns and their types if this
+        is the first write.
+        """
+        self._flush(final=True)
+
+    def _flush(self, final: bool):
+        if not self._rows:
+            return
+        pa = _pyarrow()
+
+        if self.schema is None:
+            names = list(dict.fromkeys(k for row in self._rows for k in row))
+        else:
+            names = self.schema.names
+            extra = set(k for row in self._rows for k in row) - set(names)
+            if extra:
+                raise ValueError(
+                    f"Columns {sorted(extra)} weren't in the first row group; "
+                    "every column must appear among the first row group's plans."
+                )
+
+        table = pa.table(
+            {name: [_scalar(row.get(name)) for row in self._rows] for name in names}
+        )
+        if self.schema is None:
+            deferred = len(self._rows) < _DEFERRED_ROW_GROUPS * self.row_group_size
+            if (
+                not final
+                and deferred
+                and any(_untyped(pa, t) for t in table.schema.types)
+            ):
+                return
+            self.schema = pa.schema(
+                [
+                    (
+                        field.name,
+                        field.type if field.name == "id" else _widen(pa, field.type),
+                    )
+                    for field in table.schema
+                ]
+            )
+            self._writer = self._open(pa)
+        table = table.cast(self.schema, safe=True)
+        self._rows = []
+
+        if self.output_format == "parquet":
+            self._writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            for batch in table.to_batches(max_chunksize=self.row_group_size):
+                self._writer.write_batch(batch)
+
+    def _open(self, pa):
+        if self.output_format == "parquet":
+            return pa.parquet.ParquetWriter(
+                self.path, self.schema, compression=self.compression or "snappy"
+            )
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        return pa.ipc.new_file(self.path, self.schema, options=options)
+
+    def close(self):
+        """
+        Writes any buffered plans and finishes the file.
+        """
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def _select(names: List[str], columns: Optional[Iterable[str]]) -> List[str]:
+    """
+    Expands score names into the flattened columns they were written as.
+    """
+    if columns is None:
+        return names
+    selected = []
+    for column in columns:
+        matches = [n for n in names if n == column or n.startswith(f"{column}.")]
+        if not matches:
+            raise KeyError(f'No column "{column}" in the file.')
+        selected.extend(matches)
+    return list(dict.fromkeys(selected))
+
+
+def read_columns(
+    path: str,
+    columns: Optional[Iterable[str]] = None,
+    output_format: Optional[str] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Loads columns written by `ColumnarWriter` as NumPy arrays. Only the
+    requested columns are read. Arrow files are memory-mapped, so uncompressed
+    numeric columns without nulls are views of the file rather than copies;
+    Parquet files are memory-mapped and decoded column by column.
+
+    Args:
+        path (str): The file to read.
+        columns (Iterable[str], optional): The columns to load. A score name
+            selects all of the score's columns, e.g. `"polsby_popper"` selects
+            `"polsby_popper.1"`, `"polsby_popper.2"`, and so on. Defaults to
+            every column.
+        output_format (str, optional): `"parquet"` or `"arrow"`. Inferred from
+            the file if not passed.
+
+    Returns:
+        A dictionary mapping column names to arrays, one entry per plan.
+    """
+    pa = _pyarrow()
+    if output_format is None:
+        with open(path, "rb") as f:
+            output_format = "arrow" if f.read(6) == b"ARROW1" else "parquet"
+
+    if output_format == "arrow":
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        table = table.select(_select(table.schema.names, columns))
+    else:
+        schema = pa.parquet.read_schema(path)
+        table = pa.parquet.read_table(
+            path, columns=_select(schema.names, columns), memory_map=True
+        )
+
+    return {
+        name: _to_numpy(column)
+        for name, column in zip(table.column_names, table.columns)
+    }
+
+
+def _to_numpy(column) -> np.ndarray:
+    # A column held in a single chunk converts without copying when its type
+    # allows (numeric, no nulls); anything else is copied.
+    if column.num_chunks == 1 and column.null_count == 0:
+        try:
+            return column.chunk(0).to_numpy(zero_copy_only=True)
+        except Exception:
+            pass
+    return column.to_numpy()
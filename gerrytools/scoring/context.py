@@ -0,0 +1,239 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Set
+
+from gerrychain import Partition
+
+from .profiling import _active_profiler
+
+
+@dataclass
+class CacheStats:
+    """
+    Running hit and miss counts for intermediate products shared between the
+    scores of a plan. Pass one instance to `summarize` or `summarize_many` to
+    accumulate counts over many plans. When scoring a chain incrementally,
+    `updates` counts the products carried over from the previous plan and
+    updated in place rather than rebuilt. `built` counts how many times each
+    named product was built.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    updates: int = 0
+    built: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+class PlanContext:
+    """
+    Intermediate products (e.g. the district × election vote-share matrix)
+    computed while scoring a single plan. Products are computed on first use,
+    reused by every later score of the same plan, and dropped when the context
+    exits, so nothing outlives the plan it was computed for.
+
+    Attributes:
+        part (Partition): The plan this context belongs to.
+        products (dict): Computed products, keyed by the key they were
+            requested under.
+        hits (int): Number of requests answered from `products`.
+        misses (int): Number of requests that computed a product.
+        updates (int): Number of products updated from `parent`'s.
+        built (list): Names of the products built for this plan, in the order
+            they were built.
+        parent (PlanContext): When `part` was made by flipping nodes of the
+            plan `parent` belongs to, products that know how to update
+            themselves are taken from `parent` instead of being rebuilt.
+    """
+
+    def __init__(
+        self,
+        part: Partition,
+        stats: Optional[CacheStats] = None,
+        parent: Optional["PlanContext"] = None,
+    ):
+        self.part = part
+        self.products = {}
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+        self.built = []
+        self.stats = stats
+        self.parent = parent
+
+    def get(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        update: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """
+        Returns the product stored under `key`, calling `compute` to build it
+        if it hasn't been built yet for this plan. If `update` is passed and
+        the parent plan's context holds the product, the product is instead
+        taken from the parent and passed to `update`, which adjusts it for the
+        flipped nodes and returns it.
+        """
+        if key in self.products:
+            self.hits += 1
+            if self.stats is not None:
+                self.stats.hits += 1
+            return self.products[key]
+
+        parent = self.parent
+        if (
+            update is not None
+            and parent is not None
+            and key in parent.products
+            and self.part.parent is parent.part
+        ):
+            # The parent plan is done with the product, so it can be updated
+            # in place rather than copied.
+            self.updates += 1
+            if self.stats is not None:
+                self.stats.updates += 1
+            previous = parent.products.pop(key)
+            profiler = _active_profiler.get()
+            if profiler is None:
+                value = self.products[key] = update(previous)
+            else:
+                with profiler.record("update", _product_name(key)):
+                    value = self.products[key] = update(previous)
+            return value
+
+        name = _product_name(key)
+        self.misses += 1
+        self.built.append(name)
+        if self.stats is not None:
+            self.stats.misses += 1
+            self.stats.built[name] = self.stats.built.get(name, 0) + 1
+        profiler = _active_profiler.get()
+        if profiler is None:
+            value = self.products[key] = compute()
+        else:
+            with profiler.record("product", name):
+                value = self.products[key] = compute()
+        return value
+
+
+def _product_name(key: Hashable) -> str:
+    """
+    The name of the product stored under `key`: its first element, by the
+    convention that keys are tuples of a name and the product's parameters.
+    """
+    return str(key[0] if isinstance(key, tuple) else key)
+
+
+_active_context: ContextVar[Optional[PlanContext]] = ContextVar(
+    "gerrytools_plan_context", default=None
+)
+
+
+@contextmanager
+def plan_context(
+    part: Partition, stats: Optional[CacheStats] = None
+) -> Iterator[PlanContext]:
+    """
+    Scopes shared intermediate products to `part`. Within the `with` block,
+    scores applied to `part` share their intermediates; on exit they're
+    released. `summarize` opens a context for each plan automatically, so this
+    is only needed to inspect the counters or to share products across several
+    calls for the same plan. If a context for `part` is already open, it's
+    reused.
+
+    Example:
+
+        with plan_context(part) as context:
+            summary = summarize(part, scores)
+        print(context.hits, context.misses)
+
+    Args:
+        part (Partition): The plan being scored.
+        stats (CacheStats, optional): Counts to add this plan's hits and misses to.
+
+    Yields:
+        The `PlanContext` for `part`.
+    """
+    active = _active_context.get()
+    if active is not None and active.part is part:
+        # Count this call's requests in `stats`, unless the open context is
+        # already counting into its own.
+        previous = active.stats
+        if previous is None:
+            active.stats = stats
+        try:
+            yield active
+        finally:
+            active.stats = previous
+        return
+
+    with _activate(PlanContext(part, stats)) as context:
+        try:
+            yield context
+        finally:
+            context.products.clear()
+
+
+@contextmanager
+def _activate(context: PlanContext) -> Iterator[PlanContext]:
+    """
+    Makes `context` the active plan context without clearing its products on
+    exit, so they can be handed on to the context of the next plan in a chain.
+    """
+    token = _active_context.set(context)
+    try:
+        yield context
+    finally:
+        _active_context.reset(token)
+
+
+def _plan_cached(
+    part: Partition,
+    key: Hashable,
+    compute: Callable[[], Any],
+    update: Optional[Callable[[Any], Any]] = None,
+) -> Any:
+    """
+    Returns the intermediate product `key` for `part` from the active plan
+    context, or computes it without caching if no context is open for `part`.
+    `update`, if passed, adjusts the parent plan's product for the nodes
+    flipped since; see `PlanContext.get`.
+    """
+    context = _active_context.get()
+    if context is None or context.part is not part:
+        return compute()
+    return context.get(key, compute, update)
+
+
+def _scoped(key: Hashable, compute: Callable[[], Any]) -> Any:
+    """
+    Returns the product `key` from the active plan context, whichever plan it
+    belongs to, or computes it without caching if no context is open. For
+    products of data derived from the plan, like its dissolved geometries,
+    which scores receive in place of the partition.
+    """
+    context = _active_context.get()
+    if context is None:
+        return compute()
+    return context.get(key, compute)
+
+
+def _touched(part: Partition) -> Set:
+    """
+    Returns the districts that gained or lost nodes when `part` was made from
+    its parent.
+    """
+    return set(part.flows)
+
+
+def _same_districts(part: Partition) -> bool:
+    """
+    Whether `part` has the same district labels as its parent, i.e., whether
+    per-district products of the parent line up with those of `part`.
+    """
+    return part.parent.parts.keys() == part.parts.keys()
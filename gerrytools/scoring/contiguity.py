@@ -1,13 +1,110 @@
-from typing import Union
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence, Union
 
 import gerrychain
-from gerrychain.constraints import contiguous as ctgs
+import numpy as np
+import pandas as pd
+from gerrychain import Graph
+
+from .batch import NodeColumns, PlanBlock, _blocks, _node_columns
+
+
+class ContiguityReport(NamedTuple):
+    """
+    The contiguity of one plan.
+
+    Attributes:
+        contiguous (bool): Whether every district is connected.
+        components (dict): Maps each district to its number of connected
+            components.
+        stray_nodes (dict): Maps each discontiguous district to the nodes
+            outside its largest component.
+    """
+
+    contiguous: bool
+    components: Dict
+    stray_nodes: Dict[object, list]
+
+
+def _plan_block(P: gerrychain.Partition):
+    """
+    Returns `P` as a one-plan `PlanBlock`, with its district labels (which may
+    be strings) and the mask of its assigned districts.
+    """
+    columns = _node_columns(P.graph)
+    codes, labels = pd.factorize(
+        pd.Series([P.assignment[n] for n in columns.nodes]), sort=True
+    )
+    labels = labels.tolist()
+    districts = np.array([label != -1 for label in labels])
+    return PlanBlock(codes[None, :], columns), labels, districts
+
+
+def _report(
+    counts: np.ndarray,
+    stray: np.ndarray,
+    codes: np.ndarray,
+    labels: list,
+    districts: np.ndarray,
+    nodes: list,
+) -> ContiguityReport:
+    """
+    Builds the report of one plan from its row of `PlanBlock.components()`.
+    """
+    components = {
+        labels[j]: int(counts[j]) for j in np.flatnonzero(districts & (counts > 0))
+    }
+    stray_nodes = {
+        labels[j]: [nodes[i] for i in np.flatnonzero(stray & (codes == j))]
+        for j in np.flatnonzero(districts & (counts > 1))
+    }
+    return ContiguityReport(not stray_nodes, components, stray_nodes)
+
+
+def _contiguity(P: gerrychain.Partition) -> ContiguityReport:
+    block, labels, districts = _plan_block(P)
+    counts, stray = block.components()
+    return _report(
+        counts[0], stray[0], block.codes[0], labels, districts, block.columns.nodes
+    )
+
+
+def _contiguity_batch(block: PlanBlock) -> List[ContiguityReport]:
+    counts, stray = block.components()
+    labels, districts = block.labels.tolist(), block.districts
+    return [
+        _report(
+            counts[i],
+            stray[i],
+            block.codes[i],
+            labels,
+            districts[i],
+            block.columns.nodes,
+        )
+        for i in range(len(block))
+    ]
+
+
+def _district_components(P: gerrychain.Partition) -> Dict:
+    return _contiguity(P).components
+
+
+def _district_components_batch(block: PlanBlock) -> List[Dict]:
+    counts, _ = block.components()
+    return block.to_dicts(counts, block.districts)
+
+
+def _stray_nodes(P: gerrychain.Partition) -> Dict[object, list]:
+    return _contiguity(P).stray_nodes
+
+
+def _stray_nodes_batch(block: PlanBlock) -> List[Dict[object, list]]:
+    return [report.stray_nodes for report in _contiguity_batch(block)]
 
 
 def contiguous(P: gerrychain.Partition) -> bool:
     """
     Determines whether the districting plan defined by the partition is
-    contiguous.
+    contiguous. Unassigned nodes (in district `-1`) aren't considered.
 
     Args:
         P (Partition): GerryChain Partition object.
@@ -15,7 +112,34 @@ def contiguous(P: gerrychain.Partition) -> bool:
     Returns:
         Whether the districting plan defined by the partition is contiguous.
     """
-    return ctgs(P)
+    return _contiguity(P).contiguous
+
+
+def check_contiguity(
+    assignments: Union[np.ndarray, Iterable[Sequence[int]]],
+    graph: Graph,
+    block_size: int = 1000,
+) -> Iterator[ContiguityReport]:
+    """
+    Checks the contiguity of many plans at once, e.g. to validate an imported
+    ensemble. The adjacency of `graph` is read once, and the components of
+    every district of a block of plans are labelled in a single pass.
+
+    Args:
+        assignments (Union[np.ndarray, Iterable[Sequence[int]]]): A
+            (plans × nodes) integer assignment matrix, or an iterable of
+            assignment rows, with columns in the node order of `graph`. See
+            `assignment_matrix`.
+        graph (Graph): The dual graph the plans are drawn on.
+        block_size (int, optional): Number of plans checked together. Memory
+            use grows with `block_size` × edges. Defaults to 1000.
+
+    Returns:
+        A `ContiguityReport` for each plan, in order.
+    """
+    columns = NodeColumns(graph)
+    for assignment_block in _blocks(assignments, block_size):
+        yield from _contiguity_batch(PlanBlock(assignment_block, columns))
 
 
 def unassigned_units(P: gerrychain.Partition, raw: bool = False) -> Union[float, int]:
@@ -0,0 +1,380 @@
+import hashlib
+import pickle
+import sqlite3
+import threading
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+import pandas as pd
+from gerrychain import Graph, Partition
+
+from .batch import _node_columns
+from .types import Score
+
+Plan = Union[Partition, Mapping, np.ndarray, Sequence]
+
+
+def _canonical(values) -> Tuple[np.ndarray, list]:
+    """
+    Relabels an assignment by order of first appearance: the first district
+    met becomes 0, the next 1, and so on. Unassigned nodes (`-1` or missing)
+    stay `-1`. Returns the relabelled assignment and the original labels in
+    order of first appearance.
+    """
+    codes, labels = pd.factorize(values)
+    labels = labels.tolist()
+    assigned = np.array([label != -1 for label in labels], dtype=bool)
+    relabel = np.append(np.where(assigned, np.cumsum(assigned) - 1, -1), -1)
+    return relabel[codes], [label for label, a in zip(labels, assigned) if a]
+
+
+def _assignment(plan: Plan, graph: Optional[Graph] = None):
+    """
+    Returns the district of each node of `plan`, in the node order of its
+    graph. Arrays and sequences are taken to be in that order already.
+    """
+    if isinstance(plan, Partition):
+        graph = plan.graph
+    elif not isinstance(plan, Mapping):
+        return np.asarray(plan)
+    if graph is None:
+        raise ValueError("Hashing an assignment mapping requires its graph.")
+    assignment = plan.assignment if isinstance(plan, Partition) else plan
+    return pd.Series([assignment[n] for n in _node_columns(graph).nodes])
+
+
+def _digest(plan: Plan, graph: Optional[Graph] = None) -> Tuple[bytes, list]:
+    canonical, labels = _canonical(_assignment(plan, graph))
+    digest = hashlib.blake2b(canonical.astype(np.int32).tobytes(), digest_size=16)
+    return digest.digest(), labels
+
+
+def plan_hash(plan: Plan, graph: Optional[Graph] = None) -> str:
+    """
+    Returns a hash of a plan that doesn't depend on how its districts are
+    labelled: two plans that group the nodes into the same districts hash the
+    same, whatever the districts are called. Districts are relabelled in order
+    of first appearance along the graph's nodes before the assignment array is
+    hashed with BLAKE2b.
+
+    Args:
+        plan (Union[Partition, Mapping, np.ndarray, Sequence]): A partition, a
+            mapping from nodes to districts, or an assignment row with columns
+            in the node order of the graph (see `assignment_matrix`).
+        graph (Graph, optional): The dual graph; required for mappings.
+
+    Returns:
+        The hash, as a string of 32 hexadecimal digits.
+    """
+    return _digest(plan, graph)[0].hex()
+
+
+def unique_plans(plans: Iterable[Plan], graph: Optional[Graph] = None) -> Counter:
+    """
+    Counts the distinct plans of an ensemble, up to the labelling of their
+    districts, without scoring them.
+
+    Args:
+        plans (Iterable[Plan]): Partitions, assignment mappings, or the rows
+            of an assignment matrix.
+        graph (Graph, optional): The dual graph; required for mappings.
+
+    Returns:
+        A `Counter` mapping each distinct plan's `plan_hash` to the number of
+        times it occurs; its length is the number of unique plans.
+    """
+    return Counter(plan_hash(plan, graph) for plan in plans)
+
+
+class PlanMemo:
+    """
+    A bounded memo of plan summaries, keyed by plan hash. Holds at most
+    `maxsize` summaries, evicting the least recently used. Summaries are kept
+    in memory, or, when a `path` is passed, pickled to a SQLite database there,
+    so the memo can be larger than memory and reused by later runs on the same
+    ensemble.
+
+    Entries are keyed by the plan and the names of the scores it was summarized
+    by, so a memo shared by runs with different scores doesn't mix them up;
+    runs that use the same score names with different arguments shouldn't
+    share a memo.
+    """
+
+    def __init__(self, maxsize: int = 100_000, path: Optional[str] = None):
+        """
+        Args:
+            maxsize (int, optional): Most summaries to keep. Defaults to 100,000.
+            path (str, optional): Where to keep the summaries on disk. Defaults
+                to keeping them in memory.
+        """
+        if maxsize < 1:
+            raise ValueError("A plan memo must hold at least one summary.")
+        self.maxsize = maxsize
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._db = None
+        self._clock = 0
+        self._size = 0
+        self._pending = 0
+        if path is not None:
+            # Plans may be looked up from the thread feeding a process pool.
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS summaries "
+                "(key BLOB PRIMARY KEY, entry BLOB, used INTEGER)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS lru ON summaries (used)")
+            self._clock, self._size = self._db.execute(
+                "SELECT COALESCE(MAX(used), 0), COUNT(*) FROM summaries"
+            ).fetchone()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries) if self._db is None else self._size
+
+    def get(self, key: bytes) -> Optional[Tuple[list, dict]]:
+        """
+        Returns the district labels and summary stored under `key`, or `None`.
+        """
+        with self._lock:
+            if self._db is None:
+                if key not in self._entries:
+                    return None
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+            row = self._db.execute(
+                "SELECT entry FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._clock += 1
+            self._db.execute(
+                "UPDATE summaries SET used = ? WHERE key = ?", (self._clock, key)
+            )
+            return pickle.loads(row[0])
+
+    def put(self, key: bytes, labels: list, summary: dict):
+        """
+        Stores the summary of the plan with hash `key` and district `labels`.
+        """
+        with self._lock:
+            if self._db is None:
+                self._entries[key] = (labels, summary)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                return
+
+            self._clock += 1
+            exists = self._db.execute(
+                "SELECT 1 FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)",
+                (key, pickle.dumps((labels, summary)), self._clock),
+            )
+            self._size += exists is None
+            if self._size > self.maxsize:
+                self._db.execute(
+                    "DELETE FROM summaries WHERE key IN (SELECT key FROM summaries "
+                    "ORDER BY used LIMIT ?)",
+                    (self._size - self.maxsize,),
+                )
+                self._size = self.maxsize
+
+            # The memo is a cache, so losing the last few entries in a crash
+            # only costs rescoring them.
+            self._pending += 1
+            if self._pending >= 1000:
+                self._db.commit()
+                self._pending = 0
+
+    def close(self):
+        """
+        Saves and closes the database of an on-disk memo.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+
+class _HyperLogLog:
+    """
+    A HyperLogLog sketch: estimates how many distinct hashes it's been given
+    in a fixed `2 ** precision` bytes, whatever the number, to within about
+    `1.04 / sqrt(2 ** precision)` (0.8% by default). Counts below
+    `2.5 * 2 ** precision` are estimated by linear counting instead, which is
+    nearly exact for small counts.
+    """
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, digest: bytes):
+        # Plan digests are uniformly distributed, so their first 64 bits serve
+        # as the hash: the top bits pick a register, which keeps the longest
+        # run of leading zeros seen in the rest.
+        value = int.from_bytes(digest[:8], "big")
+        bits = 64 - self.precision
+        register = value >> bits
+        rank = bits - (value & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[register]:
+            self.registers[register] = rank
+
+    def __len__(self) -> int:
+        registers = np.frombuffer(self.registers, dtype=np.uint8)
+        m = len(registers)
+        zeros = int(np.count_nonzero(registers == 0))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.exp2(-registers.astype(float)).sum()
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+@dataclass
+class DedupeStats:
+    """
+    Counts of the repeated plans found while deduplicating an ensemble. Pass
+    one instance to `summarize_many` with `dedupe` to accumulate them.
+
+    Attributes:
+        plans (int): Plans seen.
+        repeats (int): Plans identical to the plan just before them, folded
+            into its row's multiplicity.
+        memo_hits (int): Plans whose summary was taken from the memo.
+        scored (int): Plans that had to be scored.
+        sketch: A fixed-size HyperLogLog sketch of the distinct plans' hashes,
+            from which `unique` is estimated.
+    """
+
+    plans: int = 0
+    repeats: int = 0
+    memo_hits: int = 0
+    scored: int = 0
+    sketch: _HyperLogLog = field(default_factory=_HyperLogLog, repr=False)
+
+    @property
+    def unique(self) -> int:
+        """
+        Estimated number of distinct plans seen, up to district labels, to
+        within about 1%.
+        """
+        return len(self.sketch)
+
+
+class _Row:
+    __slots__ = ("first", "last", "key", "labels", "summary", "multiplicity")
+
+    def __init__(self, index: int, key: bytes, labels: list, summary=None):
+        self.first = self.last = index
+        self.key = key
+        self.labels = labels
+        self.summary = summary
+        self.multiplicity = 1
+
+
+class _Deduplicator:
+    """
+    Folds runs of identical plans into one output row with a multiplicity, and
+    takes the summaries of plans seen earlier from a memo. `tag` is called on
+    each plan as it's drawn and says whether it needs scoring; `rows` matches
+    the summaries of the plans that did against their rows, in order.
+
+    Plans count as identical when they have the same hash and the same labels:
+    district-wide scores are keyed by district label, so a plan that's only the
+    same as another after relabelling its districts is scored again.
+    """
+
+    def __init__(
+        self, scores: List[Score], memo: PlanMemo, stats: Optional[DedupeStats]
+    ):
+        self.memo = memo
+        self.stats = stats
+        names = "\0".join(score.name for score in scores).encode()
+        self._scores = hashlib.blake2b(names, digest_size=8).digest()
+        self._rows = deque()
+        self._scoring = deque()
+        self._last = None
+        self._last_part = None
+
+    def tag(self, index: int, part: Plan) -> bool:
+        stats = self.stats
+        if stats is not None:
+            stats.plans += 1
+        last = self._last
+
+        # A chain that rejects a proposal yields the same plan again, so a
+        # repeat of the very same object needn't be hashed.
+        if last is not None and part is self._last_part:
+            return self._repeat(last, index)
+
+        digest, labels = _digest(part)
+        if stats is not None:
+            stats.sketch.add(digest)
+        self._last_part = part
+        if last is not None and last.key[:16] == digest and last.labels == labels:
+            return self._repeat(last, index)
+
+        key = digest + self._scores
+        row = _Row(index, key, labels)
+        entry = self.memo.get(key)
+        needs_scoring = entry is None or entry[0] != labels
+        if needs_scoring:
+            self._scoring.append(row)
+        else:
+            row.summary = entry[1]
+        if stats is not None:
+            stats.scored += needs_scoring
+            stats.memo_hits += not needs_scoring
+        self._rows.append(row)
+        self._last = row
+        return needs_scoring
+
+    def _repeat(self, last: _Row, index: int) -> bool:
+        last.multiplicity += 1
+        last.last = index
+        if self.stats is not None:
+            self.stats.repeats += 1
+        return False
+
+    def rows(self, summaries: Iterable[dict]) -> Iterator[Tuple[int, int, dict]]:
+        """
+        Yields the index of the first and last plan of each row, and the row's
+        summary with its `"multiplicity"`. A row is only yielded once the plan
+        after its run has been drawn, or every plan has.
+        """
+        for summary in summaries:
+            row = self._scoring.popleft()
+            row.summary = summary
+            self.memo.put(row.key, row.labels, summary)
+            yield from self._ready(final=False)
+        yield from self._ready(final=True)
+
+    def _ready(self, final: bool) -> Iterator[Tuple[int, int, dict]]:
+        rows = self._rows
+        while (
+            rows
+            and rows[0].summary is not None
+            and (final or rows[0] is not self._last)
+        ):
+            row = rows.popleft()
+            summary = dict(row.summary)
+            summary["multiplicity"] = row.multiplicity
+            yield row.first, row.last, summary
@@ -1,5 +1,6 @@
-from typing import Iterable
+from typing import Iterable, List
 
+import numpy as np
 from gerrychain import Partition
 from gerrychain.updaters import Tally
 
@@ -39,3 +40,37 @@ def _max_deviation(part: Partition, totpop_col: str, pct: bool = False) -> Numer
     ideal_population = sum(totpop_counts.values()) / len(part)
     max_deviation = max([abs(pop - ideal_population) for pop in totpop_counts.values()])
     return max_deviation / ideal_population if pct else max_deviation
+
+
+def _tally_pop_batch(block, pop_col: str) -> List[DistrictWideScoreValue]:
+    return block.to_dicts(block.tally(pop_col), block.present)
+
+
+def _pop_shares_array(block, subpop_col: str, totpop_col: str) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return block.tally(subpop_col) / block.tally(totpop_col)
+
+
+def _pop_shares_batch(
+    block, subpop_col: str, totpop_col: str
+) -> List[DistrictWideScoreValue]:
+    return block.to_dicts(
+        _pop_shares_array(block, subpop_col, totpop_col), block.present
+    )
+
+
+def _gingles_districts_batch(
+    block, subpop_col: str, totpop_col: str, threshold: float = 0.5
+) -> List[PlanWideScoreValue]:
+    shares = _pop_shares_array(block, subpop_col, totpop_col)
+    return ((shares >= threshold) & block.present).sum(axis=1).tolist()
+
+
+def _max_deviation_batch(block, totpop_col: str, pct: bool = False) -> List[Numeric]:
+    totpop_counts = block.tally(totpop_col)
+    ideal_population = totpop_counts.sum(axis=1) / block.present.sum(axis=1)
+    deviations = np.where(
+        block.present, np.abs(totpop_counts - ideal_population[:, None]), -np.inf
+    )
+    max_deviation = deviations.max(axis=1)
+    return (max_deviation / ideal_population if pct else max_deviation).tolist()
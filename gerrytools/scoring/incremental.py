@@ -0,0 +1,133 @@
+from typing import Dict, Iterable, Mapping, Optional
+
+from geopandas import GeoDataFrame
+from gerrychain import Partition
+
+from .context import CacheStats, PlanContext, _activate
+from .profiling import Profiler
+from .types import Score, ScoreValue
+
+
+class IncrementalSummarizer:
+    """
+    Summarizes the plans of a Markov chain one step at a time. Each plan is
+    scored as the previous plan with some nodes flipped, so GerryChain's
+    updaters (tallies, cut edges, elections) update from the previous plan,
+    and the intermediate products shared between scores (vote shares, unit
+    splits, district areas and perimeters) are carried over and updated for
+    the districts that changed rather than rebuilt. A step that changes a
+    handful of nodes costs time proportional to the nodes changed, not to the
+    size of the graph. Dissolved scores are still computed from scratch.
+
+    Example:
+
+        summarizer = IncrementalSummarizer(scores)
+        for part in chain:
+            summary = summarizer.step(part)
+
+    Attributes:
+        part (Partition): The most recently scored plan.
+        summary (dict): The summary of `part`.
+    """
+
+    def __init__(
+        self,
+        scores: Iterable[Score],
+        gdf: Optional[GeoDataFrame] = None,
+        join_on: Optional[str] = None,
+        stats: Optional[CacheStats] = None,
+        profiler: Optional[Profiler] = None,
+    ):
+        """
+        Args:
+            scores (Iterable[Score]): Which scores to include in the summaries.
+            gdf (GeoDataFrame, optional): Geometries of nodes in the dual graph,
+                for dissolved scores. See `summarize`.
+            join_on (str, optional): Field used to join the graph to `gdf`.
+            stats (CacheStats, optional): Accumulates the hits, misses, and
+                updates of shared intermediate products over every step.
+            profiler (Profiler, optional): Records the time taken by each score
+                and shared product over every step.
+        """
+        self.scores = list(scores)
+        self.gdf = gdf
+        self.join_on = join_on
+        self.stats = stats
+        self.profiler = profiler
+        self.part = None
+        self.summary = None
+        self._context = None
+        self._owned = False
+
+    def step(self, part: Partition) -> Dict[str, ScoreValue]:
+        """
+        Summarizes `part`, the next plan of the chain. If `part` was made by
+        flipping nodes of the previous plan (as GerryChain's `MarkovChain`
+        does), its flips are used as-is; otherwise, the nodes whose assignment
+        differs from the previous plan are flipped.
+
+        Args:
+            part (Partition): The next plan.
+
+        Returns:
+            A dictionary that maps score names to ScoreValues.
+        """
+        if self.part is None or part.parent is self.part:
+            return self._score(part)
+        if part is self.part:
+            return dict(self.summary)
+
+        previous = self.part.assignment
+        return self.flip(
+            {node: d for node, d in part.assignment.items() if previous[node] != d}
+        )
+
+    def flip(self, flips: Mapping) -> Dict[str, ScoreValue]:
+        """
+        Summarizes the plan made by reassigning the nodes of the previous plan
+        in `flips`.
+
+        Args:
+            flips (Mapping): Maps nodes to their new districts.
+
+        Raises:
+            ValueError: If no plan has been scored yet.
+
+        Returns:
+            A dictionary that maps score names to ScoreValues.
+        """
+        if self.part is None:
+            raise ValueError(
+                "No plan to flip from; score the first plan of the chain with step()."
+            )
+        if not flips:
+            return dict(self.summary)
+        return self._score(self.part.flip(flips), owned=True)
+
+    def _score(self, part: Partition, owned: bool = False) -> Dict[str, ScoreValue]:
+        # Imported here to avoid a circular import with `scores`.
+        from .scores import summarize
+
+        # `part` only needs its parent's updater values, not the parent's own
+        # parent; dropping the link keeps the chain from holding every plan.
+        # Plans passed to `step` belong to the caller and are left as they are
+        # (GerryChain's `MarkovChain` drops the link itself).
+        if self._owned:
+            self.part.parent = None
+
+        context = PlanContext(part, self.stats, parent=self._context)
+        with _activate(context):
+            summary = summarize(
+                part,
+                self.scores,
+                gdf=self.gdf,
+                join_on=self.join_on,
+                profiler=self.profiler,
+            )
+
+        # Products the new plan didn't take over are no longer needed.
+        context.parent = None
+
+        self.part, self.summary, self._context = part, summary, context
+        self._owned = owned
+        return dict(summary)
@@ -0,0 +1,342 @@
+import mmap
+import os
+import pickle
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import shapely
+from geopandas import GeoDataFrame, GeoSeries
+from gerrychain import Graph, Partition
+from gerrychain.graph import FrozenGraph
+from gerrychain.updaters import Election
+
+from .batch import _node_columns
+from .types import Score, ScoreValue
+
+# Scoring inputs attached by each worker process; see `_attach`.
+_WORKER_STATE = {}
+
+
+# Alignment of the buffers in the shared payload file.
+_ALIGN = 64
+
+
+class _SharedPayload:
+    """
+    Pickles the inputs every worker needs (the graph, updaters, geometries and
+    scores) into a single temporary file, so they're pickled once rather than
+    once per worker, and nothing but assignments crosses the process boundary
+    per task. The data buffers of NumPy arrays (and so of pandas columns) are
+    written out of band, and each worker maps them copy-on-write rather than
+    copying them, so every worker reads the same pages. Everything else is
+    unpickled into a copy per worker, so the graph and geometries are sent as
+    `_PackedGraph` and `_PackedGeometries`, whose bulk is arrays.
+
+    Attributes:
+        path (str): The temporary file.
+        layout (list): The `(offset, size)` of each out-of-band buffer in the
+            file, followed by that of the pickle itself.
+    """
+
+    def __init__(self, payload: dict):
+        buffers = []
+        data = pickle.dumps(payload, protocol=5, buffer_callback=buffers.append)
+        handle, self.path = tempfile.mkstemp(suffix=".gerrytools")
+        self.layout = []
+        try:
+            with os.fdopen(handle, "wb") as f:
+                for buffer in [*(b.raw() for b in buffers), memoryview(data)]:
+                    f.write(bytes(-f.tell() % _ALIGN))
+                    self.layout.append((f.tell(), buffer.nbytes))
+                    f.write(buffer)
+        except BaseException:
+            os.remove(self.path)
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        os.remove(self.path)
+
+
+# Python types of attributes stored as NumPy columns, and their dtypes.
+_DTYPES = {bool: np.bool_, int: np.int64, float: np.float64}
+
+
+def _split_columns(records: List[dict]) -> Tuple[Dict[str, np.ndarray], List[dict]]:
+    """
+    Splits the attribute dictionaries of a graph's nodes (or edges) into NumPy
+    columns, for the attributes every record has as a number of one Python
+    type, and the remaining attributes of each record.
+    """
+    columns = {}
+    for key in records[0] if records else {}:
+        values = [record.get(key) for record in records]
+        kinds = {type(value) for value in values}
+        kind = kinds.pop()
+        if kinds or kind not in _DTYPES:
+            continue
+        try:
+            columns[key] = np.array(values, dtype=_DTYPES[kind])
+        except OverflowError:
+            continue
+    rest = [{k: v for k, v in r.items() if k not in columns} for r in records]
+    return columns, rest
+
+
+def _join_columns(columns: Dict[str, np.ndarray], rest: List[dict]) -> List[dict]:
+    lists = {key: column.tolist() for key, column in columns.items()}
+    return [
+        {**{key: values[i] for key, values in lists.items()}, **attributes}
+        for i, attributes in enumerate(rest)
+    ]
+
+
+class _PackedGraph:
+    """
+    A dual graph taken apart for sending to workers: its edges as arrays of
+    node positions, and the node and edge attributes that are numbers as
+    columns, so they travel out of band. `unpack` rebuilds the graph, and
+    seeds its `NodeColumns` with the shared columns.
+    """
+
+    def __init__(self, graph: Graph):
+        graph = graph.graph if isinstance(graph, FrozenGraph) else graph
+        self.graph_class = type(graph)
+        self.attributes = graph.graph
+        self.nodes = list(graph.nodes)
+        self.node_columns, self.node_rest = _split_columns(
+            [graph.nodes[n] for n in self.nodes]
+        )
+        position = {n: i for i, n in enumerate(self.nodes)}
+        edges = list(graph.edges)
+        self.edges = (
+            np.array([position[u] for u, _ in edges], dtype=np.int64),
+            np.array([position[v] for _, v in edges], dtype=np.int64),
+        )
+        self.edge_columns, self.edge_rest = _split_columns(
+            [graph.edges[e] for e in edges]
+        )
+
+    def unpack(self) -> Graph:
+        graph = self.graph_class()
+        graph.graph.update(self.attributes)
+        nodes = self.nodes
+        graph.add_nodes_from(
+            zip(nodes, _join_columns(self.node_columns, self.node_rest))
+        )
+        u, v = self.edges
+        graph.add_edges_from(
+            (nodes[a], nodes[b], attributes)
+            for a, b, attributes in zip(
+                u.tolist(),
+                v.tolist(),
+                _join_columns(self.edge_columns, self.edge_rest),
+            )
+        )
+
+        # Array-based scores read the shared columns rather than copies pulled
+        # back out of the rebuilt graph.
+        columns = _node_columns(graph)
+        columns._columns.update(self.node_columns)
+        return graph
+
+
+class _PackedGeometries:
+    """
+    A GeoDataFrame taken apart for sending to workers: its other columns as a
+    DataFrame, and its geometries as ragged coordinate arrays, or as WKB when
+    they're of mixed types (which ragged arrays would coerce). `unpack`
+    rebuilds it.
+    """
+
+    def __init__(self, gdf: GeoDataFrame):
+        geometry = gdf.geometry
+        self.name = geometry.name
+        self.crs = gdf.crs
+        self.frame = pd.DataFrame(gdf.drop(columns=self.name))
+        values = geometry.to_numpy()
+        self.ragged = None
+        self.wkb = None
+        if len(np.unique(shapely.get_type_id(values))) == 1:
+            try:
+                self.ragged = shapely.to_ragged_array(values)
+            except ValueError:
+                pass
+        if self.ragged is None:
+            self.wkb = shapely.to_wkb(values)
+
+    def unpack(self) -> GeoDataFrame:
+        if self.ragged is not None:
+            values = shapely.from_ragged_array(*self.ragged)
+        else:
+            values = shapely.from_wkb(self.wkb)
+        frame = self.frame.copy(deep=False)
+        frame[self.name] = GeoSeries(values, index=frame.index, crs=self.crs)
+        return GeoDataFrame(frame, geometry=self.name, crs=self.crs)
+
+
+def _pack_updaters(updaters: dict) -> dict:
+    """
+    GerryChain `Election` updaters close over local functions and can't be
+    pickled, so they're shipped as their constructor arguments instead.
+    """
+    return {
+        name: (
+            (Election, (u.name, u.parties_to_columns, u.alias))
+            if isinstance(u, Election)
+            else (None, u)
+        )
+        for name, u in updaters.items()
+    }
+
+
+def _unpack_updaters(packed: dict) -> dict:
+    return {
+        name: cls(*value) if cls is not None else value
+        for name, (cls, value) in packed.items()
+    }
+
+
+def _attach(path: str, layout: List[Tuple[int, int]]):
+    """
+    Worker initializer: map the shared payload into memory and unpickle it,
+    with NumPy arrays backed by the mapping. The mapping is copy-on-write, so
+    arrays stay writable, and it stays open as long as they do.
+    """
+    with open(path, "rb") as f:
+        view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+    *buffers, data = [view[offset : offset + size] for offset, size in layout]
+    _WORKER_STATE.update(pickle.loads(data, buffers=buffers))
+    _WORKER_STATE["updaters"] = _unpack_updaters(_WORKER_STATE["updaters"])
+
+
+def _unpacked(name: str) -> Any:
+    """
+    Returns the attached input `name`, rebuilding it in this worker the first
+    time it's asked for if it was sent packed.
+    """
+    value = _WORKER_STATE[name]
+    if isinstance(value, (_PackedGraph, _PackedGeometries)):
+        value = _WORKER_STATE[name] = value.unpack()
+    return value
+
+
+def _score_chunk(chunk: List[list]) -> List[Dict[str, ScoreValue]]:
+    """
+    Worker task: rebuild each plan in `chunk` against the attached graph and
+    summarize it.
+    """
+    # Imported here to avoid a circular import with `scores`.
+    from .scores import summarize
+
+    state = _WORKER_STATE
+    _unpacked("graph")
+    # Geometries are only rebuilt if a score dissolves them.
+    if any(score.dissolved for score in state["scores"]):
+        _unpacked("gdf")
+    return [
+        summarize(
+            state["partition_class"](
+                state["graph"], dict(zip(state["nodes"], row)), state["updaters"]
+            ),
+            scores=state["scores"],
+            gdf=state["gdf"] if isinstance(state["gdf"], GeoDataFrame) else None,
+            join_on=state["join_on"],
+        )
+        for row in chunk
+    ]
+
+
+def _chunks(
+    parts: Iterator[Partition], nodes: list, chunksize: int
+) -> Iterator[List[list]]:
+    while True:
+        chunk = [
+            [part.assignment[n] for n in nodes] for part in islice(parts, chunksize)
+        ]
+        if not chunk:
+            return
+        yield chunk
+
+
+def summarize_parallel(
+    parts: Iterable[Partition],
+    scores: Iterable[Score],
+    gdf: Optional[GeoDataFrame] = None,
+    join_on: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+) -> Iterator[Dict[str, ScoreValue]]:
+    """
+    Summarize the given partitions across a pool of worker processes, yielding
+    summaries in the same order as `parts`.
+
+    The graph, updaters, and geometries are taken from the first partition,
+    pickled once to a temporary file, and loaded by each worker when it starts;
+    each task afterwards carries only the assignments of `chunksize` plans.
+    The graph's edges and numeric node and edge attributes, the columns of
+    `gdf` and its geometries' coordinates are stored as arrays, memory-mapped
+    from the file and shared by the workers; each worker rebuilds the graph,
+    and the geometries if a score dissolves them, from these on first use.
+    Other Python objects are copied into each worker. All partitions must share
+    the first partition's graph and updaters, and every score and updater must
+    be picklable (so, no lambdas); `Election` updaters are rebuilt in each
+    worker from their columns.
+
+    Args:
+        parts (Iterable[Partition]): The plans to summarize.
+        scores (Iterable[Score]): Which scores to include in the summaries.
+        gdf (GeoDataFrame, optional): Geometries of nodes in the dual graph, for
+            dissolved scores. See `summarize`.
+        join_on (str, optional): Field used to join the graph to `gdf`.
+        workers (int, optional): Number of worker processes. Defaults to the
+            number of CPUs.
+        chunksize (int, optional): Number of plans sent to a worker per task.
+            Defaults to 64.
+
+    Yields:
+        Dictionaries that map score names to ScoreValues, one per plan, in order.
+    """
+    parts = iter(parts)
+    try:
+        first = next(parts)
+    except StopIteration:
+        return
+
+    graph = _PackedGraph(first.graph)
+    nodes = graph.nodes
+    payload = {
+        "graph": graph,
+        "nodes": nodes,
+        "updaters": _pack_updaters(first.updaters),
+        "partition_class": type(first),
+        "scores": list(scores),
+        "gdf": _PackedGeometries(gdf) if gdf is not None else None,
+        "join_on": join_on,
+    }
+    workers = workers or os.cpu_count()
+
+    with _SharedPayload(payload) as shared, ProcessPoolExecutor(
+        max_workers=workers, initializer=_attach, initargs=(shared.path, shared.layout)
+    ) as executor:
+        # Keep a bounded number of chunks in flight so that arbitrarily long
+        # ensembles aren't read into memory ahead of the workers.
+        pending = deque()
+        for chunk in _chunks(_prepend(first, parts), nodes, chunksize):
+            pending.append(executor.submit(_score_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _prepend(first: Partition, rest: Iterator[Partition]) -> Iterator[Partition]:
+    yield first
+    yield from rest
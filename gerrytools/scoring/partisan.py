@@ -1,31 +1,129 @@
-from functools import cache
-from typing import Iterable, Tuple
+from typing import Iterable, List, Sequence, Tuple
 
 import numpy as np
 from gerrychain import Partition
 
+from .context import _plan_cached, _same_districts, _touched
 from .types import DistrictWideScoreValue, Numeric, PlanWideScoreValue, ScoreValue
 
 
-@cache
 def _election_results(part: Partition, election_cols: Tuple[str], party: str):
-    return np.array(
-        [
-            np.array(
-                [
-                    part[e].percent(party, d)
-                    for d in sorted(part.parts.keys())
-                    if d != -1
-                ]
-            )
-            for e in election_cols
-        ]
+    """
+    The (elections × districts) matrix of `party`'s vote shares, computed once
+    per plan and shared by the partisan scores through the plan context. Along
+    a chain, only the columns of districts that changed are recomputed.
+    """
+    return _plan_cached(
+        part,
+        ("election_results", election_cols, party),
+        lambda: np.array(
+            [
+                np.array(
+                    [
+                        part[e].percent(party, d)
+                        for d in sorted(part.parts.keys())
+                        if d != -1
+                    ]
+                )
+                for e in election_cols
+            ]
+        ),
+        lambda previous: _update_election_results(previous, part, election_cols, party),
     )
 
 
-@cache
+def _update_election_results(
+    results: np.ndarray, part: Partition, election_cols: Tuple[str], party: str
+) -> np.ndarray:
+    """
+    Updates the parent plan's vote-share matrix for the districts of `part`
+    that gained or lost nodes.
+    """
+    districts = [d for d in sorted(part.parts.keys()) if d != -1]
+    if not _same_districts(part):
+        results = np.empty((len(election_cols), len(districts)))
+        touched = set(districts)
+    else:
+        touched = _touched(part)
+
+    for j, d in enumerate(districts):
+        if d in touched:
+            for i, e in enumerate(election_cols):
+                results[i, j] = part[e].percent(party, d)
+    return results
+
+
 def _election_stability(part: Partition, election_cols: Tuple[str], party: str):
-    return (_election_results(part, election_cols, party) > 0.5).sum(axis=0)
+    return _plan_cached(
+        part,
+        ("election_stability", election_cols, party),
+        lambda: (_election_results(part, election_cols, party) > 0.5).sum(axis=0),
+    )
+
+
+def _vote_tensor(
+    part: Partition, election_cols: Tuple[str]
+) -> Tuple[np.ndarray, List[list]]:
+    """
+    The (1 × elections × districts × parties) tensor of `part`'s vote totals,
+    read from its election updaters once per plan and shared by the partisan
+    scores through the plan context, with the parties of each election.
+    Elections with fewer parties than the widest are padded with zero votes,
+    as in `PlanBlock.votes`. Along a chain, only the districts that changed
+    are re-read.
+    """
+    return _plan_cached(
+        part,
+        ("vote_tensor", election_cols),
+        lambda: _tally_votes(part, election_cols),
+        lambda previous: _update_vote_tensor(previous, part, election_cols),
+    )
+
+
+def _tally_votes(part: Partition, election_cols: Tuple[str]):
+    parties = [list(part[e].election.parties) for e in election_cols]
+    districts = sorted(part.parts.keys())
+    votes = np.zeros(
+        (1, len(election_cols), len(districts), max(len(p) for p in parties))
+    )
+    _read_votes(votes, part, election_cols, parties, districts, set(districts))
+    return votes, parties
+
+
+def _read_votes(votes, part, election_cols, parties, districts, touched):
+    for i, e in enumerate(election_cols):
+        totals = part[e].totals_for_party
+        for k, p in enumerate(parties[i]):
+            counts = totals[p]
+            for j, d in enumerate(districts):
+                if d in touched:
+                    votes[0, i, j, k] = counts[d]
+
+
+def _update_vote_tensor(tensor, part: Partition, election_cols: Tuple[str]):
+    if not _same_districts(part):
+        return _tally_votes(part, election_cols)
+    votes, parties = tensor
+    districts = sorted(part.parts.keys())
+    _read_votes(votes, part, election_cols, parties, districts, _touched(part))
+    return votes, parties
+
+
+class _PlanVotes:
+    """
+    A single plan, viewed as a one-plan `PlanBlock` so the batch kernels can
+    score every election of it at once from its vote tensor.
+    """
+
+    def __init__(self, part: Partition):
+        self.part = part
+        labels = sorted(part.parts.keys())
+        self.labels = np.array(labels)
+        self.present = np.ones((1, len(labels)), dtype=bool)
+        self.districts = np.array([[d != -1 for d in labels]])
+
+    def votes(self, election_cols: Sequence[str]) -> Tuple[np.ndarray, List[list]]:
+        return _vote_tensor(self.part, tuple(election_cols))
 
 
 def _competitive_contests(
@@ -81,93 +179,322 @@ def _aggregate_seats(
 def _seats(
     part: Partition, election_cols: Iterable[str], party: str, mean: bool = False
 ) -> ScoreValue:
-    result = {
-        e: sum([part[e].won(party, d) for d in part.parts.keys() if d != -1])
-        for e in election_cols
-    }
-    return float(np.mean(list(result.values()))) if mean else result
+    return _seats_batch(_PlanVotes(part), list(election_cols), party, mean)[0]
 
 
 def _responsive_proportionality(
     part: Partition, election_cols: Iterable[str], party: str
 ) -> PlanWideScoreValue:
-    result = [
-        (part[e].seats(party) / len(part)) - (part[e].percent(party))
-        for e in election_cols
-    ]
-    return float(np.mean(result))
+    return _responsive_proportionality_batch(
+        _PlanVotes(part), list(election_cols), party
+    )[0]
 
 
 def _stable_proportionality(
     part: Partition, election_cols: Iterable[str], party: str
 ) -> PlanWideScoreValue:
-    result = [
-        abs((part[e].seats(party) / len(part)) - part[e].percent(party))
-        for e in election_cols
+    return _stable_proportionality_batch(_PlanVotes(part), list(election_cols), party)[
+        0
     ]
-    return float(np.mean(result))
 
 
 def _efficiency_gap(
     part: Partition, election_cols: Iterable[str], mean: bool = False
 ) -> ScoreValue:
-    result = {e: part[e].efficiency_gap() for e in election_cols}
-    return float(np.mean(list(result.values()))) if mean else result
+    return _efficiency_gap_batch(_PlanVotes(part), list(election_cols), mean)[0]
 
 
 def _simplified_efficiency_gap(
     part: Partition, election_cols: Iterable[str], party: str, mean: bool = False
 ) -> ScoreValue:
-    result = {}
-    for e in election_cols:
-        V = part[e].percent(party)
-        S = part[e].seats(party) / len(part)
-        result[e] = S + 0.5 - 2 * V
-    return float(np.mean(list(result.values()))) if mean else result
+    return _simplified_efficiency_gap_batch(
+        _PlanVotes(part), list(election_cols), party, mean
+    )[0]
 
 
 def _mean_median(
     part: Partition, election_cols: Iterable[str], mean: bool = False
 ) -> ScoreValue:
-    result = {e: part[e].mean_median() for e in election_cols}
-    return float(np.mean(list(result.values()))) if mean else result
+    return _mean_median_batch(_PlanVotes(part), list(election_cols), mean)[0]
 
 
 def _partisan_bias(
     part: Partition, election_cols: Iterable[str], mean: bool = False
 ) -> ScoreValue:
-    result = {e: part[e].partisan_bias() for e in election_cols}
-    return float(np.mean(list(result.values()))) if mean else result
+    return _partisan_bias_batch(_PlanVotes(part), list(election_cols), mean)[0]
 
 
 def _partisan_gini(
     part: Partition, election_cols: Iterable[str], mean: bool = False
 ) -> ScoreValue:
-    result = {e: part[e].partisan_gini() for e in election_cols}
-    return float(np.mean(list(result.values()))) if mean else result
+    return _partisan_gini_batch(_PlanVotes(part), list(election_cols), mean)[0]
 
 
-def _eguia_election(
-    part: Partition, e: str, party: str, county_part: Partition, totpop_col: str
+def _eguia_ideal(
+    county_part: Partition, e: str, party: str, totpop_col: str
 ) -> Numeric:
-    seat_share = part[e].seats(party) / len(part.parts)
     counties = county_part.parts
     county_results = np.array([county_part[e].won(party, c) for c in counties])
     county_pops = np.array([county_part[totpop_col][c] for c in counties])
-    ideal = np.dot(county_results, county_pops) / county_pops.sum()
-    return float(seat_share - ideal)
+    return np.dot(county_results, county_pops) / county_pops.sum()
+
+
+def _eguia_ideals(
+    county_part: Partition, election_cols: Iterable[str], party: str, totpop_col: str
+) -> np.ndarray:
+    """
+    The population-weighted share of counties `party` wins in each election:
+    the part of the Eguia metric that doesn't depend on the plan, computed
+    once when the score is made.
+    """
+    return np.array(
+        [_eguia_ideal(county_part, e, party, totpop_col) for e in election_cols]
+    )
 
 
 def _eguia(
     part: Partition,
     election_cols: Iterable[str],
     party: str,
-    county_part: Partition,
-    totpop_col: str,
+    ideals: np.ndarray,
     mean: bool = False,
 ) -> ScoreValue:
-    result = {
-        e: _eguia_election(part, e, party, county_part, totpop_col)
-        for e in election_cols
-    }
-    return float(np.mean(list(result.values()))) if mean else result
+    return _eguia_batch(_PlanVotes(part), list(election_cols), party, ideals, mean)[0]
+
+
+def _party_index(parties: Sequence[Sequence[str]], party: str) -> np.ndarray:
+    return np.array([list(p).index(party) for p in parties])
+
+
+def _party_votes(votes: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """
+    Selects, for each election, the votes of the party at `index` from a
+    (plans × elections × districts × parties) vote tensor.
+    """
+    index = np.broadcast_to(index[None, :, None, None], votes.shape[:-1] + (1,))
+    return np.take_along_axis(votes, index, axis=-1)[..., 0]
+
+
+def _percents(votes: np.ndarray, index: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return _party_votes(votes, index) / votes.sum(axis=-1)
+
+
+def _won(votes: np.ndarray, index: np.ndarray) -> np.ndarray:
+    party_votes = _party_votes(votes, index)
+    opponents = votes.copy()
+    np.put_along_axis(
+        opponents,
+        np.broadcast_to(index[None, :, None, None], votes.shape[:-1] + (1,)),
+        -np.inf,
+        axis=-1,
+    )
+    return party_votes > opponents.max(axis=-1)
+
+
+def _overall_percent(votes: np.ndarray, index: np.ndarray, mask: np.ndarray):
+    m = mask[:, None, :]
+    return (_party_votes(votes, index) * m).sum(axis=-1) / (votes.sum(axis=-1) * m).sum(
+        axis=-1
+    )
+
+
+def _seat_share(votes: np.ndarray, index: np.ndarray, mask: np.ndarray):
+    return (_won(votes, index) & mask[:, None, :]).sum(axis=-1) / mask.sum(axis=-1)[
+        :, None
+    ]
+
+
+def _by_election(
+    values: np.ndarray, election_cols: Sequence[str], mean: bool
+) -> List[ScoreValue]:
+    """
+    Converts a (plans × elections) array into per-plan ElectionWideScoreValues,
+    or their means over elections.
+    """
+    if mean:
+        return values.mean(axis=1).tolist()
+    return [dict(zip(election_cols, row)) for row in values.tolist()]
+
+
+def _stability_batch(block, election_cols: Sequence[str], party: str):
+    votes, parties = block.votes(election_cols)
+    mask = block.districts
+    results = _percents(votes, _party_index(parties, party))
+    return ((results > 0.5) & mask[:, None, :]).sum(axis=1), mask
+
+
+def _competitive_contests_batch(
+    block, election_cols: Iterable[str], party: str, points_within: float = 0.03
+) -> List[PlanWideScoreValue]:
+    votes, parties = block.votes(election_cols)
+    results = _percents(votes, _party_index(parties, party))
+    competitive = np.logical_and(
+        results > 0.5 - points_within, results < 0.5 + points_within
+    )
+    return (competitive & block.districts[:, None, :]).sum(axis=(1, 2)).tolist()
+
+
+def _swing_districts_batch(
+    block, election_cols: Iterable[str], party: str
+) -> List[PlanWideScoreValue]:
+    stability, mask = _stability_batch(block, election_cols, party)
+    n = len(election_cols)
+    return ((stability != 0) & (stability != n) & mask).sum(axis=1).tolist()
+
+
+def _party_districts_batch(
+    block, election_cols: Iterable[str], party: str
+) -> List[PlanWideScoreValue]:
+    stability, mask = _stability_batch(block, election_cols, party)
+    return ((stability == len(election_cols)) & mask).sum(axis=1).tolist()
+
+
+def _opp_party_districts_batch(
+    block, election_cols: Iterable[str], party: str
+) -> List[PlanWideScoreValue]:
+    stability, mask = _stability_batch(block, election_cols, party)
+    return ((stability == 0) & mask).sum(axis=1).tolist()
+
+
+def _party_wins_by_district_batch(
+    block, election_cols: Iterable[str], party: str
+) -> List[DistrictWideScoreValue]:
+    stability, mask = _stability_batch(block, election_cols, party)
+    return block.to_dicts(stability, mask)
+
+
+def _aggregate_seats_batch(
+    block, election_cols: Iterable[str], party: str
+) -> List[PlanWideScoreValue]:
+    stability, mask = _stability_batch(block, election_cols, party)
+    return (stability * mask).sum(axis=1).tolist()
+
+
+def _seats_batch(
+    block, election_cols: Iterable[str], party: str, mean: bool = False
+) -> List[ScoreValue]:
+    votes, parties = block.votes(election_cols)
+    won = _won(votes, _party_index(parties, party)) & block.districts[:, None, :]
+    seats = won.sum(axis=-1)
+    if mean:
+        return seats.mean(axis=1).tolist()
+    return [dict(zip(election_cols, row)) for row in seats.tolist()]
+
+
+def _responsive_proportionality_batch(
+    block, election_cols: Iterable[str], party: str
+) -> List[PlanWideScoreValue]:
+    votes, parties = block.votes(election_cols)
+    index = _party_index(parties, party)
+    result = _seat_share(votes, index, block.present) - _overall_percent(
+        votes, index, block.present
+    )
+    return result.mean(axis=1).tolist()
+
+
+def _stable_proportionality_batch(
+    block, election_cols: Iterable[str], party: str
+) -> List[PlanWideScoreValue]:
+    votes, parties = block.votes(election_cols)
+    index = _party_index(parties, party)
+    result = np.abs(
+        _seat_share(votes, index, block.present)
+        - _overall_percent(votes, index, block.present)
+    )
+    return result.mean(axis=1).tolist()
+
+
+def _efficiency_gap_batch(
+    block, election_cols: Iterable[str], mean: bool = False
+) -> List[ScoreValue]:
+    votes, parties = block.votes(election_cols)
+    # Votes for other parties would count toward the total but never be
+    # wasted, as GerryChain only computes the gap of two-party elections.
+    for election, names in zip(election_cols, parties):
+        if len(names) != 2:
+            raise ValueError(
+                f'The efficiency gap needs a two-party election, but "{election}" '
+                f"has {len(names)} parties."
+            )
+    mask = block.present[:, None, :]
+    party1, party2 = votes[..., 0], votes[..., 1]
+    half = (party1 + party2) / 2
+    party1_waste = np.where(party1 > party2, party1 - half, party1)
+    party2_waste = np.where(party1 > party2, party2, party2 - half)
+    numerator = ((party2_waste - party1_waste) * mask).sum(axis=-1)
+    result = numerator / (votes.sum(axis=-1) * mask).sum(axis=-1)
+    return _by_election(result, election_cols, mean)
+
+
+def _simplified_efficiency_gap_batch(
+    block, election_cols: Iterable[str], party: str, mean: bool = False
+) -> List[ScoreValue]:
+    votes, parties = block.votes(election_cols)
+    index = _party_index(parties, party)
+    V = _overall_percent(votes, index, block.present)
+    S = _seat_share(votes, index, block.present)
+    return _by_election(S + 0.5 - 2 * V, election_cols, mean)
+
+
+def _first_party_percents(block, election_cols: Sequence[str]):
+    """
+    Returns the first party's vote shares in each district, sorted in ascending
+    order with the districts a plan doesn't use pushed to the end as `inf`,
+    along with the number of districts in each plan.
+    """
+    votes, _ = block.votes(election_cols)
+    shares = _percents(votes, np.zeros(votes.shape[1], dtype=int))
+    shares = np.sort(np.where(block.present[:, None, :], shares, np.inf), axis=-1)
+    return votes, shares, block.present.sum(axis=1)[:, None, None]
+
+
+def _mean_median_batch(
+    block, election_cols: Iterable[str], mean: bool = False
+) -> List[ScoreValue]:
+    _, shares, n = _first_party_percents(block, election_cols)
+    low = np.take_along_axis(shares, (n - 1) // 2, axis=-1)[..., 0]
+    high = np.take_along_axis(shares, n // 2, axis=-1)[..., 0]
+    finite = np.where(np.isinf(shares), 0, shares)
+    result = (low + high) / 2 - finite.sum(axis=-1) / n[..., 0]
+    return _by_election(result, election_cols, mean)
+
+
+def _partisan_bias_batch(
+    block, election_cols: Iterable[str], mean: bool = False
+) -> List[ScoreValue]:
+    _, shares, n = _first_party_percents(block, election_cols)
+    finite = np.isfinite(shares) | np.isnan(shares)
+    mean_share = np.where(finite, shares, 0).sum(axis=-1, keepdims=True) / n
+    above = ((shares > mean_share) & finite).sum(axis=-1)
+    return _by_election(above / n[..., 0] - 0.5, election_cols, mean)
+
+
+def _partisan_gini_batch(
+    block, election_cols: Iterable[str], mean: bool = False
+) -> List[ScoreValue]:
+    votes, shares, n = _first_party_percents(block, election_cols)
+    overall = _overall_percent(
+        votes, np.zeros(votes.shape[1], dtype=int), block.present
+    )[..., None]
+
+    # Pair the i-th smallest district share with the i-th largest; the area
+    # between the seats-votes curve and its reflection reduces to the sum of
+    # |2V - s_i - s_(n - 1 - i)| over the plan's districts.
+    position = np.arange(shares.shape[-1])
+    used = position < n
+    mirrored = np.take_along_axis(shares, np.clip(n - 1 - position, 0, None), axis=-1)
+    area = np.where(used, np.abs(2 * overall - shares - mirrored), 0).sum(axis=-1)
+    return _by_election(area / n[..., 0], election_cols, mean)
+
+
+def _eguia_batch(
+    block,
+    election_cols: Iterable[str],
+    party: str,
+    ideals: np.ndarray,
+    mean: bool = False,
+) -> List[ScoreValue]:
+    votes, parties = block.votes(election_cols)
+    seat_share = _seat_share(votes, _party_index(parties, party), block.present)
+    return _by_election(seat_share - ideals, election_cols, mean)
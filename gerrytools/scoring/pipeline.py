@@ -0,0 +1,233 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List
+
+import pandas as pd
+
+# Marks the end of a stage's stream.
+_DONE = object()
+
+# How long, in seconds, a blocked stage waits before checking whether the
+# pipeline has been stopped.
+_POLL = 0.1
+
+
+@dataclass
+class StageStats:
+    """
+    Counters for one stage of a pipelined `summarize_many` run.
+
+    Attributes:
+        name (str): The stage's name.
+        items (int): Items the stage has handed on to the next.
+        busy (float): Seconds spent working.
+        starved (float): Seconds spent waiting on the stage before it.
+        blocked (float): Seconds spent waiting for room in the next stage's
+            queue: the backpressure on this stage.
+    """
+
+    name: str
+    items: int = 0
+    busy: float = 0.0
+    starved: float = 0.0
+    blocked: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """
+        Items per second of work: how fast the stage would run if it never
+        waited on the others.
+        """
+        return self.items / self.busy if self.busy else float("inf")
+
+
+@dataclass
+class PipelineStats:
+    """
+    Counters for the stages of a pipelined `summarize_many` run: `read`, which
+    draws (and so decodes) plans, `score`, which summarizes them, and `write`,
+    which serializes and writes the summaries. Pass one instance to
+    `summarize_many` with `pipeline` to accumulate them.
+
+    The stage that limits the run is busy nearly all the time, while the
+    others spend theirs starved or blocked on it.
+
+    Attributes:
+        read (StageStats): The reading stage.
+        score (StageStats): The scoring stage.
+        write (StageStats): The writing stage.
+        wall (float): Seconds the pipeline ran for.
+    """
+
+    read: StageStats = field(default_factory=lambda: StageStats("read"))
+    score: StageStats = field(default_factory=lambda: StageStats("score"))
+    write: StageStats = field(default_factory=lambda: StageStats("write"))
+    wall: float = 0.0
+
+    @property
+    def stages(self) -> List[StageStats]:
+        return [self.read, self.score, self.write]
+
+    @property
+    def bottleneck(self) -> str:
+        """
+        The name of the stage that spent the most time working.
+        """
+        return max(self.stages, key=lambda stage: stage.busy).name
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Returns a table with a row per stage: items handed on, seconds busy,
+        starved and blocked, throughput in items per second of work, and
+        utilization, the share of the run the stage was busy.
+        """
+        return pd.DataFrame(
+            [
+                {
+                    "stage": stage.name,
+                    "items": stage.items,
+                    "busy": stage.busy,
+                    "starved": stage.starved,
+                    "blocked": stage.blocked,
+                    "throughput": stage.throughput,
+                    "utilization": stage.busy / self.wall if self.wall else 0.0,
+                }
+                for stage in self.stages
+            ]
+        )
+
+
+def _put(channel: queue.Queue, item, stop: threading.Event) -> bool:
+    """
+    Puts `item` on `channel`, waiting for room unless the pipeline is stopped.
+    Returns whether the item was put.
+    """
+    while not stop.is_set():
+        try:
+            channel.put(item, timeout=_POLL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(channel: queue.Queue, stop: threading.Event):
+    """
+    Takes the next item from `channel`, or `_DONE` if the pipeline is stopped.
+    """
+    while not stop.is_set():
+        try:
+            return channel.get(timeout=_POLL)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def _read_ahead(items: Iterable, stats: PipelineStats, maxsize: int) -> Iterator:
+    """
+    Draws `items` on a thread of its own, at most `maxsize` ahead of the
+    scoring stage that iterates the returned generator. An error raised while
+    drawing is raised again by the generator.
+    """
+    channel = queue.Queue(maxsize)
+    stop = threading.Event()
+    failure = []
+    read, score = stats.read, stats.score
+
+    def produce():
+        clock = time.perf_counter
+        iterator = iter(items)
+        try:
+            while not stop.is_set():
+                start = clock()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                drawn = clock()
+                read.busy += drawn - start
+                if not _put(channel, item, stop):
+                    return
+                read.blocked += clock() - drawn
+                read.items += 1
+        except BaseException as error:
+            failure.append(error)
+        _put(channel, _DONE, stop)
+
+    thread = threading.Thread(target=produce, name="gerrytools-read", daemon=True)
+    thread.start()
+    try:
+        while True:
+            start = time.perf_counter()
+            item = channel.get()
+            score.starved += time.perf_counter() - start
+            if item is _DONE:
+                break
+            yield item
+        if failure:
+            raise failure[0]
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _write_behind(
+    rows: Iterable[tuple], write: Callable, stats: PipelineStats, maxsize: int
+):
+    """
+    Draws `rows` on this thread, which runs the scoring stage, and calls
+    `write` on each on a thread of its own, at most `maxsize` rows behind. An
+    error raised by `write` stops the pipeline and is raised here.
+    """
+    channel = queue.Queue(maxsize)
+    stop = threading.Event()
+    failure = []
+    score, written = stats.score, stats.write
+    clock = time.perf_counter
+
+    def consume():
+        try:
+            while not stop.is_set():
+                start = clock()
+                row = _get(channel, stop)
+                got = clock()
+                written.starved += got - start
+                if row is _DONE:
+                    return
+                write(*row)
+                written.busy += clock() - got
+                written.items += 1
+        except BaseException as error:
+            failure.append(error)
+            stop.set()
+
+    began = clock()
+    thread = threading.Thread(target=consume, name="gerrytools-write", daemon=True)
+    thread.start()
+    try:
+        rows = iter(rows)
+        while not stop.is_set():
+            # Time spent waiting on the reading stage is counted as starved by
+            # `_read_ahead`, so it's taken out of the time spent scoring.
+            start, starved = clock(), score.starved
+            try:
+                row = next(rows)
+            except StopIteration:
+                break
+            drawn = clock()
+            score.busy += drawn - start - (score.starved - starved)
+            if not _put(channel, row, stop):
+                break
+            score.blocked += clock() - drawn
+            score.items += 1
+        _put(channel, _DONE, stop)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        thread.join()
+        stats.wall += clock() - began
+    if failure:
+        raise failure[0]
@@ -0,0 +1,111 @@
+from typing import Iterable, List, Optional
+
+from gerrychain import Partition
+
+from gerrytools.geometry.compactness import (
+    UnitGeometry,
+    _district_boundaries,
+    _district_hulls,
+)
+
+from .partisan import _election_results, _election_stability, _vote_tensor
+from .splits import _unit_contingency, _unit_index
+from .types import Product, Score
+
+
+def election_results(election_cols: Iterable[str], party: str) -> Product:
+    """
+    The (elections × districts) matrix of `party`'s vote shares.
+
+    Args:
+        election_cols (Iterable[str]): The names of the election updaters.
+        party (str): The "point of view" political party.
+    """
+    return Product("election_results", _election_results, (tuple(election_cols), party))
+
+
+def election_stability(election_cols: Iterable[str], party: str) -> Product:
+    """
+    The number of elections `party` wins in each district.
+
+    Args:
+        election_cols (Iterable[str]): The names of the election updaters.
+        party (str): The "point of view" political party.
+    """
+    return Product(
+        "election_stability", _election_stability, (tuple(election_cols), party)
+    )
+
+
+def vote_tensor(election_cols: Iterable[str]) -> Product:
+    """
+    The (elections × districts × parties) tensor of vote totals the partisan
+    metrics reduce over.
+
+    Args:
+        election_cols (Iterable[str]): The names of the election updaters.
+    """
+    return Product("vote_tensor", _vote_tensor, (tuple(election_cols),))
+
+
+def _register_unit(P: Partition, unit: str, popcol: Optional[str]):
+    _unit_index(P.graph).codes(unit)
+
+
+def unit_contingency(unit: str, popcol: Optional[str] = None) -> Product:
+    """
+    The unit × district contingency table split and piece scores count from.
+    Every unit column required by the scores of a plan is registered before
+    the table is built, so they share a single table.
+
+    Args:
+        unit (str): The unit column.
+        popcol (str, optional): The population column; only populated nodes
+            count toward a split.
+    """
+    return Product(
+        "unit_contingency", _unit_contingency, (unit, popcol), prepare=_register_unit
+    )
+
+
+def district_boundaries(geometry: Optional[UnitGeometry] = None) -> Product:
+    """
+    The area and perimeter of each district, summed from a unit boundary table.
+
+    Args:
+        geometry (UnitGeometry, optional): The unit geometry; defaults to the
+            one read from the partition's graph.
+    """
+    return Product("district_boundaries", _district_boundaries, (geometry,))
+
+
+def district_hulls(geometry: UnitGeometry) -> Product:
+    """
+    The vertices of each district's convex hull.
+
+    Args:
+        geometry (UnitGeometry): Unit geometry with hull vertices.
+    """
+    return Product("district_hulls", _district_hulls, (geometry,))
+
+
+def plan(scores: Iterable[Score]) -> List[Product]:
+    """
+    Returns the distinct products required by `scores`, in the order they're
+    first required.
+
+    Args:
+        scores (Iterable[Score]): The scores to plan for.
+    """
+    return list(dict.fromkeys(p for score in scores for p in score.requires))
+
+
+def _build(part: Partition, products: List[Product]):
+    """
+    Builds `products` for `part` in the active plan context.
+    """
+    for product in products:
+        if product.prepare is not None:
+            product.prepare(part, *product.args)
+    for product in products:
+        product.build(part, *product.args)
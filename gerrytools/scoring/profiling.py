@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+
+class Profiler:
+    """
+    Records the wall time, call count and, optionally, peak memory allocated by
+    each score and each shared intermediate product (dissolved geometries,
+    vote-share matrices, contingency tables, ...) while plans are summarized.
+    Pass one to `summarize` or `summarize_many`, or open it as a context to
+    profile every summary made within. When no profiler is active, scoring
+    only pays for one context-variable lookup per plan and per product built.
+
+    Times are inclusive: a score's time includes the products built while it
+    ran, and a plan's time includes all of its scores.
+
+    Example:
+
+        profiler = Profiler(memory=True)
+        summarize_many(plans, scores, profiler=profiler)
+        print(profiler.summary())
+        profiler.write_chrome_trace("scores.trace.json")
+
+    Attributes:
+        events (list): One `(kind, name, start, duration, peak)` tuple per
+            recorded call, with times in seconds since the profiler was created
+            and `peak` the most memory allocated at once during the call, in
+            bytes (`None` unless `memory` is set).
+    """
+
+    def __init__(self, memory: bool = False):
+        """
+        Args:
+            memory (bool, optional): Whether to trace memory allocations with
+                `tracemalloc`, which slows Python down considerably. Defaults to
+                False.
+        """
+        self.memory = memory
+        self.events = []
+        self._origin = time.perf_counter()
+        self._stack = []
+        self._token = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        self._token = _active_profiler.set(self)
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        _active_profiler.reset(self._token)
+        self._token = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def record(self, kind: str, name: str) -> Iterator[None]:
+        """
+        Records the enclosed block as one call of `name`.
+
+        Args:
+            kind (str): What's being recorded, e.g. `"score"` or `"product"`.
+            name (str): The name of the score or product.
+        """
+        tracing = self.memory and tracemalloc.is_tracing()
+        if tracing:
+            # Fold the peak so far into the enclosing call's before resetting
+            # it to measure this one.
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1][1] = max(self._stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            frame = [current, current]
+            self._stack.append(frame)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            peak = None
+            if tracing:
+                self._stack.pop()
+                absolute = max(frame[1], tracemalloc.get_traced_memory()[1])
+                if self._stack:
+                    self._stack[-1][1] = max(self._stack[-1][1], absolute)
+                peak = absolute - frame[0]
+            self.events.append((kind, name, start - self._origin, duration, peak))
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Returns a table with a row per score and product: its kind, number of
+        calls, total, mean and longest wall time in seconds, and, when tracing
+        memory, the largest peak allocation in bytes. Rows are sorted by total
+        time, longest first.
+        """
+        columns = ["kind", "name", "start", "duration", "peak"]
+        events = pd.DataFrame(self.events, columns=columns)
+        table = events.groupby(["kind", "name"], sort=False).agg(
+            calls=("duration", "size"),
+            total=("duration", "sum"),
+            mean=("duration", "mean"),
+            max=("duration", "max"),
+            peak=("peak", "max"),
+        )
+        if not self.memory:
+            table = table.drop(columns="peak")
+        return table.sort_values("total", ascending=False).reset_index()
+
+    def chrome_trace(self) -> List[dict]:
+        """
+        Returns the recorded calls as Chrome trace events, which can be loaded
+        into `chrome://tracing` or Perfetto.
+        """
+        pid, tid = 0, threading.get_ident()
+        return [
+            {
+                "name": name,
+                "cat": kind,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": duration * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": {} if peak is None else {"peak_bytes": peak},
+            }
+            for kind, name, start, duration, peak in self.events
+        ]
+
+    def write_chrome_trace(self, path: str):
+        """
+        Writes the recorded calls to `path` in the Chrome trace format.
+
+        Args:
+            path (str): Where to write the trace.
+        """
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.chrome_trace()}, f)
+
+
+_active_profiler: ContextVar[Optional[Profiler]] = ContextVar(
+    "gerrytools_profiler", default=None
+)
+
+
+@contextmanager
+def _profiling(profiler: Optional[Profiler]) -> Iterator[Optional[Profiler]]:
+    """
+    Activates `profiler`, if passed and not already active, for the enclosed
+    block; yields whichever profiler is active.
+    """
+    active = _active_profiler.get()
+    if profiler is None or profiler is active:
+        yield active
+        return
+    with profiler:
+        yield profiler
@@ -1,40 +1,102 @@
 import gzip
 import json
+from collections import deque
+from contextlib import nullcontext
 from functools import partial
-from typing import Dict, Iterable, List, Mapping, Optional, Union
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
 
 from geopandas import GeoDataFrame
 from gerrychain import Graph, Partition
 from tqdm import tqdm
 
 from gerrytools.geometry.compactness import (
+    UnitGeometry,
+    _BlockIndex,
     _convex_hull,
     _cut_edges,
+    _cut_edges_batch,
     _polsby_popper,
+    _polsby_popper_batch,
+    _polsby_popper_graph,
     _pop_polygon,
+    _pop_polygon_batch,
+    _pop_polygon_graph,
     _reock,
+    _reock_graph,
     _schwartzberg,
+    _schwartzberg_batch,
+    _schwartzberg_graph,
 )
 
-from .demographics import _gingles_districts, _max_deviation, _pop_shares, _tally_pop
+from .checkpoint import _Checkpoint, _select, _validate_selection
+from .columnar import ColumnarWriter
+from .context import CacheStats, _plan_cached, plan_context
+from .contiguity import (
+    _district_components,
+    _district_components_batch,
+    _stray_nodes,
+    _stray_nodes_batch,
+)
+from .dedupe import DedupeStats, PlanMemo, _Deduplicator
+from .demographics import (
+    _gingles_districts,
+    _gingles_districts_batch,
+    _max_deviation,
+    _max_deviation_batch,
+    _pop_shares,
+    _pop_shares_batch,
+    _tally_pop,
+    _tally_pop_batch,
+)
+from .incremental import IncrementalSummarizer
+from .parallel import summarize_parallel
 from .partisan import (
     _aggregate_seats,
+    _aggregate_seats_batch,
     _competitive_contests,
+    _competitive_contests_batch,
     _efficiency_gap,
+    _efficiency_gap_batch,
     _eguia,
+    _eguia_batch,
+    _eguia_ideals,
     _mean_median,
+    _mean_median_batch,
     _opp_party_districts,
+    _opp_party_districts_batch,
     _partisan_bias,
+    _partisan_bias_batch,
     _partisan_gini,
+    _partisan_gini_batch,
     _party_districts,
+    _party_districts_batch,
     _party_wins_by_district,
+    _party_wins_by_district_batch,
     _responsive_proportionality,
+    _responsive_proportionality_batch,
     _seats,
+    _seats_batch,
     _simplified_efficiency_gap,
+    _simplified_efficiency_gap_batch,
     _stable_proportionality,
+    _stable_proportionality_batch,
     _swing_districts,
+    _swing_districts_batch,
 )
+from .pipeline import PipelineStats, _read_ahead, _write_behind
+from .products import (
+    _build,
+    district_boundaries,
+    district_hulls,
+    election_results,
+    election_stability,
+    plan,
+    unit_contingency,
+    vote_tensor,
+)
+from .profiling import Profiler, _profiling
 from .splits import _pieces, _splits
+from .streaming import EnsembleStatistics
 from .types import Callable, Score, ScoreValue
 
 
@@ -43,10 +105,16 @@ def summarize(
     scores: Iterable[Score],
     gdf: Optional[GeoDataFrame] = None,
     join_on: Optional[str] = None,
+    stats: Optional[CacheStats] = None,
+    profiler: Optional[Profiler] = None,
 ) -> Dict[str, ScoreValue]:
     """
     Summarize the given partition by the passed scores.
 
+    The products the scores declare in `Score.requires` (see `plan`) are built
+    once, before any score runs, and shared by every score that reads them,
+    as are the dissolved district geometries.
+
     Args:
         part (Partition): The plan to summarize.
         scores (Iterable[Score]): Which scores to include in the summary.
@@ -56,6 +124,12 @@ def summarize(
         join_on (str): Field used to join `part.graph` to `gdf`.
             If not specified, geometries are joined by matching the index of `gdf`
             to the node keys of `part.graph`.
+        stats (CacheStats, optional): If passed, the hits and misses of the
+            intermediate products shared between scores (see `plan_context`) are
+            added to it, along with the names of the products built.
+        profiler (Profiler, optional): If passed, records the time (and,
+            optionally, memory) taken by each score and each shared product.
+            Scoring within an open `Profiler` is recorded without passing it.
 
     Raises:
         ValueError: If `gdf` is not specified and at least one score in `scores`
@@ -68,34 +142,57 @@ def summarize(
         ie.
         `{"cut_edges": 4050, "num_party_seats": 3, ... }`
     """
-    if any(score.dissolved for score in scores):
-        if gdf is None:
-            raise ValueError("Geometries must be provided for dissolved scores.")
-
-        if join_on is None:
-            assignment = dict(part.assignment)
-            gdf = gdf.copy(deep=False)
-        else:
-            assignment = {
-                part.graph.nodes[node][join_on]: label
-                for node, label in part.assignment.items()
-            }
-            gdf = gdf.set_index(join_on)
-
-        gdf["assignment"] = assignment
-        dissolved_gdf = gdf.dissolve(by="assignment")
-    else:
-        dissolved_gdf = None
+    scores = list(scores)
+    dissolved = any(score.dissolved for score in scores)
+    if dissolved and gdf is None:
+        raise ValueError("Geometries must be provided for dissolved scores.")
 
     summary = {}
-    for score in scores:
-        if score.dissolved:
-            summary[score.name] = score.apply(dissolved_gdf)
-        else:
-            summary[score.name] = score.apply(part)
+    with _profiling(profiler) as profiler, plan_context(part, stats), (
+        profiler.record("plan", "summarize") if profiler is not None else nullcontext()
+    ):
+        # Build the products the scores share up front, so each is built once
+        # whichever score needs it first.
+        _build(part, plan(scores))
+        dissolved_gdf = (
+            _plan_cached(
+                part,
+                ("dissolved", id(gdf), join_on),
+                lambda: _dissolve(part, gdf, join_on),
+            )
+            if dissolved
+            else None
+        )
+        for score in scores:
+            target = dissolved_gdf if score.dissolved else part
+            if profiler is None:
+                summary[score.name] = score.apply(target)
+            else:
+                with profiler.record("score", score.name):
+                    summary[score.name] = score.apply(target)
     return summary
 
 
+def _dissolve(
+    part: Partition, gdf: GeoDataFrame, join_on: Optional[str]
+) -> GeoDataFrame:
+    """
+    Dissolves the geometries in `gdf` into the districts of `part`.
+    """
+    if join_on is None:
+        assignment = dict(part.assignment)
+        gdf = gdf.copy(deep=False)
+    else:
+        assignment = {
+            part.graph.nodes[node][join_on]: label
+            for node, label in part.assignment.items()
+        }
+        gdf = gdf.set_index(join_on)
+
+    gdf["assignment"] = assignment
+    return gdf.dissolve(by="assignment")
+
+
 def summarize_many(
     parts: Iterable[Partition],
     scores: Iterable[Score],
@@ -105,6 +202,24 @@ def summarize_many(
     output_file: str = None,
     compress: bool = False,
     verbose: bool = False,
+    workers: int = 1,
+    chunksize: int = 64,
+    stats: Optional[CacheStats] = None,
+    incremental: bool = False,
+    output_format: str = "jsonl",
+    row_group_size: int = 10_000,
+    checkpoint: bool = False,
+    checkpoint_every: int = 1000,
+    id_range: Optional[Tuple[int, Optional[int]]] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    profiler: Optional[Profiler] = None,
+    dedupe: bool = False,
+    memo: Optional[PlanMemo] = None,
+    dedupe_stats: Optional[DedupeStats] = None,
+    statistics: Optional[EnsembleStatistics] = None,
+    pipeline: bool = False,
+    queue_size: int = 256,
+    pipeline_stats: Optional[PipelineStats] = None,
 ) -> Union[List[Dict[str, ScoreValue]], None]:
     """
     Summarize the given partitions by the passed scores.
@@ -126,43 +241,316 @@ def summarize_many(
             encoding of the scores. If None, returns a list of the dictionary
             summary of each plan. Defaults to None.
         compress (bool, optional): Whether to compress the output file with gzip.
-            Default is False.
+            Only for JSON-lines output. Default is False.
+        workers (int, optional): Number of processes to score plans with. When
+            greater than 1, plans are scored by a process pool (see
+            `summarize_parallel`); the graph, updaters and `gdf` are sent to
+            each worker once, and summaries keep the order of `parts`. All plans
+            must share a graph and updaters. Defaults to 1.
+        chunksize (int, optional): Number of plans handed to a worker at a time
+            when `workers` is greater than 1. Defaults to 64.
+        stats (CacheStats, optional): Accumulates the hits and misses of the
+            intermediates shared between scores over every plan. Can't be
+            combined with `workers`.
+        incremental (bool, optional): Whether `parts` are consecutive steps of
+            a chain, each differing from the last in a few nodes. If so, each
+            plan is scored by updating the previous plan's results for the
+            districts that changed (see `IncrementalSummarizer`). Can't be
+            combined with `workers`. Defaults to False.
+        output_format (str, optional): How to write `output_file`: `"jsonl"`,
+            one JSON object per plan; `"parquet"` or `"arrow"`, one typed column
+            per plan-wide score and per district or election of each
+            district-wide and election-wide score (see `ColumnarWriter`), which
+            `read_columns` loads back as NumPy arrays. Columnar output requires
+            pyarrow. Defaults to `"jsonl"`.
+        row_group_size (int, optional): Number of plans per row group of
+            columnar output. Defaults to 10,000.
+        checkpoint (bool, optional): Whether to make the run resumable. Plans
+            are written to `{output_file}.partial`, and every `checkpoint_every`
+            plans the index of the next plan and the partial file's size are
+            saved to `{output_file}.checkpoint`. If the run is interrupted,
+            calling `summarize_many` again with the same arguments skips the
+            plans already written. The partial file is renamed to `output_file`
+            once every plan is written. With columnar output, the partial file
+            holds JSON lines, which are converted to `output_file` at the end.
+            Defaults to False.
+        checkpoint_every (int, optional): Number of plans between checkpoints.
+            Defaults to 1,000.
+        id_range (Tuple[int, Optional[int]], optional): Half-open range
+            `(start, stop)` of plan indices to score; a stop of `None` scores
+            through the last plan. Plans are identified by their index in
+            `parts`, so ids are unchanged. Defaults to every plan.
+        shard (Tuple[int, int], optional): A pair `(k, N)`; scores only the
+            plans whose index `i` has `i % N == k`, so N machines can split an
+            ensemble. See `merge_shards` to combine their outputs. Defaults to
+            every plan.
+        profiler (Profiler, optional): Records the time (and, optionally,
+            memory) taken by each score and shared product over every plan.
+            Can't be combined with `workers`.
+        dedupe (bool, optional): Whether to skip rescoring repeated plans, as
+            found in reversible and SMC ensembles. Each run of identical
+            consecutive plans becomes one summary, identified by the run's
+            first plan, with a `"multiplicity"` counting the plans in the run;
+            plans seen earlier in the ensemble take their summary from `memo`.
+            Plans are compared by `plan_hash` and district labels. Can't be
+            combined with `shard`. Defaults to False.
+        memo (PlanMemo, optional): Where to keep summaries for reuse when
+            deduplicating. Defaults to an in-memory memo of 100,000 summaries.
+            With several workers, a plan drawn again before its first copy's
+            summary has come back is scored again. Requires `dedupe`.
+        dedupe_stats (DedupeStats, optional): Accumulates counts of the plans
+            seen, repeated, reused and scored, and of the unique plans. Requires
+            `dedupe`.
+        statistics (EnsembleStatistics, optional): Accumulates streaming
+            statistics (moments, quantile sketches, histograms) of the scores
+            of every plan. If no `output_file` is passed, summaries are only
+            accumulated, not returned, so memory doesn't grow with the number
+            of plans.
+        pipeline (bool, optional): Whether to run reading, scoring and writing
+            as concurrent stages joined by bounded queues. Plans are drawn from
+            `parts` (so a BEN or JSON-lines file is decoded, and plans are
+            deduplicated) on one thread, scored on the calling thread or by
+            `workers` processes, and serialized, compressed and written on a
+            third, so disk and decompression overlap scoring. Summaries and
+            output are the same as without it. Defaults to False.
+        queue_size (int, optional): Most plans the reading stage runs ahead of
+            scoring, and most summaries the writing stage lags behind it, when
+            pipelining. A stage that gets this far ahead waits for the next.
+            Defaults to 256.
+        pipeline_stats (PipelineStats, optional): Accumulates the items handed
+            on and the time spent working, starved and blocked by each stage, to
+            show which stage limits the run. Requires `pipeline`.
+
+    Raises:
+        ValueError: If options that can't be combined are passed together:
+            `incremental`, `stats` or `profiler` with more than one worker;
+            `compress`, or scores with `varying_keys`, with columnar output;
+            `checkpoint` without an `output_file`; `memo` or `dedupe_stats`
+            without `dedupe`; `pipeline_stats` without `pipeline`; or `dedupe`
+            with `shard`. Also if `output_format` is unknown, if `queue_size`
+            isn't positive, or if `id_range` or `shard` is invalid.
 
     Returns:
         A list dictionaries that maps score names to the corresponding ScoreValues
         of the score functions applied to each plan, if NO output file is passed.
-        If an output file IS specified, the plan summaries are written to file
-        and the function is void.
+        If an output file IS specified, or `statistics` are accumulated without
+        one, the plan summaries are written to file and the function is void.
     """
     if plan_names is None:
         plan_names = []
+    scores = list(scores)
+
+    if incremental and workers > 1:
+        raise ValueError("Incremental scoring can't be split across workers.")
+    if workers > 1 and (stats is not None or profiler is not None):
+        raise ValueError(
+            "Cache statistics and profiles aren't collected from workers; "
+            "pass `stats` and `profiler` only when `workers` is 1."
+        )
+    if output_format not in ("jsonl", "parquet", "arrow"):
+        raise ValueError(
+            f'Unknown output format "{output_format}"; use "jsonl", "parquet" '
+            'or "arrow".'
+        )
+    if compress and output_format != "jsonl":
+        raise ValueError("Only JSON-lines output can be compressed with gzip.")
+    varying = [score.name for score in scores if score.varying_keys]
+    if output_format != "jsonl" and varying:
+        raise ValueError(
+            f"Scores {varying} have different keys for different plans, so "
+            "they can't be written as columns; use JSON-lines output."
+        )
+    if checkpoint and output_file is None:
+        raise ValueError("Checkpointing requires an output file.")
+    if not dedupe and (memo is not None or dedupe_stats is not None):
+        raise ValueError("`memo` and `dedupe_stats` require `dedupe=True`.")
+    if not pipeline and pipeline_stats is not None:
+        raise ValueError("`pipeline_stats` requires `pipeline=True`.")
+    if dedupe and shard is not None:
+        # Each shard would only skip its own repeats, and the rows it leaves
+        # out break the round-robin `merge_shards` relies on.
+        raise ValueError("Sharded ensembles can't be deduplicated.")
+    if queue_size < 1:
+        raise ValueError("Pipeline queues must hold at least one item.")
+    _validate_selection(id_range, shard)
+
+    checkpointer = None
+    if checkpoint:
+        selection = {
+            "id_range": list(id_range) if id_range is not None else None,
+            "shard": list(shard) if shard is not None else None,
+        }
+        finish = None
+        if output_format != "jsonl":
+            selection["output_format"] = output_format
+            finish = partial(
+                _lines_to_columnar,
+                output_format=output_format,
+                row_group_size=row_group_size,
+            )
+        checkpointer = _Checkpoint(
+            f"{output_file}.gz" if compress else output_file,
+            compress=compress,
+            every=checkpoint_every,
+            selection=selection,
+            finish=finish,
+        )
+
+    deduplicator = None
+    if dedupe:
+        deduplicator = _Deduplicator(
+            scores, memo if memo is not None else PlanMemo(), dedupe_stats
+        )
 
-    if output_file is None:
-        if verbose:
-            result = []
-            for part in tqdm(parts):
-                result.append(summarize(part, scores=scores, gdf=gdf, join_on=join_on))
-            return result
-        return [summarize(part, scores=scores) for part in parts]
+    # The index of each plan drawn for scoring, in order, so summaries can be
+    # identified by their plan's index in `parts`.
+    ids = deque()
+
+    def selected(parts):
+        start = checkpointer.next if checkpointer is not None else 0
+        for i, part in _select(parts, id_range, shard, start):
+            if deduplicator is None:
+                ids.append(i)
+            elif not deduplicator.tag(i, part):
+                continue
+            yield part
+
+    parts = selected(parts)
+    if pipeline:
+        if pipeline_stats is None:
+            pipeline_stats = PipelineStats()
+        # The deduplicator tags plans on the reading thread and matches their
+        # summaries on the scoring thread; a row is only handed on once the
+        # reading thread has moved past it, so the two never share a row.
+        parts = _read_ahead(parts, pipeline_stats, queue_size)
+
+    if incremental:
+        summarizer = IncrementalSummarizer(
+            scores, gdf=gdf, join_on=join_on, stats=stats, profiler=profiler
+        )
+        summaries = (summarizer.step(part) for part in parts)
+    elif workers > 1:
+        summaries = summarize_parallel(
+            parts,
+            scores=scores,
+            gdf=gdf,
+            join_on=join_on,
+            workers=workers,
+            chunksize=chunksize,
+        )
     else:
-        with (
-            gzip.open(f"{output_file}.gz", "wt") if compress else open(output_file, "w")
-        ) as fout:
-            iterator = tqdm(enumerate(parts)) if verbose else enumerate(parts)
-            for i, part in iterator:
-                plan_details = summarize(part, scores=scores, gdf=gdf, join_on=join_on)
+        summaries = (
+            summarize(
+                part,
+                scores=scores,
+                gdf=gdf,
+                join_on=join_on,
+                stats=stats,
+                profiler=profiler,
+            )
+            for part in parts
+        )
+
+    if verbose:
+        summaries = tqdm(summaries)
+
+    def indexed(summaries):
+        for summary in summaries:
+            i = ids.popleft()
+            yield i, i, summary
+
+    # Each summary, with the indices of the first and last plans it stands for.
+    if deduplicator is not None:
+        rows = deduplicator.rows(summaries)
+    else:
+        rows = indexed(summaries)
+
+    if statistics is not None:
+        rows = _observed(rows, statistics)
+
+    def drain(write):
+        if pipeline:
+            _write_behind(rows, write, pipeline_stats, queue_size)
+        else:
+            for row in rows:
+                write(*row)
+
+    try:
+        if output_file is None:
+            results = []
+            if statistics is not None:
+                drain(lambda i, last, plan_details: None)
+                return
+            drain(lambda i, last, plan_details: results.append(plan_details))
+            return results
+
+        def columnar_id(i):
+            # Names are stored as strings so the id column has one type.
+            if plan_names:
+                return str(plan_names[i]) if i < len(plan_names) else str(i)
+            return i
+
+        if output_format != "jsonl" and checkpointer is None:
+            with ColumnarWriter(output_file, output_format, row_group_size) as writer:
+                drain(
+                    lambda i, last, plan_details: writer.write(
+                        plan_details, id=columnar_id(i)
+                    )
+                )
+            return
+
+        def line(i, plan_details):
+            if output_format != "jsonl":
+                plan_details["id"] = columnar_id(i)
+            else:
                 try:
                     plan_details["id"] = plan_names[i]
                 except BaseException:
                     plan_details["id"] = i
-                fout.write(json.dumps(plan_details) + "\n")
+            return json.dumps(plan_details) + "\n"
+
+        if checkpointer is not None:
+            with checkpointer:
+                drain(
+                    lambda i, last, plan_details: checkpointer.write(
+                        line(i, plan_details), last
+                    )
+                )
+            return
+
+        with (
+            gzip.open(f"{output_file}.gz", "wt") if compress else open(output_file, "w")
+        ) as fout:
+            drain(lambda i, last, plan_details: fout.write(line(i, plan_details)))
+    finally:
+        if pipeline:
+            # Stop the reading thread if scoring or writing failed.
+            parts.close()
+
+
+def _lines_to_columnar(source: str, path: str, output_format: str, row_group_size: int):
+    """
+    Writes the JSON-lines summaries of a finished checkpointed run to a
+    columnar file.
+    """
+    with open(source) as f, ColumnarWriter(path, output_format, row_group_size) as w:
+        for line in f:
+            plan_details = json.loads(line)
+            plan_id = plan_details.pop("id")
+            w.write(plan_details, id=plan_id)
+
+
+def _observed(rows, statistics: EnsembleStatistics):
+    for i, last, plan_details in rows:
+        statistics.update(plan_details)
+        yield i, last, plan_details
 
 
 def splits(
     unit: str,
     names: bool = False,
     popcol: str = None,
-    how: str = "pandas",
+    how: str = "index",
     alias: str = None,
 ) -> Score:
     """
@@ -181,8 +569,8 @@ def splits(
             graph. If this is passed, then a unit is only considered "split" if
             the _populated_ base units end up in different districts.
         how (str, optional): How do we perform these calculations on the back
-            end? Acceptable values are `"pandas"` and `"gerrychain"`; defaults to
-            `"pandas"`.
+            end? Acceptable values are `"index"`, `"pandas"`, and `"gerrychain"`;
+            defaults to `"index"`.
         names (bool, optional): Whether we return the identifiers of the things
             being split.
 
@@ -196,6 +584,7 @@ def splits(
     return Score(
         f"{alias}_splits",
         partial(_splits, unit=unit, how=how, popcol=popcol, names=names),
+        requires=(unit_contingency(unit, popcol),) if how == "index" else (),
     )
 
 
@@ -203,7 +592,7 @@ def pieces(
     unit: str,
     names: bool = False,
     popcol: str = None,
-    how: str = "pandas",
+    how: str = "index",
     alias: str = None,
 ) -> Score:
     """
@@ -225,8 +614,8 @@ def pieces(
             graph. If this is passed, then a unit is only considered "split" if
             the _populated_ base units end up in different districts.
         how (str, optional): How do we perform these calculations on the back
-            end? Acceptable values are `"pandas"` and `"gerrychain"`; defaults to
-            `"pandas"`.
+            end? Acceptable values are `"index"`, `"pandas"`, and `"gerrychain"`;
+            defaults to `"index"`.
         names (bool, optional): Whether we return the identifiers of the things
             being split.
 
@@ -240,6 +629,7 @@ def pieces(
     return Score(
         f"{alias}_pieces",
         partial(_pieces, unit=unit, how=how, popcol=popcol, names=names),
+        requires=(unit_contingency(unit, popcol),) if how == "index" else (),
     )
 
 
@@ -273,6 +663,13 @@ def competitive_contests(
             party=party,
             points_within=points_within,
         ),
+        batch=partial(
+            _competitive_contests_batch,
+            election_cols=election_cols,
+            party=party,
+            points_within=points_within,
+        ),
+        requires=(election_results(election_cols, party),),
     )
 
 
@@ -293,6 +690,8 @@ def swing_districts(election_cols: Iterable[str], party: str) -> Score:
     return Score(
         "swing_districts",
         partial(_swing_districts, election_cols=election_cols, party=party),
+        batch=partial(_swing_districts_batch, election_cols=election_cols, party=party),
+        requires=(election_stability(election_cols, party),),
     )
 
 
@@ -313,6 +712,8 @@ def party_districts(election_cols: Iterable[str], party: str) -> Score:
     return Score(
         "party_districts",
         partial(_party_districts, election_cols=election_cols, party=party),
+        batch=partial(_party_districts_batch, election_cols=election_cols, party=party),
+        requires=(election_stability(election_cols, party),),
     )
 
 
@@ -336,6 +737,10 @@ def opp_party_districts(election_cols: Iterable[str], party: str) -> Score:
     return Score(
         "opp_party_districts",
         partial(_opp_party_districts, election_cols=election_cols, party=party),
+        batch=partial(
+            _opp_party_districts_batch, election_cols=election_cols, party=party
+        ),
+        requires=(election_stability(election_cols, party),),
     )
 
 
@@ -356,6 +761,10 @@ def party_wins_by_district(election_cols: Iterable[str], party: str) -> Score:
     return Score(
         "party_wins_by_district",
         partial(_party_wins_by_district, election_cols=election_cols, party=party),
+        batch=partial(
+            _party_wins_by_district_batch, election_cols=election_cols, party=party
+        ),
+        requires=(election_stability(election_cols, party),),
     )
 
 
@@ -380,6 +789,10 @@ def seats(election_cols: Iterable[str], party: str, mean: bool = False) -> Score
     return Score(
         f"{prefix}{party}_seats",
         partial(_seats, election_cols=election_cols, party=party, mean=mean),
+        batch=partial(
+            _seats_batch, election_cols=election_cols, party=party, mean=mean
+        ),
+        requires=(vote_tensor(election_cols),),
     )
 
 
@@ -401,6 +814,8 @@ def aggregate_seats(election_cols: Iterable[str], party: str) -> Score:
     return Score(
         f"aggregate_{party}_seats",
         partial(_aggregate_seats, election_cols=election_cols, party=party),
+        batch=partial(_aggregate_seats_batch, election_cols=election_cols, party=party),
+        requires=(election_stability(election_cols, party),),
     )
 
 
@@ -421,6 +836,10 @@ def responsive_proportionality(election_cols: Iterable[str], party: str) -> Scor
     return Score(
         "responsive_proportionality",
         partial(_responsive_proportionality, election_cols=election_cols, party=party),
+        batch=partial(
+            _responsive_proportionality_batch, election_cols=election_cols, party=party
+        ),
+        requires=(vote_tensor(election_cols),),
     )
 
 
@@ -441,6 +860,10 @@ def stable_proportionality(election_cols: Iterable[str], party: str) -> Score:
     return Score(
         "stable_proportionality",
         partial(_stable_proportionality, election_cols=election_cols, party=party),
+        batch=partial(
+            _stable_proportionality_batch, election_cols=election_cols, party=party
+        ),
+        requires=(vote_tensor(election_cols),),
     )
 
 
@@ -462,6 +885,8 @@ def efficiency_gap(election_cols: Iterable[str], mean: bool = False) -> Score:
     return Score(
         f"{prefix}efficiency_gap",
         partial(_efficiency_gap, election_cols=election_cols, mean=mean),
+        batch=partial(_efficiency_gap_batch, election_cols=election_cols, mean=mean),
+        requires=(vote_tensor(election_cols),),
     )
 
 
@@ -494,6 +919,13 @@ def simplified_efficiency_gap(
             party=party,
             mean=mean,
         ),
+        batch=partial(
+            _simplified_efficiency_gap_batch,
+            election_cols=election_cols,
+            party=party,
+            mean=mean,
+        ),
+        requires=(vote_tensor(election_cols),),
     )
 
 
@@ -515,6 +947,8 @@ def mean_median(election_cols: Iterable[str], mean: bool = False) -> Score:
     return Score(
         f"{prefix}mean_median",
         partial(_mean_median, election_cols=election_cols, mean=mean),
+        batch=partial(_mean_median_batch, election_cols=election_cols, mean=mean),
+        requires=(vote_tensor(election_cols),),
     )
 
 
@@ -535,6 +969,8 @@ def partisan_bias(election_cols: Iterable[str], mean: bool = False) -> Score:
     return Score(
         f"{prefix}partisan_bias",
         partial(_partisan_bias, election_cols=election_cols, mean=mean),
+        batch=partial(_partisan_bias_batch, election_cols=election_cols, mean=mean),
+        requires=(vote_tensor(election_cols),),
     )
 
 
@@ -559,6 +995,8 @@ def partisan_gini(election_cols: Iterable[str], mean: bool = False) -> Score:
     return Score(
         f"{prefix}partisan_gini",
         partial(_partisan_gini, election_cols=election_cols, mean=mean),
+        batch=partial(_partisan_gini_batch, election_cols=election_cols, mean=mean),
+        requires=(vote_tensor(election_cols),),
     )
 
 
@@ -594,19 +1032,23 @@ def eguia(
         A score object with name `"eguia"` and associated function that takes a partition and returns
         a PlanWideScoreValue for the eguia metric.
     """
+    # County winners and populations are the same for every plan, so the
+    # county ideal is found once here and only seat shares are computed per
+    # plan.
     county_part = Partition(graph, county_col, updaters=updaters)
+    kwargs = dict(
+        election_cols=election_cols,
+        party=party,
+        ideals=_eguia_ideals(county_part, election_cols, party, totpop_col),
+        mean=mean,
+    )
     prefix = "mean_" if mean else ""
 
     return Score(
         f"{prefix}eguia",
-        partial(
-            _eguia,
-            election_cols=election_cols,
-            party=party,
-            county_part=county_part,
-            totpop_col=totpop_col,
-            mean=mean,
-        ),
+        partial(_eguia, **kwargs),
+        batch=partial(_eguia_batch, **kwargs),
+        requires=(vote_tensor(election_cols),),
     )
 
 
@@ -621,7 +1063,14 @@ def demographic_tallies(population_cols: Iterable[str]) -> List[Score]:
         A list of score objects named by `"{column}"` and with associated functions that take a partition
         and return a DistrictWideScoreValue for the demographic totals of each district.
     """
-    return [Score(col, partial(_tally_pop, pop_col=col)) for col in population_cols]
+    return [
+        Score(
+            col,
+            partial(_tally_pop, pop_col=col),
+            batch=partial(_tally_pop_batch, pop_col=col),
+        )
+        for col in population_cols
+    ]
 
 
 def demographic_shares(population_cols: Mapping[str, Iterable[str]]) -> List[Score]:
@@ -647,6 +1096,9 @@ def demographic_shares(population_cols: Mapping[str, Iterable[str]]) -> List[Sco
                 Score(
                     f"{col}_share",
                     partial(_pop_shares, subpop_col=col, totpop_col=totalpop_col),
+                    batch=partial(
+                        _pop_shares_batch, subpop_col=col, totpop_col=totalpop_col
+                    ),
                 )
                 for col in subpop_cols
             ]
@@ -685,6 +1137,12 @@ def gingles_districts(
                         totpop_col=totalpop_col,
                         threshold=threshold,
                     ),
+                    batch=partial(
+                        _gingles_districts_batch,
+                        subpop_col=col,
+                        totpop_col=totalpop_col,
+                        threshold=threshold,
+                    ),
                 )
                 for col in subpop_cols
             ]
@@ -692,32 +1150,87 @@ def gingles_districts(
     return scores
 
 
-def reock() -> Score:
+def reock(geometry: Optional[UnitGeometry] = None) -> Score:
     """
     Returns the reock score for each district in a plan.
+
+    Args:
+        geometry (UnitGeometry, optional): Boundary data and convex hulls of the
+            dual graph's units, from `UnitGeometry.from_geodataframe`. If passed,
+            each district's enclosing circle is found from the cached hull
+            vertices of its boundary units instead of dissolved geometries, and
+            chains only recompute the districts that changed.
+
     Returns:
         A dictionary with districts as keys and reock scores as values.
     """
+    if geometry is not None:
+        if geometry.hulls is None:
+            raise ValueError(
+                "Reock needs unit hulls; build the UnitGeometry with "
+                "UnitGeometry.from_geodataframe."
+            )
+        return Score(
+            "reock",
+            partial(_reock_graph, geometry=geometry),
+            requires=(district_boundaries(geometry), district_hulls(geometry)),
+        )
     return Score("reock", _reock, dissolved=True)
 
 
-def polsby_popper() -> Score:
+def polsby_popper(
+    dissolved: bool = True, geometry: Optional[UnitGeometry] = None
+) -> Score:
     """
     Returns the polsby-popper score for each district in a plan.
 
+    Args:
+        dissolved (bool, optional): Whether to compute the score on dissolved
+            district geometries. If False, district areas and perimeters are
+            instead summed over the units of the dual graph from a table of
+            unit areas and boundary lengths, so no dissolve is needed, chains
+            are scored incrementally, and the score can be batched. Defaults to
+            True.
+        geometry (UnitGeometry, optional): The table of unit areas and boundary
+            lengths to use when `dissolved` is False. Defaults to the boundary
+            data on a dual graph built by `Graph.from_geodataframe`; build one
+            with `UnitGeometry.from_geodataframe` to measure in another CRS.
+
     Returns:
         A dictionary with districts as keys and polsby-popper scores as values.
     """
-
+    if not dissolved or geometry is not None:
+        return Score(
+            "polsby_popper",
+            partial(_polsby_popper_graph, geometry=geometry),
+            batch=partial(_polsby_popper_batch, geometry=geometry),
+            requires=(district_boundaries(geometry),),
+        )
     return Score("polsby_popper", _polsby_popper, dissolved=True)
 
 
-def schwartzberg() -> Score:
+def schwartzberg(
+    dissolved: bool = True, geometry: Optional[UnitGeometry] = None
+) -> Score:
     """
     Returns the schwartzberg score for each district in a plan.
+
+    Args:
+        dissolved (bool, optional): Whether to compute the score on dissolved
+            district geometries. See `polsby_popper`. Defaults to True.
+        geometry (UnitGeometry, optional): The table of unit areas and boundary
+            lengths to use when `dissolved` is False. See `polsby_popper`.
+
     Returns:
         A dictionary with districts as keys and schwartzberg scores as values.
     """
+    if not dissolved or geometry is not None:
+        return Score(
+            "schwartzberg",
+            partial(_schwartzberg_graph, geometry=geometry),
+            batch=partial(_schwartzberg_batch, geometry=geometry),
+            requires=(district_boundaries(geometry),),
+        )
     return Score("schwartzberg", _schwartzberg, dissolved=True)
 
 
@@ -731,18 +1244,46 @@ def convex_hull() -> Score:
     return Score("convex_hull", _convex_hull, dissolved=True)
 
 
-def pop_polygon(block_gdf: GeoDataFrame, pop_col: str = "TOTPOP20") -> Score:
+def pop_polygon(
+    block_gdf: GeoDataFrame,
+    pop_col: str = "TOTPOP20",
+    geometry: Optional[UnitGeometry] = None,
+) -> Score:
     """
-    Returns the population polygon compactness metric for each district in a plan.
+    Returns the population polygon compactness metric for each district in a plan:
+    the population of the district over the population of its convex hull. A block
+    counts towards a polygon's population when its representative point lies in
+    the polygon; block points are indexed once, when the score is created.
+
     Args:
         block_gdf (GeoDataFrame): Block level shapefile for the state.
         pop_col (str): Population column reflected in block_gdf and gdf.
+        geometry (UnitGeometry, optional): Boundary data and convex hulls of the
+            dual graph's units, from `UnitGeometry.from_geodataframe`. If passed,
+            district hulls are built from the cached hulls of their boundary
+            units instead of dissolved geometries, district populations are read
+            from `pop_col` on the dual graph, and the score can be batched.
+
     Returns:
         A dictionary with districts as keys and population polygon scores as values.
     """
+    blocks = _BlockIndex(block_gdf, pop_col)
+    if geometry is not None:
+        if geometry.hulls is None:
+            raise ValueError(
+                "Population polygons need unit hulls; build the UnitGeometry with "
+                "UnitGeometry.from_geodataframe."
+            )
+        kwargs = dict(blocks=blocks, geometry=geometry, pop_col=pop_col)
+        return Score(
+            "pop_polygon",
+            partial(_pop_polygon_graph, **kwargs),
+            batch=partial(_pop_polygon_batch, **kwargs),
+            requires=(district_hulls(geometry),),
+        )
     return Score(
         "pop_polygon",
-        partial(_pop_polygon, block_gdf=block_gdf, pop_col=pop_col),
+        partial(_pop_polygon, blocks=blocks),
         dissolved=True,
     )
 
@@ -751,7 +1292,33 @@ def cut_edges() -> Score:
     """
     Returns the number of cut edges in a plan.
     """
-    return Score("cut_edges", partial(_cut_edges))
+    return Score("cut_edges", partial(_cut_edges), batch=_cut_edges_batch)
+
+
+def district_components() -> Score:
+    """
+    Returns the number of connected components of each district in a plan; a
+    plan is contiguous when every count is 1. In `summarize_batch`, the
+    components of every plan in a block are labelled at once.
+    """
+    return Score(
+        "district_components",
+        partial(_district_components),
+        batch=_district_components_batch,
+    )
+
+
+def stray_nodes() -> Score:
+    """
+    Returns, for each discontiguous district in a plan, the nodes outside its
+    largest connected component. Contiguous plans have no entries.
+    """
+    return Score(
+        "stray_nodes",
+        partial(_stray_nodes),
+        batch=_stray_nodes_batch,
+        varying_keys=True,
+    )
 
 
 def max_deviation(totpop_col: str, pct: bool = False) -> Score:
@@ -768,4 +1335,5 @@ def max_deviation(totpop_col: str, pct: bool = False) -> Score:
     return Score(
         f"{totpop_col}_max_deviation",
         partial(_max_deviation, totpop_col=totpop_col, pct=pct),
+        batch=partial(_max_deviation_batch, totpop_col=totpop_col, pct=pct),
     )
@@ -1,9 +1,14 @@
-from typing import List, Union
+from typing import Any, List, Optional, Union
+from weakref import WeakKeyDictionary
 
-from gerrychain import Partition
+import numpy as np
+import pandas as pd
+from gerrychain import Graph, Partition
+from gerrychain.graph import FrozenGraph
 from gerrychain.updaters import CountySplit
 
 from ..geometry import dataframe
+from .context import _plan_cached, _same_districts
 
 
 def _grouper(P: Partition, unit: str, popcol: str = None) -> list:
@@ -45,12 +50,217 @@ def _grouper(P: Partition, unit: str, popcol: str = None) -> list:
     ]
 
 
+class UnitIndex:
+    """
+    Integer codes assigning each node of a dual graph to the unit (county, VTD,
+    place, ...) it belongs to, for every unit column requested so far, along
+    with the masks of populated nodes. Built once per graph (see `_unit_index`)
+    and shared by the split and piece scores of every plan drawn on it.
+
+    Attributes:
+        nodes (list): Node labels, in the order of the code arrays.
+        position (dict): Maps node labels to their position in `nodes`.
+        units (list): The unit columns indexed so far, in the order they were
+            first requested.
+    """
+
+    def __init__(self, graph: Graph):
+        self.graph = graph
+        self.nodes = list(graph.nodes)
+        self.position = {node: i for i, node in enumerate(self.nodes)}
+        self.units = []
+        self._codes = {}
+        self._names = {}
+        self._populated = {}
+
+    def codes(self, unit: str) -> np.ndarray:
+        """
+        Returns each node's position in `names(unit)`, or -1 for nodes without
+        a value for `unit`.
+        """
+        if unit not in self._codes:
+            codes, names = pd.factorize(
+                pd.Series([self.graph.nodes[n].get(unit) for n in self.nodes]),
+                sort=True,
+            )
+            self._codes[unit], self._names[unit] = codes, names.tolist()
+            self.units.append(unit)
+        return self._codes[unit]
+
+    def names(self, unit: str) -> list:
+        """
+        Returns the sorted identifiers of the units in column `unit`.
+        """
+        self.codes(unit)
+        return self._names[unit]
+
+    def populated(self, popcol: Optional[str]) -> Optional[np.ndarray]:
+        """
+        Returns a mask of the nodes with positive `popcol`, or None if `popcol`
+        isn't passed.
+        """
+        if popcol is None:
+            return None
+        if popcol not in self._populated:
+            values = pd.Series([self.graph.nodes[n].get(popcol) for n in self.nodes])
+            self._populated[popcol] = (values > 0).to_numpy()
+        return self._populated[popcol]
+
+
+# Unit indices by the (unfrozen) graph they index; dropped with the graph.
+_UNIT_INDEXES = WeakKeyDictionary()
+
+
+def _unit_index(graph: Graph) -> UnitIndex:
+    """
+    Returns the `UnitIndex` of `graph`, building it on first use.
+    """
+    graph = graph.graph if isinstance(graph, FrozenGraph) else graph
+    index = _UNIT_INDEXES.get(graph)
+    if index is None:
+        index = _UNIT_INDEXES[graph] = UnitIndex(graph)
+    return index
+
+
+class _UnitContingency:
+    """
+    The sparse unit × district contingency table of a plan for several unit
+    columns at once: which (populated) units of each column meet which
+    districts, and how many districts each unit is spread across. Built with a
+    single sort over every column; moving a node between districts afterwards
+    updates the counts in constant time per column.
+
+    Attributes:
+        units (tuple): The unit columns covered.
+        spread (np.ndarray): Number of districts each unit meets, for all units
+            of all columns, column after column.
+        splits (dict): Number of units split, by column.
+        pieces (dict): Number of pieces of split units, by column.
+    """
+
+    def __init__(self, P: Partition, index: UnitIndex, popcol: Optional[str]):
+        self.index = index
+        self.units = tuple(index.units)
+        self.populated = index.populated(popcol)
+        self.districts = {d: i for i, d in enumerate(sorted(P.parts))}
+
+        sizes = [len(index.names(unit)) for unit in self.units]
+        starts = np.cumsum([0] + sizes)
+        self.slices = {
+            unit: slice(start, stop)
+            for unit, start, stop in zip(self.units, starts, starts[1:])
+        }
+
+        width = len(self.districts)
+        assignment = np.fromiter(
+            (self.districts[P.assignment[n]] for n in index.nodes),
+            dtype=np.int64,
+            count=len(index.nodes),
+        )
+        cells = []
+        for unit in self.units:
+            codes = index.codes(unit)
+            keep = codes >= 0
+            if self.populated is not None:
+                keep &= self.populated
+            cells.append(
+                (codes[keep] + self.slices[unit].start) * width + assignment[keep]
+            )
+        self._cells, self._counts = np.unique(np.concatenate(cells), return_counts=True)
+        self._table = None
+        self.spread = np.bincount(self._cells // width, minlength=starts[-1])
+
+        self.splits, self.pieces = {}, {}
+        for unit in self.units:
+            spread = self.spread[self.slices[unit]]
+            self.splits[unit] = int((spread > 1).sum())
+            self.pieces[unit] = int(spread[spread > 1].sum())
+
+    def move(self, node: Any, old: Any, new: Any):
+        """
+        Moves `node` from district `old` to district `new`.
+        """
+        position = self.index.position[node]
+        if self.populated is not None and not self.populated[position]:
+            return
+        if self._table is None:
+            # Node counts per cell, as a dict so updates stay sparse.
+            self._table = dict(zip(self._cells.tolist(), self._counts.tolist()))
+
+        table, width = self._table, len(self.districts)
+        old, new = self.districts[old], self.districts[new]
+        for unit in self.units:
+            code = self.index.codes(unit)[position]
+            if code < 0:
+                continue
+            row = code + self.slices[unit].start
+            before = self.spread[row]
+
+            cell = row * width + old
+            table[cell] -= 1
+            if not table[cell]:
+                del table[cell]
+                self.spread[row] -= 1
+            cell = row * width + new
+            if cell not in table:
+                table[cell] = 0
+                self.spread[row] += 1
+            table[cell] += 1
+
+            after = self.spread[row]
+            self.splits[unit] += int(after > 1) - int(before > 1)
+            self.pieces[unit] += int(after if after > 1 else 0) - int(
+                before if before > 1 else 0
+            )
+
+    def names(self, unit: str) -> list:
+        """
+        Returns the sorted identifiers of the units of `unit` that are split.
+        """
+        names = self.index.names(unit)
+        return [names[i] for i in np.flatnonzero(self.spread[self.slices[unit]] > 1)]
+
+
+def _unit_contingency(P: Partition, unit: str, popcol: str = None) -> _UnitContingency:
+    """
+    Returns the `_UnitContingency` of `P` covering `unit`. It covers every unit
+    column indexed on `P`'s graph, so the split and piece scores of a plan
+    share one table no matter how many unit columns they ask about, and along
+    a chain it's updated from the parent plan's.
+    """
+    index = _unit_index(P.graph)
+    index.codes(unit)
+    return _plan_cached(
+        P,
+        ("unit_contingency", tuple(index.units), popcol),
+        lambda: _UnitContingency(P, index, popcol),
+        lambda previous: _update_unit_contingency(previous, P, index, popcol),
+    )
+
+
+def _update_unit_contingency(
+    contingency: _UnitContingency, P: Partition, index: UnitIndex, popcol: str
+) -> _UnitContingency:
+    """
+    Moves the nodes flipped to make `P` from its parent into their new
+    districts.
+    """
+    if not _same_districts(P):
+        return _UnitContingency(P, index, popcol)
+
+    assignment = P.parent.assignment
+    for node, district in P.flips.items():
+        if assignment[node] != district:
+            contingency.move(node, assignment[node], district)
+    return contingency
+
+
 def _splits(
     P: Partition,
     unit: str,
     names: bool = False,
     popcol: str = None,
-    how: str = "pandas",
+    how: str = "index",
     unit_info_updater_col: str = None,
 ) -> Union[int, List[str]]:
     """
@@ -70,8 +280,9 @@ def _splits(
             graph. If this is passed, then a unit is only considered "split" if
             the _populated_ base units end up in different districts.
         how (str, optional): How do we perform these calculations on the back
-            end? Acceptable values are `"pandas"` and `"gerrychain"`; defaults to
-            `"pandas"`.
+            end? Acceptable values are `"index"`, `"pandas"`, and `"gerrychain"`;
+            defaults to `"index"`, which counts splits from a unit index built
+            once per graph (see `UnitIndex`).
         names (bool, optional): Whether we return the identifiers of the things
             being split.
         unit_info_updater_col (str, optional): The name of the corresponsing
@@ -82,9 +293,14 @@ def _splits(
         The number of splits or the list of things split.
     """
     # Validate the `how` parameter.
-    if how not in {"pandas", "gerrychain"}:
-        print(f'"{how}" is not a valid parameter to `how`. Defaulting to pandas.')
-        how = "pandas"
+    if how not in {"index", "pandas", "gerrychain"}:
+        print(f'"{how}" is not a valid parameter to `how`. Defaulting to index.')
+        how = "index"
+
+    # Read the splits off the plan's unit × district contingency table.
+    if how == "index":
+        contingency = _unit_contingency(P, unit, popcol)
+        return contingency.names(unit) if names else contingency.splits[unit]
 
     # If we're calculating splits from a dataframe, create the dataframe and do
     # the required operations.
@@ -115,7 +331,7 @@ def _pieces(
     unit: str,
     names: bool = False,
     popcol: str = None,
-    how: str = "pandas",
+    how: str = "index",
     unit_info_updater_col: str = None,
 ) -> Union[int, List[str]]:
     """
@@ -138,8 +354,9 @@ def _pieces(
             graph. If this is passed, then a unit is only considered "split" if
             the _populated_ base units end up in different districts.
         how (str, optional): How do we perform these calculations on the back
-            end? Acceptable values are `"pandas"` and `"gerrychain"`; defaults to
-            `"pandas"`.
+            end? Acceptable values are `"index"`, `"pandas"`, and `"gerrychain"`;
+            defaults to `"index"`, which counts splits from a unit index built
+            once per graph (see `UnitIndex`).
         names (bool, optional): Whether we return the identifiers of the things
             being split.
         unit_info_updater_col (str, optional): The name of the corresponsind county_splits updater
@@ -150,14 +367,17 @@ def _pieces(
         The number of pieces or the list of things split.
     """
     # Validate the `how` parameter.
-    if how not in {"pandas", "gerrychain"}:
-        print(f'"{how}" is not a valid parameter to `how`. Defaulting to pandas.')
-        how = "pandas"
+    if how not in {"index", "pandas", "gerrychain"}:
+        print(f'"{how}" is not a valid parameter to `how`. Defaulting to index.')
+        how = "index"
 
     # If they just want the list of names, return the splits.
     if names:
         return _splits(P, unit, names=names, popcol=popcol, how=how)
 
+    if how == "index":
+        return _unit_contingency(P, unit, popcol).pieces[unit]
+
     # Otherwise, do some similar stuff to the splitting except that we're getting
     # the number of pieces instead of whether the unit's split.
     if how == "pandas":
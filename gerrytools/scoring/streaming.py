@@ -0,0 +1,494 @@
+import json
+import math
+import random
+from numbers import Real
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def _number(value) -> Optional[float]:
+    """
+    Returns `value` as a float if it's a finite number, and `None` otherwise.
+    """
+    if isinstance(value, (Real, np.number)) and math.isfinite(value):
+        return float(value)
+    return None
+
+
+class Moments:
+    """
+    The count, mean, variance, minimum and maximum of a stream of numbers,
+    updated in constant memory with Welford's method. Two instances merge
+    exactly, so streams can be split across shards.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x: float, weight: int = 1):
+        """
+        Adds `x`, counted `weight` times.
+        """
+        self.count += weight
+        delta = x - self.mean
+        self.mean += delta * weight / self.count
+        self.m2 += weight * delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def merge(self, other: "Moments") -> "Moments":
+        """
+        Adds the numbers seen by `other`.
+        """
+        if other.count:
+            count = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + delta**2 * self.count * other.count / count
+            self.count = count
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        """
+        The sample variance, or `nan` for fewer than two numbers.
+        """
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "Moments":
+        moments = cls()
+        moments.count, moments.mean, moments.m2 = (
+            state["count"],
+            state["mean"],
+            state["m2"],
+        )
+        if state["count"]:
+            moments.min, moments.max = state["min"], state["max"]
+        return moments
+
+
+class QuantileSketch:
+    """
+    A KLL sketch: approximate quantiles of a stream of numbers in memory that
+    grows with the logarithm of the stream's length. Items are kept in levels;
+    an item at level `h` stands for `2 ** h` items of the stream. When a level
+    is full, it's sorted and every other item is promoted to the next level.
+    With the default `k`, ranks are typically within about 1% of the truth.
+    Sketches merge level by level, so streams can be split across shards.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        """
+        Args:
+            k (int, optional): Capacity of the top level; larger is more
+                accurate. Defaults to 200.
+            seed (int, optional): Seed for the choice of items promoted.
+        """
+        self.k = k
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels: List[list] = [[]]
+        self._rng = random.Random(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def update(self, x: float, weight: int = 1):
+        """
+        Adds `x`, counted `weight` times: `x` is placed at each level whose
+        bit is set in `weight`.
+        """
+        self.count += weight
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        level = 0
+        while weight:
+            if weight & 1:
+                while len(self.levels) <= level:
+                    self.levels.append([])
+                self.levels[level].append(x)
+            weight >>= 1
+            level += 1
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Adds the numbers seen by `other`.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self):
+        while sum(map(len, self.levels)) > sum(
+            self._capacity(h) for h in range(len(self.levels))
+        ):
+            for h, items in enumerate(self.levels):
+                if len(items) >= self._capacity(h):
+                    self._compact(h)
+                    break
+
+    def _compact(self, h: int):
+        items = sorted(self.levels[h])
+        if h + 1 == len(self.levels):
+            self.levels.append([])
+        # An odd item out stays behind; of the rest, the odd or the even ones
+        # are promoted at random, which keeps ranks unbiased.
+        leftover = [items.pop()] if len(items) % 2 else []
+        self.levels[h + 1].extend(items[self._rng.getrandbits(1) :: 2])
+        self.levels[h] = leftover
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        """
+        Returns the approximate `q`-quantile of the stream for each `q` in
+        `qs`, or `nan`s if nothing has been seen.
+
+        Args:
+            qs (Iterable[float]): Quantiles, between 0 and 1.
+        """
+        qs = np.asarray(list(qs), dtype=float)
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+        items = np.concatenate(
+            [np.asarray(level, dtype=float) for level in self.levels]
+        )
+        weights = np.concatenate(
+            [np.full(len(level), 2.0**h) for h, level in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        values = items[np.clip(index, 0, len(items) - 1)]
+        values = np.where(qs <= 0, self.min, values)
+        return np.where(qs >= 1, self.max, values)
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def to_dict(self) -> dict:
+        return {
+            "k": self.k,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "levels": self.levels,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict, seed: int = 0) -> "QuantileSketch":
+        sketch = cls(state["k"], seed)
+        sketch.count = state["count"]
+        sketch.levels = [list(level) for level in state["levels"]]
+        if state["count"]:
+            sketch.min, sketch.max = state["min"], state["max"]
+        return sketch
+
+
+class Histogram:
+    """
+    Counts of a stream of numbers in fixed bins. Numbers below the first edge
+    or above the last are counted in `underflow` and `overflow`; the last bin
+    includes its right edge, as in `np.histogram`.
+    """
+
+    def __init__(self, edges: Sequence[float]):
+        """
+        Args:
+            edges (Sequence[float]): Increasing bin edges.
+        """
+        self.edges = np.asarray(edges, dtype=float)
+        if (
+            self.edges.ndim != 1
+            or len(self.edges) < 2
+            or np.any(np.diff(self.edges) <= 0)
+        ):
+            raise ValueError("Histogram edges must be at least two increasing numbers.")
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, x: float, weight: int = 1):
+        """
+        Adds `x`, counted `weight` times.
+        """
+        if x < self.edges[0]:
+            self.underflow += weight
+        elif x > self.edges[-1]:
+            self.overflow += weight
+        else:
+            index = np.searchsorted(self.edges, x, side="right") - 1
+            self.counts[min(index, len(self.counts) - 1)] += weight
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        """
+        Adds the counts of `other`, which must have the same edges.
+        """
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Only histograms with the same bins can be merged.")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    @property
+    def centers(self) -> np.ndarray:
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    def to_dict(self) -> dict:
+        return {
+            "edges": self.edges.tolist(),
+            "counts": self.counts.tolist(),
+            "underflow": self.underflow,
+            "overflow": self.overflow,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "Histogram":
+        histogram = cls(state["edges"])
+        histogram.counts = np.asarray(state["counts"], dtype=np.int64)
+        histogram.underflow, histogram.overflow = state["underflow"], state["overflow"]
+        return histogram
+
+
+class EnsembleStatistics:
+    """
+    Streaming statistics of an ensemble's scores, kept in memory that doesn't
+    grow with the number of plans. Pass one to `summarize_many` as `statistics`,
+    or feed it summaries with `update`.
+
+    Every numeric plan-wide score gets its `Moments` and a `QuantileSketch`,
+    plus a `Histogram` if bins are given for it. Mapping-valued scores are
+    tracked key by key under the names `"{score}.{key}"` (as in columnar
+    output), except those listed in `ranked`: these are district-wide scores
+    whose values are sorted in each plan, the smallest going to the sketch of
+    rank 0, the next to rank 1, and so on, as drawn in the sorted boxplots of
+    an ensemble.
+
+    Summaries made with `dedupe` count `"multiplicity"` times. Statistics of
+    separate shards of an ensemble can be saved, loaded and merged.
+
+    Example:
+
+        statistics = EnsembleStatistics(
+            bins={"cut_edges": range(0, 501, 5)}, ranked=["BVAP20_share"]
+        )
+        summarize_many(chain, scores, statistics=statistics)
+        histogram(ax, {"ensemble": statistics.histograms["cut_edges"], ...})
+        boxplot(ax, {"ensemble": statistics.ranks["BVAP20_share"]})
+    """
+
+    def __init__(
+        self,
+        bins: Optional[Mapping[str, Sequence[float]]] = None,
+        ranked: Iterable[str] = (),
+        k: int = 200,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            bins (Mapping[str, Sequence[float]], optional): Histogram bin edges
+                for the scores to histogram, by score name.
+            ranked (Iterable[str], optional): Names of the district-wide scores
+                to track by rank.
+            k (int, optional): Size of the quantile sketches. Defaults to 200.
+            seed (int, optional): Seed for the quantile sketches.
+        """
+        self.bins = {
+            name: [float(e) for e in edges] for name, edges in (bins or {}).items()
+        }
+        self.ranked = sorted(ranked)
+        self.k = k
+        self.seed = seed
+        self.plans = 0
+        self.moments: Dict[str, Moments] = {}
+        self.sketches: Dict[str, QuantileSketch] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.ranks: Dict[str, List[QuantileSketch]] = {}
+
+    def update(self, summary: Mapping):
+        """
+        Adds a plan's summary. Values that aren't finite numbers are skipped.
+
+        Args:
+            summary (Mapping): The plan's summary, as made by `summarize`.
+        """
+        weight = int(summary.get("multiplicity", 1))
+        self.plans += weight
+        for name, value in summary.items():
+            if name in ("id", "multiplicity"):
+                continue
+            if not isinstance(value, Mapping):
+                self._observe(name, value, weight)
+            elif name in self.ranked:
+                self._rank(name, value.values(), weight)
+            else:
+                for key, v in value.items():
+                    self._observe(f"{name}.{key}", v, weight)
+
+    def _observe(self, name: str, value, weight: int):
+        x = _number(value)
+        if x is None:
+            return
+        if name not in self.moments:
+            self.moments[name] = Moments()
+            self.sketches[name] = QuantileSketch(self.k, self.seed)
+            if name in self.bins:
+                self.histograms[name] = Histogram(self.bins[name])
+        self.moments[name].update(x, weight)
+        self.sketches[name].update(x, weight)
+        if name in self.histograms:
+            self.histograms[name].update(x, weight)
+
+    def _rank(self, name: str, values: Iterable, weight: int):
+        values = sorted(x for x in map(_number, values) if x is not None)
+        ranks = self.ranks.setdefault(name, [])
+        while len(ranks) < len(values):
+            ranks.append(QuantileSketch(self.k, self.seed))
+        for sketch, x in zip(ranks, values):
+            sketch.update(x, weight)
+
+    def merge(self, other: "EnsembleStatistics") -> "EnsembleStatistics":
+        """
+        Adds the statistics of `other`, which must have been made with the same
+        bins and ranked scores.
+
+        Raises:
+            ValueError: If `other` tracks different bins or ranked scores.
+        """
+        if (other.bins, other.ranked) != (self.bins, self.ranked):
+            raise ValueError(
+                "Only statistics with the same bins and ranked scores can be merged."
+            )
+        self.plans += other.plans
+        for name, moments in other.moments.items():
+            if name not in self.moments:
+                self.moments[name] = Moments()
+                self.sketches[name] = QuantileSketch(self.k, self.seed)
+            self.moments[name].merge(moments)
+            self.sketches[name].merge(other.sketches[name])
+        for name, histogram in other.histograms.items():
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(histogram.edges)
+            self.histograms[name].merge(histogram)
+        for name, sketches in other.ranks.items():
+            ranks = self.ranks.setdefault(name, [])
+            while len(ranks) < len(sketches):
+                ranks.append(QuantileSketch(self.k, self.seed))
+            for sketch, other_sketch in zip(ranks, sketches):
+                sketch.merge(other_sketch)
+        return self
+
+    def quantiles(self, name: str, qs: Iterable[float]) -> np.ndarray:
+        """
+        Returns the approximate quantiles `qs` of the score `name`.
+        """
+        return self.sketches[name].quantiles(qs)
+
+    def rank_quantiles(self, name: str, qs: Iterable[float]) -> np.ndarray:
+        """
+        Returns a (ranks × quantiles) array of the approximate quantiles `qs`
+        of the ranked score `name` at each rank.
+        """
+        qs = list(qs)
+        return np.array([sketch.quantiles(qs) for sketch in self.ranks[name]])
+
+    def summary(self, qs: Sequence[float] = (0.25, 0.5, 0.75)) -> pd.DataFrame:
+        """
+        Returns a table with a row per tracked score: its count, mean, standard
+        deviation, minimum, maximum and approximate quantiles `qs`.
+        """
+        rows = []
+        for name, moments in self.moments.items():
+            row = {
+                "name": name,
+                "count": moments.count,
+                "mean": moments.mean,
+                "std": moments.std,
+                "min": moments.min,
+                "max": moments.max,
+            }
+            row.update(zip([f"q{q:g}" for q in qs], self.quantiles(name, qs)))
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def to_dict(self) -> dict:
+        return {
+            "bins": self.bins,
+            "ranked": self.ranked,
+            "k": self.k,
+            "seed": self.seed,
+            "plans": self.plans,
+            "moments": {name: m.to_dict() for name, m in self.moments.items()},
+            "sketches": {name: s.to_dict() for name, s in self.sketches.items()},
+            "histograms": {name: h.to_dict() for name, h in self.histograms.items()},
+            "ranks": {
+                name: [s.to_dict() for s in sketches]
+                for name, sketches in self.ranks.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "EnsembleStatistics":
+        statistics = cls(state["bins"], state["ranked"], state["k"], state["seed"])
+        seed = state["seed"]
+        statistics.plans = state["plans"]
+        statistics.moments = {
+            name: Moments.from_dict(m) for name, m in state["moments"].items()
+        }
+        statistics.sketches = {
+            name: QuantileSketch.from_dict(s, seed)
+            for name, s in state["sketches"].items()
+        }
+        statistics.histograms = {
+            name: Histogram.from_dict(h) for name, h in state["histograms"].items()
+        }
+        statistics.ranks = {
+            name: [QuantileSketch.from_dict(s, seed) for s in sketches]
+            for name, sketches in state["ranks"].items()
+        }
+        return statistics
+
+    def save(self, path: str):
+        """
+        Writes the statistics to `path` as JSON, e.g. to merge shards later.
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "EnsembleStatistics":
+        """
+        Reads statistics written by `save`.
+        """
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Callable, Mapping, NamedTuple, Union
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Mapping, NamedTuple, Optional, Tuple, Union
 
 from geopandas import GeoDataFrame
 from gerrychain import Partition
@@ -9,7 +9,14 @@ from gerrychain import Partition
 
     * A Score is a named tuple of a name and function that takes a `gerrychain.Partition` instance and
     returns a ScoreValue.  The function associated with the Score should be deterministic, that is
-    always return the same value given the same partition.
+    always return the same value given the same partition. A Score may also carry a `batch`
+    function, which takes a `gerrytools.scoring.batch.PlanBlock` of many plans and returns one
+    ScoreValue per plan in the block, and may declare the Products it `requires`.
+    * A Product is a named intermediate (e.g. a plan's vote-share matrix) shared by the scores that
+    require it. `summarize` builds each required Product once per plan, before any score runs, and
+    scores read it back from the plan context. A Score whose mapping has different keys from plan
+    to plan (e.g. only the discontiguous districts) sets `varying_keys`; such scores can't be
+    written to columnar files, whose columns are fixed when the file is created.
     * A ScoreValue is either a numeric, a mapping from districts to numerics, or a mapping from
     elections to numerics.
 """
@@ -25,8 +32,19 @@ ElectionWideScoreValue = Mapping[ElectionID, Numeric]
 ScoreValue = Union[PlanWideScoreValue, DistrictWideScoreValue, ElectionWideScoreValue]
 
 
+@dataclass(frozen=True)
+class Product:
+    name: str
+    build: Callable[..., Any] = field(compare=False)
+    args: tuple = ()
+    prepare: Optional[Callable[..., None]] = field(default=None, compare=False)
+
+
 @dataclass
 class Score:
     name: str
     apply: Callable[[Union[Partition, GeoDataFrame]], ScoreValue]
     dissolved: bool = False
+    batch: Optional[Callable[[Any], List[ScoreValue]]] = None
+    requires: Tuple[Product, ...] = ()
+    varying_keys: bool = False
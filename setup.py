@@ -37,7 +37,7 @@ setup(
     long_description=DESCRIPTION,
     long_description_content_type="text/markdown",
     url="https://github.com/mggg/gerrytools",
-    packages=find_packages(exclude=["tests", "tutorials"]),
+    packages=find_packages(exclude=["tests", "tutorials", "benchmarks"]),
     install_requires=requirements,
     include_package_data=True,
     extras_require={
@@ -51,5 +51,8 @@ setup(
             "isort",
         ],
         "mgrp": ["docker>=7.0.0"],
+        "columnar": ["pyarrow"],
+        "cli": ["pyarrow", "pyyaml"],
     },
+    entry_points={"console_scripts": ["gerrytools=gerrytools.cli:main"]},
 )
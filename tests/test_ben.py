@@ -0,0 +1,436 @@
+import json
+import lzma
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from gerrytools.ben import (
+    BenIndex,
+    BenWriter,
+    DockerSession,
+    assignment_arrays,
+    ben_replay,
+    codec,
+)
+from gerrytools.ben import index as ben_index
+from gerrytools.ben import index_ben, read_ben
+from gerrytools.mgrp.run_container import _array_outputs
+
+# Files made from plans.jsonl by binary-ensemble 2.0.0, with
+# encode_jsonl_to_ben and encode_jsonl_to_xben for each variant; the
+# *_blocks.xben files with n_threads=2 and xz_block_size=1024, which splits
+# them into several XZ blocks.
+FIXTURES = Path(__file__).parent / "fixtures" / "ben"
+REFERENCE_FILES = [
+    "standard.ben",
+    "mkv_chain.ben",
+    "standard.xben",
+    "mkv_chain.xben",
+    "standard_blocks.xben",
+    "mkv_chain_blocks.xben",
+]
+
+
+@pytest.fixture(scope="module")
+def reference_plans():
+    with open(FIXTURES / "plans.jsonl") as f:
+        return [json.loads(line)["assignment"] for line in f]
+
+
+def _runs(assignment):
+    values, lengths = [], []
+    for v in assignment:
+        if values and values[-1] == v:
+            lengths[-1] += 1
+        else:
+            values.append(v)
+            lengths.append(1)
+    return values, lengths
+
+
+def _frame(assignment):
+    """A BEN frame, packed bit by bit as the BEN tool does."""
+    values, lengths = _runs(assignment)
+    value_bits, length_bits = (
+        max(max(values).bit_length(), 1),
+        max(lengths).bit_length(),
+    )
+    bits = "".join(
+        f"{v:0{value_bits}b}{n:0{length_bits}b}" for v, n in zip(values, lengths)
+    )
+    bits += "0" * (-len(bits) % 8)
+    packed = int(bits, 2).to_bytes(len(bits) // 8, "big")
+    return bytes([value_bits, length_bits]) + len(packed).to_bytes(4, "big") + packed
+
+
+def _ben32(assignment):
+    values, lengths = _runs(assignment)
+    runs = b"".join(
+        v.to_bytes(2, "big") + n.to_bytes(2, "big") for v, n in zip(values, lengths)
+    )
+    return runs + bytes(4)
+
+
+def _write(path, samples, mkv=False, xz=False):
+    """
+    Writes `samples`, a list of (assignment, count) pairs. XBEN files are one
+    XZ stream, banner included.
+    """
+    banner = b"MKVCHAIN BEN FILE" if mkv else b"STANDARD BEN FILE"
+    encode = _ben32 if xz else _frame
+    body = banner
+    for assignment, count in samples:
+        body += encode(assignment)
+        body += count.to_bytes(2, "big") if mkv else b""
+    with open(path, "wb") as f:
+        f.write(lzma.compress(body) if xz else body)
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(2024)
+    plans = []
+    for k in range(40):
+        # Blocky plans with long runs, and one district label wider than a byte.
+        plan = np.repeat(rng.integers(1, 9, 60), rng.integers(1, 40, 60))
+        plan[k] = 300 if k % 7 == 0 else plan[k]
+        plans.append(plan.tolist())
+    return plans
+
+
+def test_read_ben__bit_order(tmp_path):
+    # Runs (1, 2) and (2, 3), two bits each: 01 10 10 11.
+    path = tmp_path / "plan.ben"
+    path.write_bytes(b"STANDARD BEN FILE" + bytes([2, 2, 0, 0, 0, 1, 0b01101011]))
+    (assignment,) = read_ben(str(path))
+    assert assignment.tolist() == [1, 1, 2, 2, 2]
+    assert assignment.dtype == np.uint16
+    assert not assignment.flags.writeable
+
+
+@pytest.mark.parametrize("xz", [False, True])
+@pytest.mark.parametrize("mkv", [False, True])
+def test_read_ben__round_trip(tmp_path, samples, monkeypatch, mkv, xz):
+    # A small read size makes samples straddle the XBEN buffer's refills.
+    monkeypatch.setattr(codec, "_CHUNK", 97)
+    counts = [1 + k % 3 if mkv else 1 for k in range(len(samples))]
+    path = tmp_path / ("ensemble.xben" if xz else "ensemble.ben")
+    _write(path, list(zip(samples, counts)), mkv=mkv, xz=xz)
+
+    expected = [plan for plan, count in zip(samples, counts) for _ in range(count)]
+    assert [a.tolist() for a in read_ben(str(path))] == expected
+    assert [a.tolist() for a in read_ben(str(path), repeat=False)] == samples
+    assert list(ben_replay(str(path), native=True)) == [
+        dict(enumerate(plan)) for plan in expected
+    ]
+
+
+@pytest.mark.parametrize("name", REFERENCE_FILES)
+def test_read_ben__reference_files(reference_plans, name):
+    path = str(FIXTURES / name)
+    assert [a.tolist() for a in read_ben(path)] == reference_plans
+    assert list(ben_replay(path, native=True)) == [
+        dict(enumerate(plan)) for plan in reference_plans
+    ]
+
+
+@pytest.mark.parametrize("xz", [False, True])
+def test_read_ben__truncated(tmp_path, samples, xz):
+    path = tmp_path / "ensemble.ben"
+    _write(path, [(plan, 1) for plan in samples[:3]], xz=xz)
+    data = path.read_bytes()
+    if xz:
+        data = lzma.compress(lzma.decompress(data)[:-3])
+    else:
+        data = data[:-3]
+    path.write_bytes(data)
+
+    with pytest.raises(ValueError, match="partway through a sample"):
+        list(read_ben(str(path)))
+
+    path.write_bytes(b"NOT A BEN FILE AT ALL")
+    with pytest.raises(ValueError, match="unknown banner"):
+        list(read_ben(str(path)))
+
+
+@pytest.mark.parametrize("xz", [False, True])
+@pytest.mark.parametrize("mkv", [False, True])
+def test_ben_writer__round_trip(tmp_path, samples, mkv, xz):
+    path = tmp_path / ("ensemble.xben" if xz else "ensemble.ben")
+    # Chains repeat plans; the Markov-chain variant stores each run once.
+    plans = [plan for k, plan in enumerate(samples) for _ in range(1 + k % 3)]
+    with BenWriter(str(path), variant="mkv_chain" if mkv else "standard") as writer:
+        for k, plan in enumerate(plans):
+            writer.write(np.array(plan) if k % 2 else dict(enumerate(plan)))
+    assert writer.samples == len(plans)
+
+    assert [a.tolist() for a in read_ben(str(path))] == plans
+    unique = samples if mkv else plans
+    assert [a.tolist() for a in read_ben(str(path), repeat=False)] == unique
+
+    # Standard BEN frames are the BEN tool's, byte for byte.
+    if not xz:
+        reference = tmp_path / "reference.ben"
+        _write(reference, [(plan, plans.count(plan)) for plan in unique], mkv=mkv)
+        assert path.read_bytes() == reference.read_bytes()
+
+
+@pytest.mark.parametrize("variant", ["standard", "mkv_chain"])
+def test_ben_writer__reference_files(tmp_path, reference_plans, variant):
+    # The BEN tool's files, byte for byte once decompressed.
+    for suffix in (".ben", ".xben"):
+        path = tmp_path / f"ensemble{suffix}"
+        with BenWriter(str(path), variant=variant) as writer:
+            for plan in reference_plans:
+                writer.write(plan)
+        data, reference = (
+            path.read_bytes(),
+            (FIXTURES / f"{variant}{suffix}").read_bytes(),
+        )
+        if suffix == ".xben":
+            assert data.startswith(b"\xfd7zXZ\x00")
+            data, reference = lzma.decompress(data), lzma.decompress(reference)
+        assert data == reference
+
+    # And the reference decoder reads them, where it's installed.
+    binary_ensemble = pytest.importorskip("binary_ensemble")
+    for suffix, mode in ((".ben", "ben"), (".xben", "xben")):
+        decoder = binary_ensemble.BenDecoder(str(tmp_path / f"ensemble{suffix}"), mode)
+        assert [list(plan) for plan in decoder] == reference_plans
+
+
+def test_ben_writer__limits(tmp_path, monkeypatch):
+    # Runs longer than a u16 are split, and counts past a u16 start a new frame.
+    monkeypatch.setattr(codec, "_MAX_U16", 5)
+    plans = [[1] * 12 + [2] * 3] * 7
+    path = tmp_path / "ensemble.ben"
+    with BenWriter(str(path), variant="mkv_chain") as writer:
+        for plan in plans:
+            writer.write(plan)
+    assert [a.tolist() for a in read_ben(str(path))] == plans
+    assert len(list(read_ben(str(path), repeat=False))) == 2
+
+    with pytest.raises(ValueError, match="district labels must be"):
+        with BenWriter(str(path)) as writer:
+            writer.write([1, 2, 6])
+    with pytest.raises(ValueError, match="Unknown BEN variant"):
+        BenWriter(str(path), variant="ben32")
+
+
+def test_docker_session__paths(tmp_path, monkeypatch):
+    # Mounts are planned without Docker; the container starts on a command.
+    work, outside = tmp_path / "work", tmp_path / "outside dir"
+    work.mkdir()
+    monkeypatch.chdir(work)
+    session = DockerSession(mounts=[str(outside)])
+
+    assert session.path(str(work / "plan.ben")) == "/home/ben/working/plan.ben"
+    assert session.path(str(outside / "a.ben")) == "/home/ben/mnt1/a.ben"
+    assert session.mount(str(outside / "nested")) == "/home/ben/mnt1/nested"
+    assert session.path(str(outside / "b c.ben")) == "'/home/ben/mnt1/b c.ben'"
+    assert session.container is None and session.client is None
+
+    with pytest.raises(ValueError, match="Unknown pull policy"):
+        DockerSession(pull="sometimes")
+    with pytest.raises(ValueError, match="at least one command"):
+        DockerSession(concurrency=0)
+
+
+class _FakeDocker:
+    """
+    Just enough of a Docker client for a session: each command prints itself.
+    """
+
+    def __init__(self):
+        self.started = []
+        self.containers = SimpleNamespace(run=self._run)
+        self.api = SimpleNamespace(
+            exec_create=lambda container, cmd, **kwargs: cmd[-1],
+            exec_start=lambda exec_id, **kwargs: iter([(exec_id.encode(), None)]),
+            exec_inspect=lambda exec_id: {"ExitCode": 0},
+        )
+
+    def _run(self, **kwargs):
+        self.started.append(kwargs["volumes"])
+        name = f"container{len(self.started)}"
+        return SimpleNamespace(id=name, name=name, remove=lambda force: None)
+
+    def close(self):
+        pass
+
+
+def test_docker_session__streaming_holds_the_container(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client = _FakeDocker()
+    session = DockerSession(concurrency=2)
+    session.client = client
+
+    output = session.stream("echo a")
+    assert next(output) == (b"echo a", None)
+    # Another command from the reading thread would wait on the stream, and
+    # the container can't be restarted for a new directory under it.
+    with pytest.raises(RuntimeError, match="same thread"):
+        session.run("echo b")
+    outside = session.path(str(tmp_path.parent / "plan.ben"))
+    future = session.submit(lambda session: session.run(f"cat {outside}"))
+    with pytest.raises(RuntimeError, match="restarted"):
+        future.result()
+    assert len(client.started) == 1
+
+    assert list(output) == []
+    assert session.run(f"cat {outside}") == 0
+    assert len(client.started) == 2
+    session.close()
+
+
+def test_read_ben__arrays(tmp_path, samples):
+    # Plans of an ensemble share a graph, so have the same number of nodes.
+    n = min(len(plan) for plan in samples)
+    samples = [plan[:n] for plan in samples]
+    path = tmp_path / "ensemble.xben"
+    _write(path, [(plan, 1) for plan in samples], xz=True)
+    expected = np.array(samples)
+
+    chunks = list(read_ben(str(path), chunk=16))
+    assert [c.shape for c in chunks] == [(16, n), (16, n), (8, n)]
+    assert np.array_equal(np.concatenate(chunks), expected)
+    assert not any(c.flags.writeable for c in chunks)
+
+    # A reused buffer holds each plan in turn.
+    out = np.empty(expected.shape[1], dtype=np.uint16)
+    for plan, assignment in zip(
+        expected, ben_replay(str(path), native=True, array=True, out=out)
+    ):
+        assert np.shares_memory(assignment, out)
+        assert not assignment.flags.writeable
+        assert np.array_equal(assignment, plan)
+
+    # The fixture has district 300, which doesn't fit in a byte.
+    with pytest.raises(ValueError, match="to be read as uint8"):
+        list(read_ben(str(path), dtype=np.uint8))
+    small = [[d % 256 for d in plan] for plan in samples]
+    _write(path, [(plan, 1) for plan in small], xz=True)
+    (matrix,) = ben_replay(str(path), native=True, dtype=np.uint8, chunk=len(small))
+    assert matrix.dtype == np.uint8 and matrix.tolist() == small
+
+
+def test_assignment_arrays():
+    plans = [[1, 1, 2], [2, 1, 1], [1, 2, 2]]
+    out = np.zeros((2, 3), dtype=np.uint8)
+    rows = [m.tolist() for m in assignment_arrays(plans, np.uint8, out, chunk=2)]
+    assert rows == [plans[:2], plans[2:]]
+
+    with pytest.raises(ValueError, match="uint8 or uint16"):
+        list(assignment_arrays(plans, dtype=np.int64))
+    with pytest.raises(ValueError, match="Can't write a plan of 2 nodes"):
+        list(assignment_arrays([[1, 2, 3], [1, 2]], chunk=2))
+    with pytest.raises(ValueError, match="expected uint16"):
+        list(assignment_arrays(plans, out=np.zeros(3, dtype=np.int32)))
+
+    # Runner output, with what was written to stderr in between plans.
+    outputs = [
+        ({"assignment": plans[0], "sample": 1}, None),
+        (None, "step 2\n"),
+        ({"assignment": plans[1], "sample": 2}, None),
+        ({"assignment": plans[2], "sample": 3}, "step 3\n"),
+    ]
+    batches = list(_array_outputs(iter(outputs), np.uint16, None, 2))
+    assert [(o["sample"], e) for o, e in batches] == [
+        ([1, 2], "step 2\n"),
+        ([3], "step 3\n"),
+    ]
+
+
+@pytest.mark.parametrize("name", REFERENCE_FILES)
+def test_index_ben__reference_files(tmp_path, reference_plans, monkeypatch, name):
+    path = tmp_path / name
+    path.write_bytes((FIXTURES / name).read_bytes())
+    path = str(path)
+    plans = [a.tolist() for a in read_ben(path)]
+    unique = [a.tolist() for a in read_ben(path, repeat=False)]
+
+    index = index_ben(path)
+    assert len(index) == len(plans) == len(reference_plans)
+    assert index.stored == len(unique)
+    if name.endswith("_blocks.xben"):
+        assert len(index.blocks) > 1
+
+    # Only the samples read are decoded.
+    decoded = []
+
+    def counted(decode):
+        def wrapped(*args):
+            decoded.append(args)
+            return decode(*args)
+
+        return wrapped
+
+    for decoder in ("_decode_frame", "_decode_ben32"):
+        monkeypatch.setattr(ben_index, decoder, counted(getattr(ben_index, decoder)))
+    for start, stop, every in [(0, None, 1), (10, None, 9), (37, 90, 4), (-5, None, 2)]:
+        decoded.clear()
+        read = [a.tolist() for a in index.read(start, stop, every)]
+        assert read == plans[start:stop:every]
+        assert len(decoded) <= len(read)
+    assert index[-1].tolist() == plans[-1] and index[3].tolist() == plans[3]
+    assert [a.tolist() for a in index.read(stop=5, repeat=False)] == unique[:5]
+    with pytest.raises(IndexError):
+        index[len(plans)]
+
+
+@pytest.mark.parametrize("mkv", [False, True])
+def test_index_ben__writer_blocks(tmp_path, samples, mkv):
+    path = str(tmp_path / "ensemble.xben")
+    plans = [plan for k, plan in enumerate(samples) for _ in range(1 + k % 3)]
+    variant = "mkv_chain" if mkv else "standard"
+    with BenWriter(path, variant=variant, block_samples=4) as writer:
+        for plan in plans:
+            writer.write(plan)
+
+    # Blocks are written to a single XZ stream, as the BEN tool reads.
+    data = (tmp_path / "ensemble.xben").read_bytes()
+    decompressor = lzma.LZMADecompressor()
+    decompressor.decompress(data)
+    assert decompressor.eof and not decompressor.unused_data
+
+    index = index_ben(path)
+    assert len(index.blocks) > 1
+    assert [a.tolist() for a in index.read(start=10, every=9)] == plans[10::9]
+    assert index[-1].tolist() == plans[-1]
+
+    binary_ensemble = pytest.importorskip("binary_ensemble")
+    assert [list(plan) for plan in binary_ensemble.BenDecoder(path, "xben")] == plans
+
+
+def test_index_ben__stale(tmp_path, samples, monkeypatch):
+    path = str(tmp_path / "ensemble.ben")
+    with BenWriter(path) as writer:
+        for plan in samples:
+            writer.write(plan)
+    index = index_ben(path)
+
+    # The saved index is reused until the file changes.
+    monkeypatch.setattr(BenIndex, "build", None)
+    assert np.array_equal(index_ben(path).offsets, index.offsets)
+    with BenWriter(path) as writer:
+        writer.write(samples[0])
+    with pytest.raises(ValueError, match="changed since it was indexed"):
+        list(index.read())
+    with pytest.raises(ValueError, match="changed since it was indexed"):
+        BenIndex.load(path)
+
+
+def test_index_ben__xz_filters(tmp_path, samples):
+    # Blocks with filters besides LZMA2 are decompressed from the start.
+    path = tmp_path / "ensemble.xben"
+    body = b"".join(codec._encode_ben32(np.array(plan)) for plan in samples)
+    filters = [{"id": lzma.FILTER_DELTA, "dist": 2}, {"id": lzma.FILTER_LZMA2}]
+    path.write_bytes(
+        lzma.compress(b"STANDARD BEN FILE" + body, lzma.FORMAT_XZ, filters=filters)
+    )
+    index = index_ben(str(path), save=False)
+    assert index.blocks is None
+    assert [a.tolist() for a in index.read(start=-7, every=3)] == samples[-7::3]
+    assert index[0].tolist() == samples[0]
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from benchmarks.run import BENCHMARKS, main
+from benchmarks.synthetic import ensemble, synthetic_map
+
+
+@pytest.mark.parametrize("kind", ["grid", "hex"])
+def test_synthetic_map(kind):
+    state_map = synthetic_map(kind, 400)
+    graph, gdf = state_map.graph, state_map.gdf
+    assert len(graph) == len(gdf) == 400
+    assert gdf["GEOID20"].is_unique
+    assert (gdf["GEOID20"].str.len() == 15).all()
+
+    # Every edge of the graph is a shared boundary of its units' geometries.
+    geometries = gdf.geometry.values
+    for u, v in list(graph.edges)[:50]:
+        assert geometries[u].intersection(geometries[v]).length == pytest.approx(
+            graph.edges[u, v]["shared_perim"], rel=1e-5
+        )
+
+    plans = ensemble(state_map, districts=4, plans=3)
+    assert len(plans) == 3
+    assert all(set(plan.values()) == {1, 2, 3, 4} for plan in plans)
+
+
+def test_benchmarks_run(tmp_path):
+    output = tmp_path / "results.json"
+    main(
+        [
+            "--sizes",
+            "100",
+            "--plans",
+            "2",
+            "--districts",
+            "3",
+            "--repeat",
+            "1",
+            "--output",
+            str(output),
+        ]
+    )
+    with open(output) as f:
+        results = json.load(f)
+    assert {result["benchmark"] for result in results["results"]} == set(BENCHMARKS)
+    assert all(result["best"] > 0 for result in results["results"])
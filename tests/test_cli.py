@@ -0,0 +1,179 @@
+import gzip
+import json
+
+import networkx as nx
+import pytest
+from gerrychain import Graph, Partition
+from gerrychain.updaters import Election, Tally
+
+from gerrytools.cli import build_scores, main, read_assignments
+from gerrytools.data.AssignmentCompressor import AssignmentCompressor
+from gerrytools.scoring import (
+    cut_edges,
+    demographic_tallies,
+    read_columns,
+    seats,
+    splits,
+    summarize_many,
+)
+
+SPEC = {
+    "updaters": {
+        "tallies": ["TOTPOP"],
+        "elections": {"SEN16": {"Dem": "D16", "Rep": "R16"}},
+    },
+    "scores": [
+        "cut_edges",
+        {"splits": {"unit": "COUNTY"}},
+        {"seats": {"election_cols": ["SEN16"], "party": "Dem"}},
+        {"demographic_tallies": {"population_cols": ["TOTPOP"]}},
+    ],
+}
+
+
+@pytest.fixture
+def graph(tmp_path):
+    """An 8x8 grid with integer nodes, written to `tmp_path / "graph.json"`."""
+    graph = Graph(nx.convert_node_labels_to_integers(nx.grid_2d_graph(8, 8)))
+    for n in graph.nodes:
+        x, y = divmod(n, 8)
+        graph.nodes[n].update(
+            TOTPOP=50 + (7 * x + 13 * y) % 100,
+            D16=(17 * x + 5 * y) % 97,
+            R16=(3 * x + 19 * y) % 89,
+            COUNTY=(x // 4) * 2 + y // 4,
+            GEOID=f"G{n:03}",
+        )
+    graph.to_json(str(tmp_path / "graph.json"))
+    return graph
+
+
+@pytest.fixture
+def assignments(graph):
+    return [
+        {n: (n // 8 + k) // 2 % 4 if k % 2 else (n % 8) // 2 for n in graph.nodes}
+        for k in range(5)
+    ]
+
+
+def _expected(graph, assignments):
+    updaters = {
+        "TOTPOP": Tally("TOTPOP", alias="TOTPOP"),
+        "SEN16": Election("SEN16", {"Dem": "D16", "Rep": "R16"}),
+    }
+    scores = [
+        cut_edges(),
+        splits("COUNTY"),
+        seats(["SEN16"], "Dem"),
+        *demographic_tallies(["TOTPOP"]),
+    ]
+    parts = [Partition(graph, a, updaters) for a in assignments]
+    return summarize_many(parts, scores)
+
+
+def test_build_scores():
+    names = [score.name for score in build_scores(SPEC["scores"])]
+    assert names == ["cut_edges", "COUNTY_splits", "Dem_seats", "TOTPOP"]
+
+    with pytest.raises(ValueError, match="Unknown score"):
+        build_scores(["summarize"])
+    with pytest.raises(ValueError, match="isn't a score name"):
+        build_scores([{"cut_edges": {}, "splits": {"unit": "COUNTY"}}])
+
+
+@pytest.mark.parametrize("output", ["scores.parquet", "scores.arrow"])
+def test_score__jsonl_to_columns(graph, assignments, tmp_path, output):
+    # BEN-style lines, in the graph's node order, gzipped.
+    ensemble = tmp_path / "ensemble.jsonl.gz"
+    with gzip.open(ensemble, "wt") as f:
+        for sample, a in enumerate(assignments):
+            line = {"assignment": [a[n] for n in graph.nodes], "sample": sample}
+            f.write(json.dumps(line) + "\n")
+    spec = tmp_path / "scores.json"
+    spec.write_text(json.dumps(SPEC))
+
+    main(
+        [
+            "score",
+            str(ensemble),
+            "--graph",
+            str(tmp_path / "graph.json"),
+            "--scores",
+            str(spec),
+            "--output",
+            str(tmp_path / output),
+            "--workers",
+            "2",
+            "--chunksize",
+            "2",
+        ]
+    )
+
+    columns = read_columns(str(tmp_path / output))
+    expected = _expected(graph, assignments)
+    assert columns["id"].tolist() == list(range(len(assignments)))
+    assert columns["cut_edges"].tolist() == [s["cut_edges"] for s in expected]
+    assert columns["COUNTY_splits"].tolist() == [s["COUNTY_splits"] for s in expected]
+    assert columns["Dem_seats.SEN16"].tolist() == [
+        s["Dem_seats"]["SEN16"] for s in expected
+    ]
+
+
+def test_score__assignment_compressor(graph, assignments, tmp_path):
+    pytest.importorskip("yaml")
+    geoids = [graph.nodes[n]["GEOID"] for n in graph.nodes]
+    ensemble = tmp_path / "ensemble.ac"
+    AssignmentCompressor(geoids, location=str(ensemble)).compress_all(
+        [{graph.nodes[n]["GEOID"]: str(d) for n, d in a.items()} for a in assignments]
+    )
+    read = list(read_assignments(str(ensemble), graph, key="GEOID"))
+    assert read == assignments
+
+    spec = tmp_path / "scores.yaml"
+    spec.write_text(
+        "updaters:\n"
+        "  tallies: [TOTPOP]\n"
+        "scores:\n"
+        "  - cut_edges\n"
+        "  - demographic_tallies: {population_cols: [TOTPOP]}\n"
+    )
+    main(
+        [
+            "score",
+            str(ensemble),
+            "--graph",
+            str(tmp_path / "graph.json"),
+            "--scores",
+            str(spec),
+            "--key",
+            "GEOID",
+            "--output",
+            str(tmp_path / "scores.jsonl"),
+        ]
+    )
+    with open(tmp_path / "scores.jsonl") as f:
+        rows = [json.loads(line) for line in f]
+    expected = _expected(graph, assignments)
+    assert [row["cut_edges"] for row in rows] == [s["cut_edges"] for s in expected]
+    assert [row["TOTPOP"] for row in rows] == [
+        {str(d): pop for d, pop in s["TOTPOP"].items()} for s in expected
+    ]
+
+
+def test_score__unknown_output_format(graph, tmp_path, capsys):
+    spec = tmp_path / "scores.json"
+    spec.write_text(json.dumps({"scores": ["cut_edges"]}))
+    with pytest.raises(SystemExit):
+        main(
+            [
+                "score",
+                str(tmp_path / "ensemble.jsonl"),
+                "--graph",
+                str(tmp_path / "graph.json"),
+                "--scores",
+                str(spec),
+                "--output",
+                str(tmp_path / "scores.csv"),
+            ]
+        )
+    assert "output format" in capsys.readouterr().err
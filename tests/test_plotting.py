@@ -2,7 +2,8 @@ import geopandas as gpd
 import matplotlib.pyplot as plt
 import numpy as np
 
-from gerrytools.plotting import boxplot, districtr, drawgraph, drawplan
+from gerrytools.plotting import boxplot, districtr, drawgraph, drawplan, histogram
+from gerrytools.scoring import EnsembleStatistics
 
 from .utils import remotegraphresource, remoteresource
 
@@ -63,5 +64,34 @@ def test_boxplot():
     plt.close()
 
 
+def test_streamed_histogram_and_boxplot():
+    rng = np.random.default_rng(2024)
+    statistics = EnsembleStatistics(
+        bins={"cut_edges": range(0, 201, 5)}, ranked=["share"]
+    )
+    for _ in range(1000):
+        statistics.update(
+            {
+                "cut_edges": int(rng.normal(100, 15)),
+                "share": dict(enumerate(rng.uniform(0, 1, size=8))),
+            }
+        )
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    scores = {
+        "ensemble": statistics.histograms["cut_edges"],
+        "citizen": [],
+        "proposed": [90],
+    }
+    ax = histogram(ax, scores, proposed_info={"names": ["Plan 1"]})
+    assert ax.patches
+    plt.close()
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax = boxplot(ax, {"ensemble": statistics.ranks["share"]})
+    assert len(ax.get_xticks()) == 8
+    plt.close()
+
+
 if __name__ == "__main__":
     test_boxplot()
@@ -1,25 +1,78 @@
+import gzip
+import json
+import mmap
+import pickle
+import random
 from math import pi, sqrt
 from pathlib import Path
 
 import geopandas as gpd
+import networkx as nx
+import numpy as np
 import pytest
 from gerrychain import Graph, Partition
+from gerrychain.constraints import contiguous as ctgs
 from gerrychain.grid import Grid
+from gerrychain.updaters import Election, Tally
 from shapely.geometry import box
 
 from gerrytools.scoring import (
+    CacheStats,
+    ColumnarWriter,
+    DedupeStats,
+    EnsembleStatistics,
+    PipelineStats,
+    PlanMemo,
+    Profiler,
+    UnitGeometry,
+    aggregate_seats,
+    assignment_matrix,
+    check_contiguity,
+    competitive_contests,
     contiguous,
     convex_hull,
+    cut_edges,
+    demographic_shares,
+    demographic_tallies,
     deviations,
+    district_components,
+    efficiency_gap,
+    eguia,
+    gingles_districts,
+    max_deviation,
+    mean_median,
+    merge_shards,
+    opp_party_districts,
+    parallel,
+    partisan_bias,
+    partisan_gini,
+    party_districts,
+    party_wins_by_district,
     pieces,
+    plan_context,
+    plan_hash,
     polsby_popper,
     pop_polygon,
+    read_columns,
     reock,
+    responsive_proportionality,
     schwartzberg,
+    seats,
+    simplified_efficiency_gap,
     splits,
+    stable_proportionality,
+    stray_nodes,
     summarize,
+    summarize_batch,
+    summarize_many,
+    swing_districts,
     unassigned_units,
+    unique_plans,
 )
+from gerrytools.scoring.batch import _node_columns, _nodes
+from gerrytools.scoring.products import plan, unit_contingency
+from gerrytools.scoring.splits import _pieces, _splits
+from gerrytools.scoring.types import Score
 
 from .utils import remotegraphresource
 
@@ -48,6 +101,911 @@ def ia_enacted(ia_graph):
     return Partition(graph=ia_graph, assignment="DISTRICT")
 
 
+@pytest.fixture(scope="module")
+def grid_elections():
+    """Elections on `grid_graph`; the second lists its parties in reverse order."""
+    return [
+        Election("SEN16", {"Dem": "D16", "Rep": "R16"}),
+        Election("GOV18", {"Rep": "R18", "Dem": "D18"}),
+    ]
+
+
+@pytest.fixture(scope="module")
+def grid_graph():
+    """A 12x12 grid with pseudorandom demographic and election data."""
+    graph = Grid((12, 12)).graph
+    for x, y in graph.nodes:
+        data = graph.nodes[(x, y)]
+        data["TOTPOP"] = 50 + (7 * x + 13 * y) % 100
+        data["BPOP"] = (11 * x + 3 * y) % 50
+        data["D16"], data["R16"] = (17 * x + 5 * y) % 97, (3 * x + 19 * y) % 89
+        data["D18"], data["R18"] = (5 * x * y) % 83, (x + 23 * y) % 79
+        data["COUNTY"] = (x // 4) * 3 + y // 4
+        data["TRACT"] = f"{x // 2:02}{y // 3:02}"
+    return graph
+
+
+@pytest.fixture(scope="module")
+def grid_plans(grid_graph, grid_elections):
+    """A handful of plans on `grid_graph` with varying numbers of districts."""
+    updaters = {
+        "TOTPOP": Tally("TOTPOP", alias="TOTPOP"),
+        "BPOP": Tally("BPOP", alias="BPOP"),
+        **{election.name: election for election in grid_elections},
+    }
+    assignments = [
+        (
+            {(x, y): ((x + k) // 3) % 4 + 1 for x, y in grid_graph.nodes}
+            if k % 2
+            else {(x, y): (y * (k + 1) // 7) % 5 for x, y in grid_graph.nodes}
+        )
+        for k in range(6)
+    ]
+    return [Partition(grid_graph, a, updaters) for a in assignments]
+
+
+def test_summarize_batch__matches_summarize(grid_graph, grid_elections, grid_plans):
+    elections = ["SEN16", "GOV18"]
+    updaters = {
+        "TOTPOP": Tally("TOTPOP", alias="TOTPOP"),
+        **{election.name: election for election in grid_elections},
+    }
+    scores = [
+        *demographic_tallies(["TOTPOP", "BPOP"]),
+        *demographic_shares({"TOTPOP": ["BPOP"]}),
+        *gingles_districts({"TOTPOP": ["BPOP"]}, threshold=0.25),
+        max_deviation("TOTPOP", pct=True),
+        cut_edges(),
+        competitive_contests(elections, "Dem", points_within=0.1),
+        swing_districts(elections, "Dem"),
+        party_districts(elections, "Dem"),
+        opp_party_districts(elections, "Dem"),
+        party_wins_by_district(elections, "Dem"),
+        seats(elections, "Dem"),
+        aggregate_seats(elections, "Rep"),
+        responsive_proportionality(elections, "Dem"),
+        stable_proportionality(elections, "Dem"),
+        efficiency_gap(elections),
+        simplified_efficiency_gap(elections, "Dem", mean=True),
+        mean_median(elections),
+        partisan_bias(elections),
+        partisan_gini(elections),
+        eguia(elections, "Dem", grid_graph, updaters, "COUNTY", "TOTPOP"),
+        polsby_popper(dissolved=False),
+        schwartzberg(dissolved=False),
+    ]
+
+    expected = [summarize(part, scores) for part in grid_plans]
+    batched = summarize_batch(
+        assignment_matrix(grid_plans, grid_graph),
+        scores,
+        grid_graph,
+        elections=grid_elections,
+        block_size=4,
+    )
+
+    _assert_summaries_close(expected, batched)
+
+
+def _assert_summaries_close(expected, actual):
+    assert len(actual) == len(expected)
+    for plan_expected, plan_actual in zip(expected, actual):
+        assert plan_expected.keys() == plan_actual.keys()
+        for name, value in plan_expected.items():
+            if isinstance(value, dict):
+                assert value.keys() == plan_actual[name].keys()
+                for key in value:
+                    assert plan_actual[name][key] == pytest.approx(value[key])
+            else:
+                assert plan_actual[name] == pytest.approx(value)
+
+
+def test_summarize_batch__requires_batch_scores(grid_graph, grid_plans):
+    with pytest.raises(ValueError):
+        summarize_batch(
+            assignment_matrix(grid_plans, grid_graph), [reock()], grid_graph
+        )
+
+
+def test_summarize_parallel__shared_buffers(monkeypatch):
+    monkeypatch.setattr(parallel, "_WORKER_STATE", {})
+    areas = np.arange(1000, dtype=float)
+    payload = {"areas": areas, "graph": {"nodes": [1, 2]}, "updaters": {}}
+
+    with parallel._SharedPayload(payload) as shared:
+        parallel._attach(shared.path, shared.layout)
+        state = parallel._WORKER_STATE
+
+        # The array is backed by the file rather than copied, and writes to it
+        # stay in the worker.
+        base = state["areas"]
+        while isinstance(base, np.ndarray):
+            base = base.base
+        assert isinstance(base.obj, mmap.mmap)
+        np.testing.assert_array_equal(state["areas"], areas)
+        state["areas"][0] = -1
+        parallel._attach(shared.path, shared.layout)
+        assert state["areas"][0] == 0
+        assert state["graph"] == {"nodes": [1, 2]}
+
+
+def test_summarize_parallel__packs_graph_and_geometries(monkeypatch, grid_graph):
+    monkeypatch.setattr(parallel, "_WORKER_STATE", {})
+    polygons = gpd.GeoDataFrame(
+        {"GEOID": ["a", "b"], "TOTPOP": [3, 4]},
+        geometry=[box(0, 0, 1, 1), box(1, 0, 2, 1)],
+        crs="EPSG:3857",
+    )
+    mixed = polygons.set_geometry([box(0, 0, 1, 1), box(1, 0, 2, 1).boundary])
+    payload = {
+        "graph": parallel._PackedGraph(grid_graph),
+        "polygons": parallel._PackedGeometries(polygons),
+        "mixed": parallel._PackedGeometries(mixed),
+        "updaters": {},
+    }
+
+    with parallel._SharedPayload(payload) as shared:
+        parallel._attach(shared.path, shared.layout)
+        graph = parallel._unpacked("graph")
+        assert list(graph.nodes) == list(grid_graph.nodes)
+        assert nx.utils.graphs_equal(graph, grid_graph.graph)
+
+        # Numeric node attributes are read from the mapped file.
+        base = _node_columns(graph).column("TOTPOP")
+        while isinstance(base, np.ndarray):
+            base = base.base
+        assert isinstance(base.obj, mmap.mmap)
+
+        for name, gdf in [("polygons", polygons), ("mixed", mixed)]:
+            unpacked = parallel._unpacked(name)
+            assert unpacked.crs == gdf.crs
+            assert unpacked.drop(columns="geometry").equals(
+                gdf.drop(columns="geometry")
+            )
+            assert unpacked.geometry.geom_equals_exact(gdf.geometry, 0).all()
+
+
+def test_summarize_parallel__removes_payload_on_failure(monkeypatch):
+    paths = []
+    mkstemp = parallel.tempfile.mkstemp
+
+    def recording_mkstemp(*args, **kwargs):
+        handle, path = mkstemp(*args, **kwargs)
+        paths.append(path)
+        return handle, path
+
+    monkeypatch.setattr(parallel.tempfile, "mkstemp", recording_mkstemp)
+    # An alignment of zero fails partway through writing the file.
+    monkeypatch.setattr(parallel, "_ALIGN", 0)
+    with pytest.raises(ZeroDivisionError):
+        parallel._SharedPayload({"areas": np.arange(10.0)})
+    assert paths and not Path(paths[0]).exists()
+
+
+def test_summarize_many__workers(grid_plans, tmp_path):
+    scores = [
+        *demographic_tallies(["TOTPOP"]),
+        seats(["SEN16", "GOV18"], "Dem"),
+        cut_edges(),
+    ]
+    expected = summarize_many(grid_plans, scores)
+    assert summarize_many(grid_plans, scores, workers=2, chunksize=2) == expected
+
+    output_file = tmp_path / "summaries.jsonl"
+    summarize_many(
+        grid_plans, scores, output_file=str(output_file), workers=2, chunksize=4
+    )
+    with open(output_file) as f:
+        written = [json.loads(line) for line in f]
+    assert [plan["id"] for plan in written] == list(range(len(grid_plans)))
+    assert [plan["cut_edges"] for plan in written] == [
+        plan["cut_edges"] for plan in expected
+    ]
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_summarize_many__columnar(grid_plans, tmp_path, output_format):
+    pytest.importorskip("pyarrow")
+    scores = [
+        *demographic_tallies(["TOTPOP"]),
+        seats(["SEN16", "GOV18"], "Dem"),
+        cut_edges(),
+    ]
+    expected = summarize_many(grid_plans, scores)
+
+    output_file = str(tmp_path / f"summaries.{output_format}")
+    summarize_many(
+        grid_plans,
+        scores,
+        output_file=output_file,
+        output_format=output_format,
+        row_group_size=3,
+    )
+
+    columns = read_columns(output_file)
+    assert columns["id"].tolist() == list(range(len(grid_plans)))
+    assert columns["cut_edges"].tolist() == [plan["cut_edges"] for plan in expected]
+
+    # A score name selects every district's (or election's) column.
+    seats_columns = read_columns(output_file, columns=["Dem_seats"])
+    assert set(seats_columns) == {"Dem_seats.SEN16", "Dem_seats.GOV18"}
+    assert seats_columns["Dem_seats.GOV18"].tolist() == [
+        plan["Dem_seats"]["GOV18"] for plan in expected
+    ]
+    # Districts a plan doesn't have are left empty.
+    district = next(iter(expected[0]["TOTPOP"]))
+    totpop = read_columns(output_file, columns=[f"TOTPOP.{district}"])
+    for value, plan in zip(totpop[f"TOTPOP.{district}"], expected):
+        if district in plan["TOTPOP"]:
+            assert value == plan["TOTPOP"][district]
+        else:
+            assert np.isnan(value)
+
+    with pytest.raises(KeyError):
+        read_columns(output_file, columns=["polsby_popper"])
+
+    # Columnar files are compressed by their format, not by gzip.
+    with pytest.raises(ValueError):
+        summarize_many(
+            grid_plans,
+            scores,
+            output_file=output_file,
+            output_format=output_format,
+            compress=True,
+        )
+
+    # Columns are fixed by the first row group, so scores with varying keys
+    # are turned away before any plan is scored.
+    with pytest.raises(ValueError):
+        summarize_many(
+            grid_plans,
+            [stray_nodes()],
+            output_file=output_file,
+            output_format=output_format,
+        )
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_columnar_writer__types_later_values(tmp_path, output_format):
+    pytest.importorskip("pyarrow")
+    output_file = str(tmp_path / f"summaries.{output_format}")
+    with ColumnarWriter(output_file, output_format, row_group_size=2) as writer:
+        writer.write({"score": 3, "names": []}, id=0)
+        writer.write({"score": 4, "names": []}, id=1)
+        writer.write({"score": 3.5, "names": ["a", "b"]}, id=2)
+        writer.write({"score": 2, "names": []}, id=3)
+
+    columns = read_columns(output_file)
+    assert columns["id"].tolist() == [0, 1, 2, 3]
+    assert columns["score"].tolist() == [3, 4, 3.5, 2]
+    assert [list(names) for names in columns["names"]] == [[], [], ["a", "b"], []]
+
+    # Values that can't be stored in a column's type without loss are refused.
+    with pytest.raises(ValueError):
+        with ColumnarWriter(output_file, output_format, row_group_size=1) as writer:
+            writer.write({"score": 1}, id=0)
+            writer.write({"score": 1}, id=1.5)
+
+
+class _Crash(Exception):
+    pass
+
+
+@pytest.mark.parametrize("pipeline", [False, True])
+def test_summarize_many__checkpoint_resumes(grid_plans, tmp_path, pipeline):
+    scores = [*demographic_tallies(["TOTPOP"]), cut_edges()]
+    expected = summarize_many(grid_plans, scores)
+    output_file = tmp_path / "summaries.jsonl"
+
+    # Crash partway through the sixth plan; the first four, checkpointed in
+    # pairs, are kept.
+    scored = []
+
+    def crash(part):
+        scored.append(part)
+        if len(scored) == 6:
+            raise _Crash
+        return len(scored)
+
+    with pytest.raises(_Crash):
+        summarize_many(
+            grid_plans,
+            [*scores, Score("count", crash)],
+            output_file=str(output_file),
+            checkpoint=True,
+            checkpoint_every=2,
+            pipeline=pipeline,
+        )
+    assert not output_file.exists()
+    # When pipelining, the writing stage may not have caught up with scoring.
+    sidecar = Path(f"{output_file}.checkpoint")
+    resumed = json.loads(sidecar.read_text())["next"] if sidecar.exists() else 0
+    assert resumed in ((0, 2, 4) if pipeline else (4,))
+
+    scored.clear()
+    summarize_many(
+        grid_plans,
+        [*scores, Score("count", lambda part: scored.append(part) or len(scored))],
+        output_file=str(output_file),
+        checkpoint=True,
+        checkpoint_every=2,
+        pipeline=pipeline,
+    )
+    assert len(scored) == len(grid_plans) - resumed
+    assert not Path(f"{output_file}.checkpoint").exists()
+
+    with open(output_file) as f:
+        written = [json.loads(line) for line in f]
+    assert [plan["id"] for plan in written] == list(range(len(grid_plans)))
+    assert [plan["cut_edges"] for plan in written] == [
+        plan["cut_edges"] for plan in expected
+    ]
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_summarize_many__checkpoint_columnar(grid_plans, tmp_path, output_format):
+    pytest.importorskip("pyarrow")
+    scores = [seats(["SEN16", "GOV18"], "Dem"), cut_edges()]
+    names = [f"plan-{i}" for i in range(len(grid_plans))]
+    expected_file = str(tmp_path / f"expected.{output_format}")
+    summarize_many(
+        grid_plans,
+        scores,
+        plan_names=names,
+        output_file=expected_file,
+        output_format=output_format,
+    )
+
+    # Crash on the sixth plan, then resume from the fourth.
+    scored = []
+
+    def crash(part):
+        scored.append(part)
+        if len(scored) == 6:
+            raise _Crash
+        return scores[1].apply(part)
+
+    output_file = tmp_path / f"summaries.{output_format}"
+    options = dict(
+        plan_names=names,
+        output_file=str(output_file),
+        output_format=output_format,
+        checkpoint=True,
+        checkpoint_every=2,
+    )
+    with pytest.raises(_Crash):
+        summarize_many(grid_plans, [scores[0], Score("cut_edges", crash)], **options)
+    assert not output_file.exists()
+
+    summarize_many(grid_plans, scores, **options)
+    assert not Path(f"{output_file}.partial").exists()
+    assert not Path(f"{output_file}.checkpoint").exists()
+
+    # The columns match those written without checkpointing.
+    expected, written = read_columns(expected_file), read_columns(str(output_file))
+    assert list(written) == list(expected)
+    for name, column in expected.items():
+        assert written[name].tolist() == column.tolist()
+
+
+def test_summarize_many__dedupe_workers(grid_plans):
+    scores = [seats(["SEN16", "GOV18"], "Dem"), cut_edges()]
+    a, b, c = grid_plans[:3]
+    ensemble = [a, a, b, a, c, c, *grid_plans[3:]]
+    expected = summarize_many(ensemble, scores, dedupe=True)
+
+    stats = DedupeStats()
+    summaries = summarize_many(
+        ensemble, scores, dedupe=True, dedupe_stats=stats, workers=2, chunksize=2
+    )
+    assert summaries == expected
+    assert [row["multiplicity"] for row in summaries][:4] == [2, 1, 1, 2]
+    assert stats.plans == len(ensemble)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"incremental": True, "workers": 2},
+        {"stats": CacheStats(), "workers": 2},
+        {"profiler": Profiler(), "workers": 2},
+        {"compress": True, "output_format": "parquet", "output_file": "out.parquet"},
+        {"checkpoint": True},
+        {"memo": PlanMemo()},
+        {"dedupe_stats": DedupeStats()},
+        {"pipeline_stats": PipelineStats()},
+        {"dedupe": True, "shard": (0, 2)},
+    ],
+)
+def test_summarize_many__rejects_unsupported_options(grid_plans, tmp_path, options):
+    if "output_file" in options:
+        options = {**options, "output_file": str(tmp_path / options["output_file"])}
+    with pytest.raises(ValueError):
+        summarize_many(grid_plans, [cut_edges()], **options)
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_summarize_many__shards_merge(grid_plans, tmp_path, compress):
+    scores = [cut_edges()]
+    whole = tmp_path / "whole.jsonl"
+    summarize_many(grid_plans, scores, output_file=str(whole))
+
+    shards = []
+    for k in range(3):
+        path = tmp_path / f"shard-{k}.jsonl"
+        summarize_many(
+            grid_plans,
+            scores,
+            output_file=str(path),
+            shard=(k, 3),
+            compress=compress,
+            checkpoint=True,
+        )
+        shards.append(f"{path}.gz" if compress else str(path))
+    merged = tmp_path / "merged.jsonl"
+    merge_shards(shards, str(merged))
+    assert merged.read_text() == whole.read_text()
+
+    # Rows left out by deduplication would shift every later plan.
+    deduplicated = tmp_path / "deduplicated.jsonl"
+    deduplicated.write_text(json.dumps({"cut_edges": 1, "multiplicity": 2}) + "\n")
+    with pytest.raises(ValueError):
+        merge_shards([str(deduplicated), shards[1]], str(tmp_path / "bad.jsonl"))
+
+    ranges = []
+    for start, stop in [(0, 4), (4, None)]:
+        path = tmp_path / f"range-{start}.jsonl"
+        summarize_many(
+            grid_plans, scores, output_file=str(path), id_range=(start, stop)
+        )
+        ranges.append(str(path))
+    merge_shards(ranges, str(merged), interleave=False)
+    assert merged.read_text() == whole.read_text()
+
+    with pytest.raises(ValueError):
+        summarize_many(grid_plans, scores, shard=(3, 3))
+
+
+def test_plan_hash__ignores_district_labels(grid_graph, grid_plans):
+    part = grid_plans[1]
+    relabelled = {node: 10 * d for node, d in part.assignment.items()}
+    row = assignment_matrix([part], grid_graph)[0]
+
+    assert plan_hash(part) == plan_hash(relabelled, grid_graph) == plan_hash(row)
+    assert plan_hash(part) != plan_hash(grid_plans[3])
+    assert len(unique_plans(grid_plans)) == len(grid_plans)
+    assert unique_plans([part, grid_plans[0], part])[plan_hash(part)] == 2
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_summarize_many__dedupe(grid_plans, tmp_path, on_disk):
+    scores = [seats(["SEN16", "GOV18"], "Dem"), cut_edges()]
+    a, b, c = grid_plans[:3]
+    ensemble = [a, a, a, b, Partition(a.graph, dict(a.assignment), a.updaters), c, c]
+    memo = PlanMemo(path=str(tmp_path / "memo.db") if on_disk else None)
+    stats = DedupeStats()
+
+    output = tmp_path / "out.jsonl"
+    summarize_many(
+        ensemble,
+        scores,
+        output_file=str(output),
+        dedupe=True,
+        memo=memo,
+        dedupe_stats=stats,
+    )
+    with open(output) as f:
+        rows = [json.loads(line) for line in f]
+
+    # Runs of a plan collapse into one row counting the run; the copy of `a`
+    # after `b` is a row of its own, but isn't scored again.
+    assert [(row["id"], row["multiplicity"]) for row in rows] == [
+        (0, 3),
+        (3, 1),
+        (4, 1),
+        (5, 2),
+    ]
+    expected = [summarize(part, scores) for part in (a, b, a, c)]
+    for row, summary in zip(rows, expected):
+        assert row["cut_edges"] == summary["cut_edges"]
+        assert row["Dem_seats"] == summary["Dem_seats"]
+    assert (stats.plans, stats.repeats, stats.memo_hits, stats.scored) == (7, 3, 1, 3)
+    assert stats.unique == 3
+    assert len(memo) == 3
+    memo.close()
+
+    # A memo kept on disk serves later runs over the same plans.
+    if on_disk:
+        stats = DedupeStats()
+        memo = PlanMemo(path=str(tmp_path / "memo.db"))
+        again = summarize_many(
+            ensemble, scores, dedupe=True, memo=memo, dedupe_stats=stats
+        )
+        assert [row["cut_edges"] for row in again] == [row["cut_edges"] for row in rows]
+        assert (stats.memo_hits, stats.scored) == (4, 0)
+        memo.close()
+
+    # A memo or stats without deduplication would be ignored.
+    with pytest.raises(ValueError):
+        summarize_many(ensemble, scores, dedupe_stats=DedupeStats())
+
+
+def test_dedupe_stats__estimates_unique_plans_in_fixed_memory():
+    stats = DedupeStats()
+    size = len(stats.sketch.registers)
+    rng = np.random.default_rng(0)
+    digests = [rng.bytes(16) for _ in range(20_000)]
+    for digest in digests + digests[:5_000]:
+        stats.sketch.add(digest)
+    assert abs(stats.unique - 20_000) < 0.03 * 20_000
+    assert len(stats.sketch.registers) == size
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_summarize_many__pipeline(grid_plans, tmp_path, compress):
+    scores = [seats(["SEN16", "GOV18"], "Dem"), cut_edges()]
+    ensemble = [grid_plans[0]] * 2 + grid_plans
+
+    expected = tmp_path / "expected.jsonl"
+    summarize_many(ensemble, scores, output_file=str(expected), compress=compress)
+
+    # Pipelined output matches, even when every queue holds a single item.
+    stats = PipelineStats()
+    output = tmp_path / "out.jsonl"
+    summarize_many(
+        ensemble,
+        scores,
+        output_file=str(output),
+        compress=compress,
+        pipeline=True,
+        queue_size=1,
+        pipeline_stats=stats,
+    )
+    read = (lambda path: gzip.open(f"{path}.gz", "rt")) if compress else open
+    with read(expected) as f, read(output) as g:
+        assert f.read() == g.read()
+
+    assert [stage.items for stage in stats.stages] == [len(ensemble)] * 3
+    assert all(stage.busy > 0 for stage in stats.stages)
+    assert stats.bottleneck == "score"
+    assert stats.summary()["stage"].tolist() == ["read", "score", "write"]
+
+    # Deduplicated summaries are returned in order.
+    returned = summarize_many(ensemble, scores, dedupe=True, pipeline=True)
+    assert [row["multiplicity"] for row in returned] == [3] + [1] * (
+        len(grid_plans) - 1
+    )
+
+
+def test_summarize_many__pipeline_errors(grid_plans, tmp_path):
+    def plans():
+        yield from grid_plans[:2]
+        raise RuntimeError("corrupt plan")
+
+    with pytest.raises(RuntimeError, match="corrupt plan"):
+        summarize_many(plans(), [cut_edges()], pipeline=True)
+
+    # A failed write stops the run instead of leaving the stages waiting.
+    with pytest.raises(TypeError):
+        summarize_many(
+            grid_plans,
+            [Score("bad", lambda part: object())],
+            output_file=str(tmp_path / "out.jsonl"),
+            pipeline=True,
+            queue_size=1,
+        )
+
+
+def test_ensemble_statistics__stream_and_merge(tmp_path):
+    rng = np.random.default_rng(2024)
+    values = rng.normal(50, 10, size=20_000)
+    districts = rng.uniform(0, 1, size=(20_000, 6))
+    summaries = [
+        {"score": x, "by_election": {"SEN": 2 * x}, "share": dict(enumerate(row))}
+        for x, row in zip(values, districts)
+    ]
+
+    # Two shards, one saved and loaded, merge into the statistics of the whole.
+    shards = [
+        EnsembleStatistics(bins={"score": np.linspace(0, 100, 21)}, ranked=["share"])
+        for _ in range(2)
+    ]
+    for i, summary in enumerate(summaries):
+        shards[i % 2].update(summary)
+    shards[1].save(str(tmp_path / "shard.json"))
+    statistics = shards[0].merge(EnsembleStatistics.load(str(tmp_path / "shard.json")))
+
+    assert statistics.plans == len(values)
+    moments = statistics.moments["score"]
+    assert moments.mean == pytest.approx(values.mean())
+    assert moments.variance == pytest.approx(values.var(ddof=1))
+    assert (moments.min, moments.max) == (values.min(), values.max())
+    assert statistics.moments["by_election.SEN"].mean == pytest.approx(
+        2 * values.mean()
+    )
+
+    qs = [0.1, 0.5, 0.9]
+    ranks = np.searchsorted(np.sort(values), statistics.quantiles("score", qs)) / len(
+        values
+    )
+    assert ranks == pytest.approx(qs, abs=0.02)
+
+    counts, _ = np.histogram(values, bins=np.linspace(0, 100, 21))
+    histogram = statistics.histograms["score"]
+    assert histogram.counts.tolist() == counts.tolist()
+    assert histogram.underflow + histogram.overflow + counts.sum() == len(values)
+
+    expected = np.quantile(np.sort(districts, axis=1), qs, axis=0).T
+    assert statistics.rank_quantiles("share", qs) == pytest.approx(expected, abs=0.03)
+
+
+def test_summarize_many__statistics(grid_plans):
+    scores = [cut_edges(), *demographic_tallies(["TOTPOP"])]
+    ensemble = [grid_plans[0]] * 3 + grid_plans[1:]
+    statistics = EnsembleStatistics(ranked=["TOTPOP"])
+
+    assert summarize_many(ensemble, scores, statistics=statistics, dedupe=True) is None
+
+    # Repeated plans are counted by their multiplicity.
+    cut = [len(part["cut_edges"]) for part in ensemble]
+    assert statistics.plans == len(ensemble)
+    assert statistics.moments["cut_edges"].count == len(ensemble)
+    assert statistics.moments["cut_edges"].mean == pytest.approx(np.mean(cut))
+
+    # Districts are tracked by rank: rank 0 holds each plan's least populous.
+    smallest = [min(part["TOTPOP"].values()) for part in ensemble]
+    assert len(statistics.ranks["TOTPOP"]) == max(len(part) for part in ensemble)
+    assert statistics.ranks["TOTPOP"][0].quantiles([0, 1]).tolist() == [
+        min(smallest),
+        max(smallest),
+    ]
+
+
+def test_profiler__records_scores_and_products(grid_plans, tmp_path):
+    elections = ["SEN16", "GOV18"]
+    scores = [
+        competitive_contests(elections, "Dem"),
+        swing_districts(elections, "Dem"),
+        cut_edges(),
+    ]
+    profiler = Profiler(memory=True)
+    expected = summarize_many(grid_plans, scores)
+    assert summarize_many(grid_plans, scores, profiler=profiler) == expected
+
+    summary = profiler.summary().set_index(["kind", "name"])
+    plans = len(grid_plans)
+    assert summary.loc[("plan", "summarize"), "calls"] == plans
+    for score in scores:
+        assert summary.loc[("score", score.name), "calls"] == plans
+    assert summary.loc[("product", "election_results"), "calls"] == plans
+    assert (summary["peak"] >= 0).all()
+
+    path = tmp_path / "trace.json"
+    profiler.write_chrome_trace(str(path))
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    assert len(events) == len(profiler.events)
+    assert {event["cat"] for event in events} == {"plan", "score", "product"}
+
+    # Nothing is recorded outside the profiler.
+    summarize(grid_plans[0], scores)
+    assert len(profiler.events) == len(events)
+
+    with Profiler() as profiler:
+        summarize(grid_plans[0], scores)
+    assert "peak" not in profiler.summary()
+    assert len(profiler.events) == 1 + len(scores) + 2
+
+    # Workers don't report profiles.
+    with pytest.raises(ValueError):
+        summarize_many(grid_plans, scores, profiler=Profiler(), workers=2)
+
+
+def test_plan_context__shares_partisan_intermediates(grid_plans):
+    elections = ["SEN16", "GOV18"]
+    scores = [
+        competitive_contests(elections, "Dem"),
+        swing_districts(elections, "Dem"),
+        party_districts(elections, "Dem"),
+        opp_party_districts(elections, "Dem"),
+    ]
+
+    stats = CacheStats()
+    for part in grid_plans:
+        with plan_context(part) as context:
+            summarize(part, scores, stats=stats)
+        # The vote-share matrix and district stability are each built once,
+        # up front; every other request is served from the context, which is
+        # emptied once the plan is done.
+        assert context.built == ["election_results", "election_stability"]
+        assert (context.hits, context.misses) == (5, 2)
+        assert not context.products
+
+    assert (stats.hits, stats.misses) == (5 * len(grid_plans), 2 * len(grid_plans))
+    assert stats.built == {
+        "election_results": len(grid_plans),
+        "election_stability": len(grid_plans),
+    }
+
+    # Workers don't report cache statistics.
+    with pytest.raises(ValueError):
+        summarize_many(grid_plans, scores, stats=CacheStats(), workers=2)
+
+
+def test_partisan__vote_tensor_matches_gerrychain(grid_graph, grid_plans):
+    elections = ["SEN16", "GOV18"]
+    scores = [
+        seats(elections, "Dem"),
+        efficiency_gap(elections),
+        mean_median(elections),
+        partisan_bias(elections),
+        partisan_gini(elections),
+    ]
+
+    for part in grid_plans:
+        with plan_context(part) as context:
+            summary = summarize(part, scores)
+        # One vote tensor serves every partisan score of the plan.
+        assert context.built == ["vote_tensor"]
+
+        for e in elections:
+            results = part[e]
+            assert summary["Dem_seats"][e] == results.seats("Dem")
+            assert summary["efficiency_gap"][e] == pytest.approx(
+                results.efficiency_gap()
+            )
+            assert summary["mean_median"][e] == pytest.approx(results.mean_median())
+            assert summary["partisan_bias"][e] == pytest.approx(results.partisan_bias())
+            assert summary["partisan_gini"][e] == pytest.approx(results.partisan_gini())
+
+    # The efficiency gap is only defined for two-party elections.
+    three_way = Election("SEN16_3", {"Dem": "D16", "Rep": "R16", "Ind": "BPOP"})
+    updaters = {"SEN16_3": three_way}
+    part = Partition(grid_graph, dict(grid_plans[0].assignment), updaters)
+    with pytest.raises(ValueError, match="two-party"):
+        summarize(part, [efficiency_gap(["SEN16_3"])])
+
+
+def test_eguia__precomputes_county_ideal(grid_graph, grid_plans):
+    elections = ["SEN16", "GOV18"]
+    updaters = grid_plans[0].updaters
+    score = eguia(elections, "Dem", grid_graph, updaters, "COUNTY", "TOTPOP")
+
+    counties = Partition(grid_graph, "COUNTY", updaters)
+    population = counties["TOTPOP"]
+    ideal = {
+        e: sum(population[c] for c in counties.parts if counties[e].won("Dem", c))
+        / sum(population.values())
+        for e in elections
+    }
+
+    # The score keeps only the county ideals, not the county partition, so it
+    # can be sent to worker processes.
+    restored = pickle.loads(pickle.dumps(score))
+    for part in grid_plans:
+        expected = {
+            e: part[e].seats("Dem") / len(part.parts) - ideal[e] for e in elections
+        }
+        assert score.apply(part) == pytest.approx(expected)
+        assert restored.apply(part) == pytest.approx(expected)
+
+
+@pytest.fixture(scope="module")
+def grid_chain(grid_plans):
+    """A chain of plans, each made by flipping a few boundary nodes of the last."""
+    rng = random.Random(2024)
+    part = grid_plans[1]
+    chain = [part]
+    for _ in range(30):
+        edges = rng.sample(sorted(part["cut_edges"]), 3)
+        part = part.flip({u: part.assignment[v] for u, v in edges})
+        chain.append(part)
+    return chain
+
+
+def test_summarize_many__incremental(grid_graph, grid_plans, grid_chain):
+    elections = ["SEN16", "GOV18"]
+    scores = [
+        *demographic_tallies(["TOTPOP"]),
+        *demographic_shares({"TOTPOP": ["BPOP"]}),
+        cut_edges(),
+        splits("COUNTY"),
+        pieces("COUNTY", popcol="BPOP"),
+        splits("COUNTY", names=True, alias="county_names"),
+        competitive_contests(elections, "Dem", points_within=0.1),
+        party_wins_by_district(elections, "Dem"),
+        seats(elections, "Dem"),
+        efficiency_gap(elections),
+        partisan_gini(elections),
+        polsby_popper(dissolved=False),
+        schwartzberg(dissolved=False),
+    ]
+    updaters = grid_plans[0].updaters
+    fresh = [Partition(grid_graph, dict(p.assignment), updaters) for p in grid_chain]
+    expected = [summarize(part, scores) for part in fresh]
+
+    # Plans made by flipping the previous plan, and plans that have to be
+    # diffed against it, give the same summaries as scoring from scratch.
+    stats = CacheStats()
+    _assert_summaries_close(
+        expected, summarize_many(grid_chain, scores, incremental=True, stats=stats)
+    )
+    assert stats.updates > 0
+
+    # The caller's plans keep their parents.
+    assert all(
+        part.parent is parent for parent, part in zip(grid_chain, grid_chain[1:])
+    )
+
+    fresh = [Partition(grid_graph, dict(p.assignment), updaters) for p in grid_chain]
+    _assert_summaries_close(expected, summarize_many(fresh, scores, incremental=True))
+
+    with pytest.raises(ValueError):
+        summarize_many(grid_chain, scores, incremental=True, workers=2)
+
+
+def test_polsby_popper__graph(ia_enacted, ia_dataframe):
+    dissolved = summarize(
+        ia_enacted,
+        [polsby_popper(), schwartzberg()],
+        gdf=ia_dataframe,
+        join_on="GEOID20",
+    )
+    graph = summarize(
+        ia_enacted, [polsby_popper(dissolved=False), schwartzberg(dissolved=False)]
+    )
+    measured = summarize(
+        ia_enacted,
+        [
+            polsby_popper(
+                geometry=UnitGeometry.from_geodataframe(
+                    ia_enacted.graph, ia_dataframe, join_on="GEOID20"
+                )
+            )
+        ],
+    )
+    for name in ["polsby_popper", "schwartzberg"]:
+        assert graph[name].keys() == dissolved[name].keys()
+        for district, value in dissolved[name].items():
+            assert graph[name][district] == pytest.approx(value, rel=1e-6)
+    for district, value in dissolved["polsby_popper"].items():
+        assert measured["polsby_popper"][district] == pytest.approx(value, rel=1e-3)
+
+
+def test_splits__index_matches_pandas(grid_plans):
+    for part in grid_plans:
+        for unit in ["COUNTY", "TRACT"]:
+            for popcol in [None, "BPOP"]:
+                for names in [False, True]:
+                    assert _splits(
+                        part, unit, names=names, popcol=popcol, how="index"
+                    ) == _splits(part, unit, names=names, popcol=popcol, how="pandas")
+                assert _pieces(part, unit, popcol=popcol, how="index") == _pieces(
+                    part, unit, popcol=popcol, how="pandas"
+                )
+
+
+def test_splits__shared_contingency(grid_plans):
+    scores = [
+        splits("COUNTY"),
+        pieces("COUNTY"),
+        splits("TRACT", names=True),
+        pieces("TRACT"),
+    ]
+    assert plan(scores) == [
+        unit_contingency("COUNTY"),
+        unit_contingency("TRACT"),
+    ]
+
+    # Both unit columns are indexed before the table is built, so one table
+    # answers every score.
+    with plan_context(grid_plans[1]) as context:
+        summarize(grid_plans[1], scores)
+        assert [key[0] for key in context.products] == ["unit_contingency"]
+        assert context.built == ["unit_contingency"]
+
+
 def test_splits_pandas():
     # Read in an existing dual graph.
     dg = remotegraphresource("test-graph.json")
@@ -163,6 +1121,40 @@ def test_deviations():
     assert set(data["CONGRESS"] for _, data in dg.nodes(data=True)) == set(devs.keys())
 
 
+def test_check_contiguity__matches_networkx(grid_graph, grid_plans):
+    scores = [district_components(), stray_nodes()]
+    reports = list(
+        check_contiguity(
+            assignment_matrix(grid_plans, grid_graph), grid_graph, block_size=4
+        )
+    )
+    batched = summarize_batch(
+        assignment_matrix(grid_plans, grid_graph), scores, grid_graph, block_size=4
+    )
+
+    # Ties between the largest components go to the one holding the node that
+    # comes first in the graph's node order.
+    order = {node: i for i, node in enumerate(_nodes(grid_graph))}
+    assert any(not report.contiguous for report in reports)
+    for part, report, summary in zip(grid_plans, reports, batched):
+        expected = {}
+        stray = {}
+        for district, nodes in part.parts.items():
+            components = sorted(
+                nx.connected_components(grid_graph.subgraph(nodes)),
+                key=lambda c: (-len(c), min(order[node] for node in c)),
+            )
+            expected[district] = len(components)
+            if len(components) > 1:
+                stray[district] = set().union(*components[1:])
+
+        assert report.components == expected
+        assert report.contiguous == ctgs(part) == contiguous(part)
+        assert {d: set(nodes) for d, nodes in report.stray_nodes.items()} == stray
+        assert summarize(part, scores) == summary
+        assert summary["district_components"] == expected
+
+
 def test_contiguity():
     dg = remotegraphresource("test-graph.json")
     P = Partition(dg, "CONGRESS")
@@ -259,6 +1251,74 @@ def test_reock__iowa_counties(ia_enacted, ia_dataframe):
     assert abs(avg_reock - 0.38247) < 1e-4
 
 
+def test_reock__unit_hulls(ia_graph, ia_enacted, ia_dataframe):
+    geometry = UnitGeometry.from_geodataframe(
+        ia_enacted.graph, ia_dataframe, join_on="GEOID20"
+    )
+    score = reock(geometry=geometry)
+
+    # Flip a few counties along district boundaries; each plan scored as a step
+    # from the last matches scoring it (and dissolving it) from scratch.
+    rng = random.Random(7)
+    chain = [ia_enacted]
+    for _ in range(4):
+        u, v = rng.choice(sorted(chain[-1]["cut_edges"]))
+        chain.append(chain[-1].flip({u: chain[-1].assignment[v]}))
+    plans = [Partition(ia_graph, dict(p.assignment)) for p in chain]
+
+    incremental = summarize_many(chain, [score], incremental=True)
+    for part, summary in zip(plans, incremental):
+        dissolved = summarize(part, [reock()], gdf=ia_dataframe, join_on="GEOID20")
+        assert summary["reock"] == pytest.approx(summarize(part, [score])["reock"])
+        assert summary["reock"] == pytest.approx(dissolved["reock"], rel=1e-4)
+
+    with pytest.raises(ValueError):
+        reock(geometry=UnitGeometry.from_graph(ia_graph))
+
+
+def test_pop_polygon__iowa_counties(ia_graph, ia_enacted, ia_dataframe):
+    # Treat counties as blocks: every county's population lies in its own
+    # district, so only the hulls' extra population lowers the score.
+    dissolved = summarize(
+        ia_enacted, [pop_polygon(ia_dataframe)], gdf=ia_dataframe, join_on="GEOID20"
+    )["pop_polygon"]
+    assert all(0 < score <= 1 for score in dissolved.values())
+
+    geometry = UnitGeometry.from_geodataframe(
+        ia_enacted.graph, ia_dataframe, join_on="GEOID20"
+    )
+    score = pop_polygon(ia_dataframe, geometry=geometry)
+    assert summarize(ia_enacted, [score])["pop_polygon"] == pytest.approx(dissolved)
+
+    batched = summarize_batch(
+        assignment_matrix([ia_enacted], ia_graph), [score], ia_graph
+    )
+    assert batched[0]["pop_polygon"] == pytest.approx(dissolved)
+
+
+def test_reock__incremental_hulls(grid_graph, grid_plans, grid_chain):
+    nodes = list(grid_graph.nodes)
+    squares = gpd.GeoDataFrame(
+        {"node": range(len(nodes))},
+        geometry=[box(x, y, x + 1, y + 1) for x, y in nodes],
+    )
+    graph = Graph(grid_graph.graph)
+    for i, node in enumerate(nodes):
+        graph.nodes[node]["node"] = i
+    geometry = UnitGeometry.from_geodataframe(graph, squares, join_on="node")
+    score = reock(geometry=geometry)
+
+    # Hulls kept along the chain, adjusted for each step's flips, match hulls
+    # built from scratch.
+    stats = CacheStats()
+    incremental = summarize_many(grid_chain, [score], incremental=True, stats=stats)
+    assert stats.updates > 0
+    updaters = grid_plans[0].updaters
+    for part, summary in zip(grid_chain, incremental):
+        fresh = Partition(grid_graph, dict(part.assignment), updaters)
+        assert summary["reock"] == pytest.approx(summarize(fresh, [score])["reock"])
+
+
 @pytest.mark.skip(reason="Tests should use real-world data.")
 def test_reock_score_squares_geodataframe():
     grid = Grid((10, 10))